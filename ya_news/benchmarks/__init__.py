@@ -0,0 +1,33 @@
+"""
+Бенчмарки проекта YaNews.
+
+Каждый бенчмарк запускается из каталога ya_news как модуль,
+например: python -m benchmarks.home_pagination
+Данные создаются во временной тестовой базе, рабочая база не затрагивается.
+"""
+import os
+import time
+
+import django
+
+
+def setup():
+    """Настраивает Django и создаёт пустую тестовую базу с миграциями."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanews.settings')
+    django.setup()
+    from django.db import connection
+    connection.creation.create_test_db(verbosity=0)
+
+
+def measure(func, repeat=5):
+    """Возвращает лучшее время выполнения func в миллисекундах."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def report(label, milliseconds):
+    print(f'{label:<50} {milliseconds:10.3f} ms')
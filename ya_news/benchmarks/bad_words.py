@@ -0,0 +1,63 @@
+"""
+Проверка комментария на запрещённые слова: перебор против матчера.
+
+    python -m benchmarks.bad_words [--text-length 2000]
+
+Для словарей из 10, 1000 и 50000 слов сравнивает прежний перебор
+слов с подстрочным поиском и скомпилированный BadWordMatcher
+на чистом тексте (худший случай — совпадений нет).
+"""
+import argparse
+import random
+
+from benchmarks import measure, report
+
+LEXICON_SIZES = (10, 1000, 50_000)
+ALPHABET = 'абвгдежзийклмнопрстуфхцчшщыэюя'
+
+
+def random_word(rng):
+    return ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(5, 12)))
+
+
+def loop_search(words, text):
+    lowered_text = text.lower()
+    for word in words:
+        if word in lowered_text:
+            return word
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--text-length', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    from news.lexicon import BadWordMatcher
+
+    rng = random.Random(0)
+    text = ''
+    while len(text) < args.text_length:
+        text += random_word(rng) + ' '
+    for size in LEXICON_SIZES:
+        # Слова словаря оканчиваются на «ъъ» и потому не встречаются в тексте.
+        words = [random_word(rng) + 'ъъ' for _ in range(size)]
+        matcher = None
+
+        def build():
+            nonlocal matcher
+            matcher = BadWordMatcher(words)
+
+        report(f'{size} words, compile', measure(build, 1))
+        assert loop_search(words, text) is matcher.search(text) is None
+        report(f'{size} words, loop', measure(
+            lambda: loop_search(words, text), args.repeat
+        ))
+        report(f'{size} words, matcher', measure(
+            lambda: matcher.search(text), args.repeat
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Курсорная пагинация главной страницы против OFFSET.
+
+    python -m benchmarks.home_pagination [--pages 10000]
+
+Сравнивает время получения первой и последней из --pages страниц.
+"""
+import argparse
+from datetime import date, timedelta
+
+from benchmarks import measure, report, setup
+
+NEWS_PER_DAY = 20
+
+
+def seed(total):
+    from news.models import News
+
+    today = date.today()
+    News.objects.bulk_create(
+        (
+            News(
+                title=f'Новость {i}',
+                text='Текст новости.',
+                date=today - timedelta(days=i // NEWS_PER_DAY)
+            )
+            for i in range(total)
+        ),
+        batch_size=10_000
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pages', type=int, default=10_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    setup()
+
+    from django.conf import settings
+    from django.core.paginator import Paginator
+
+    from news.models import News
+    from news.pagination import FORWARD, CursorPaginator
+
+    per_page = settings.NEWS_COUNT_ON_HOME_PAGE
+    seed(args.pages * per_page)
+    queryset = News.objects.all()
+    paginator = CursorPaginator(queryset, per_page)
+    # Курсор на последнюю запись предыдущей страницы строится один раз
+    # заранее: клиент получает его из ссылки «Старее».
+    anchor = queryset.order_by(*paginator.ordering)[
+        (args.pages - 1) * per_page - 1
+    ]
+    cursor = paginator.make_cursor(anchor, FORWARD)
+    offset_paginator = Paginator(queryset.order_by('-date', '-id'), per_page)
+
+    def offset_page(number):
+        return lambda: list(offset_paginator.page(number).object_list)
+
+    print(f'News: {queryset.count()}, per page: {per_page}')
+    report('cursor, page 1', measure(
+        lambda: paginator.page(None), args.repeat
+    ))
+    report(f'cursor, page {args.pages}', measure(
+        lambda: paginator.page(cursor), args.repeat
+    ))
+    report('offset, page 1', measure(offset_page(1), args.repeat))
+    report(f'offset, page {args.pages}', measure(
+        offset_page(args.pages), args.repeat
+    ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Поиск FTS5 против icontains на архиве новостей.
+
+    python -m benchmarks.news_search [--size 1000000]
+
+Засевает архив из --size новостей со случайным текстом и сравнивает
+первую страницу поиска по редкому и частому слову.
+"""
+import argparse
+import random
+from datetime import date, timedelta
+from itertools import accumulate, islice
+
+from benchmarks import measure, report, setup
+
+VOCABULARY_SIZE = 20_000
+WORDS_IN_TEXT = 60
+
+
+def make_vocabulary():
+    # Латинские псевдослова: частота слова убывает с его номером.
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    rng = random.Random(0)
+    return [
+        ''.join(rng.choice(letters) for _ in range(rng.randint(4, 10)))
+        for _ in range(VOCABULARY_SIZE)
+    ]
+
+
+def seed(total, vocabulary):
+    from news.models import News
+
+    rng = random.Random(1)
+    cum_weights = list(accumulate(
+        1 / rank for rank in range(1, len(vocabulary) + 1)
+    ))
+    today = date.today()
+
+    def articles():
+        for i in range(total):
+            words = rng.choices(
+                vocabulary, cum_weights=cum_weights, k=WORDS_IN_TEXT
+            )
+            yield News(
+                title=' '.join(words[:5]),
+                text=' '.join(words),
+                date=today - timedelta(days=i // 100)
+            )
+
+    # bulk_create превращает аргумент в список, поэтому отдаём архив
+    # частями, чтобы не держать в памяти миллион объектов.
+    stream = articles()
+    while batch := list(islice(stream, 10_000)):
+        News.objects.bulk_create(batch)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    setup()
+
+    from django.conf import settings
+
+    from news.models import News
+    from news.search import search_news
+
+    vocabulary = make_vocabulary()
+    seed(args.size, vocabulary)
+    per_page = settings.NEWS_COUNT_ON_HOME_PAGE
+    print(f'News: {News.objects.count()}')
+    for label, word in (('rare', vocabulary[-1]), ('common', vocabulary[0])):
+        report(f'fts5, {label} word, page 1', measure(
+            lambda: list(search_news(word)[:per_page]), args.repeat
+        ))
+        report(f'fts5, {label} word, count', measure(
+            lambda: search_news(word).count(), args.repeat
+        ))
+        report(f'icontains, {label} word, page 1', measure(
+            lambda: list(News.objects.filter(text__icontains=word)[
+                :per_page
+            ]),
+            args.repeat
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,169 @@
 from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin
+from django.forms.models import BaseInlineFormSet
+from django.urls import reverse
+from django.utils.html import format_html
 
-from .models import Comment, News
+from .models import Comment, News, UserPurge
+from .purge import purge_worker
 
+User = get_user_model()
 
-class CommentInline(admin.StackedInline):
+# Сколько последних комментариев показывать на странице новости;
+# остальные доступны в списке комментариев с постраничным выводом.
+INLINE_COMMENTS_COUNT = 20
+
+
+class PurgeActionMixin:
+    """
+    Заменяет стандартное удаление фоновым: и действие над выбранными
+    объектами, и удаление со страницы объекта.
+
+    Стандартное удаление строит список всех зависимых объектов
+    и удаляет их в одном запросе к админке. Подклассы задают purge:
+    пометить объекты queryset удалёнными и вернуть их число.
+    """
+    actions = ('schedule_purge',)
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    def get_deleted_objects(self, objs, request):
+        # Зависимые объекты удалит фоновая очистка, поэтому страница
+        # подтверждения их не собирает и не перечисляет.
+        return (
+            [str(obj) for obj in objs],
+            {self.opts.verbose_name_plural: len(objs)},
+            set(),
+            [],
+        )
+
+    def delete_model(self, request, obj):
+        self.purge(request, self.get_queryset(request).filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        self.purge(request, queryset)
+
+
+class LatestCommentsFormSet(BaseInlineFormSet):
+    """Только последние комментарии новости вместе с авторами."""
+
+    def get_queryset(self):
+        if not hasattr(self, '_queryset'):
+            self._queryset = self.queryset.select_related(
+                'author'
+            ).order_by('-created', '-id')[:INLINE_COMMENTS_COUNT]
+        return self._queryset
+
+
+class CommentInline(admin.TabularInline):
+    """
+    Последние комментарии на странице новости, только для чтения.
+
+    Изменять комментарии можно в CommentAdmin: так странице новости
+    не нужны формы и список пользователей для каждого комментария.
+    """
     model = Comment
+    formset = LatestCommentsFormSet
+    fields = ('author', 'text', 'status', 'created')
+    readonly_fields = fields
     extra = 0
+    can_delete = False
+    show_change_link = True
+    verbose_name_plural = (
+        f'Последние {INLINE_COMMENTS_COUNT} комментариев'
+    )
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
 
 
 @admin.register(News)
-class NewsAdmin(admin.ModelAdmin):
+class NewsAdmin(PurgeActionMixin, admin.ModelAdmin):
+    list_display = ('title', 'date', 'comment_count')
+    search_fields = ('title',)
+    readonly_fields = ('comment_count', 'all_comments')
+    # Точный COUNT(*) по всей таблице на каждой странице списка
+    # не нужен: хватает числа найденных записей.
+    show_full_result_count = False
     inlines = [
         CommentInline,
     ]
+
+    @admin.display(description='Все комментарии')
+    def all_comments(self, obj):
+        if obj.pk is None:
+            return '-'
+        url = reverse('admin:news_comment_changelist')
+        export_url = reverse('news:export', args=[obj.pk])
+        return format_html(
+            '<a href="{}?news__id__exact={}">Открыть список</a> · '
+            'выгрузить в <a href="{}">CSV</a> '
+            'или <a href="{}?format=jsonl">JSONL</a>',
+            url, obj.pk, export_url, export_url
+        )
+
+    @admin.action(
+        description='Удалить выбранные новости в фоне',
+        permissions=('delete',)
+    )
+    def schedule_purge(self, request, queryset):
+        count = self.purge(request, queryset)
+        self.message_user(
+            request, f'Новостей поставлено на удаление: {count}.'
+        )
+
+    def purge(self, request, queryset):
+        count = queryset.update(is_deleted=True)
+        purge_worker.schedule()
+        return count
+
+
+@admin.register(Comment)
+class CommentAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'news', 'author', 'status', 'created')
+    list_select_related = ('news', 'author')
+    list_filter = ('status',)
+    raw_id_fields = ('news', 'author')
+    # Сортировка по первичному ключу идёт по индексу, а не сортирует
+    # всю таблицу комментариев.
+    ordering = ('-id',)
+    show_full_result_count = False
+
+
+admin.site.unregister(User)
+
+
+@admin.register(User)
+class PurgeUserAdmin(PurgeActionMixin, UserAdmin):
+
+    @admin.action(
+        description='Удалить выбранных пользователей в фоне',
+        permissions=('delete',)
+    )
+    def schedule_purge(self, request, queryset):
+        count = self.purge(request, queryset)
+        self.message_user(
+            request, f'Пользователей поставлено на удаление: {count}.'
+        )
+
+    def purge(self, request, queryset):
+        users = queryset.exclude(pk=request.user.pk)
+        UserPurge.objects.bulk_create(
+            [
+                UserPurge(user_id=pk)
+                for pk in users.values_list('pk', flat=True)
+            ],
+            ignore_conflicts=True
+        )
+        # Пользователь сразу теряет доступ к сайту, а его комментарии
+        # удаляются в фоне.
+        count = users.update(is_active=False)
+        purge_worker.schedule()
+        return count
@@ -0,0 +1,89 @@
+"""
+Валидаторы условных GET-запросов к страницам новостей.
+
+Валидаторы строятся по News.updated, который меняется при любой
+записи новости или её комментариев, и считаются одним лёгким
+запросом — без выборки текстов и рендера шаблона.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.paginator import InvalidPage
+from django.db.models import Count, Max, Sum
+from django.http import Http404
+
+from .models import News
+from .pagination import CursorPaginator
+
+
+def make_etag(request, *parts):
+    user = request.user
+    if user.is_authenticated:
+        # Авторизованный пользователь видит своё имя, ссылки на правку
+        # своих комментариев и форму с CSRF-токеном текущей сессии.
+        parts += (
+            user.pk, user.get_username(), request.META.get('CSRF_COOKIE')
+        )
+    return hashlib.md5(repr(parts).encode()).hexdigest()
+
+
+def window_etag(request, cursor, count, updated, id_sum):
+    return make_etag(request, cursor, count, updated, id_sum or 0)
+
+
+def news_list_etag(request, *args, **kwargs):
+    """
+    Валидатор страницы списка: число новостей в её окне, их
+    наибольшее время изменения и сумма id — одним агрегатом.
+
+    Без If-None-Match сравнивать не с чем, и запрос не нужен: ETag
+    по уже прочитанным строкам ставит сама страница через page_etag.
+    """
+    if 'HTTP_IF_NONE_MATCH' not in request.META:
+        return None
+    cursor = request.GET.get('cursor')
+    paginator = CursorPaginator(
+        News.objects.only('id', 'date', 'updated'),
+        settings.NEWS_COUNT_ON_HOME_PAGE
+    )
+    try:
+        window = paginator.window(cursor)
+    except InvalidPage as error:
+        raise Http404(str(error))
+    return window_etag(request, cursor, *window.aggregate(
+        Count('id'), Max('updated'), Sum('id')
+    ).values())
+
+
+def page_etag(request, page):
+    """Тот же валидатор, что news_list_etag, по прочитанной странице."""
+    return window_etag(
+        request,
+        request.GET.get('cursor'),
+        len(page.window),
+        max((news.updated for news in page.window), default=None),
+        sum(news.pk for news in page.window)
+    )
+
+
+def get_news_updated(request, pk):
+    if not hasattr(request, 'news_updated'):
+        request.news_updated = News.objects.filter(
+            pk=pk
+        ).values_list('updated', flat=True).first()
+    return request.news_updated
+
+
+def news_detail_etag(request, pk):
+    updated = get_news_updated(request, pk)
+    if updated is None:
+        return None
+    return make_etag(request, pk, updated)
+
+
+def news_detail_last_modified(request, pk):
+    # Дата изменения не различает пользователей, поэтому для
+    # авторизованных остаётся только ETag.
+    if request.user.is_authenticated:
+        return None
+    return get_news_updated(request, pk)
@@ -1,6 +1,8 @@
+from django.conf import settings
 from django.forms import ModelForm
 from django.core.exceptions import ValidationError
 
+from .lexicon import get_matcher
 from .models import Comment
 
 BAD_WORDS = (
@@ -18,10 +20,13 @@ class CommentForm(ModelForm):
         fields = ('text',)
 
     def clean_text(self):
-        """Не позволяем ругаться в комментариях."""
+        """
+        Не позволяем ругаться в комментариях.
+
+        Словарь берётся из файла BAD_WORDS_FILE, если он задан
+        в настройках, иначе — из BAD_WORDS.
+        """
         text = self.cleaned_data['text']
-        lowered_text = text.lower()
-        for word in BAD_WORDS:
-            if word in lowered_text:
-                raise ValidationError(WARNING)
+        if get_matcher(settings.BAD_WORDS_FILE, BAD_WORDS).search(text):
+            raise ValidationError(WARNING)
         return text
@@ -0,0 +1,66 @@
+"""
+Версионируемый кеш фрагментов главной страницы.
+
+Фрагмент новости хранится под ключом из её id и номера версии.
+Версия меняется при каждой записи новости или её комментариев,
+после чего старые фрагменты просто перестают запрашиваться
+и вытесняются кешем по таймауту.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+VERSION_KEY = 'news:fragment-version:{}'
+FRAGMENT_KEY = 'news:fragment:{}:{}'
+
+
+class FragmentStats:
+    """Счётчики попаданий и промахов кеша фрагментов в этом процессе."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.hits = 0
+        self.misses = 0
+
+
+stats = FragmentStats()
+
+
+def new_version():
+    # Если ключ версии вытеснен из кеша, нельзя начинать отсчёт заново:
+    # под прежними номерами могут лежать устаревшие фрагменты.
+    return time.time_ns()
+
+
+def get_version(news_id):
+    key = VERSION_KEY.format(news_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, new_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(news_id):
+    """Делает недействительными закешированные фрагменты новости."""
+    key = VERSION_KEY.format(news_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, new_version(), timeout=None)
+
+
+def get_fragment(news_id, render):
+    """Возвращает фрагмент новости из кеша или рендерит и кеширует его."""
+    key = FRAGMENT_KEY.format(news_id, get_version(news_id))
+    fragment = cache.get(key)
+    if fragment is not None:
+        stats.hits += 1
+        return fragment
+    stats.misses += 1
+    fragment = render()
+    cache.set(key, fragment, settings.NEWS_FRAGMENT_CACHE_TIMEOUT)
+    return fragment
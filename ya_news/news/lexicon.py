@@ -0,0 +1,189 @@
+"""
+Поиск запрещённых слов в тексте.
+
+Словарь компилируется один раз в регулярное выражение по префиксному
+дереву слов: движок re проходит текст за один раз, не перебирая слова
+по очереди. Текст и слова предварительно нормализуются: ё → е,
+латинские буквы, похожие на кириллицу, заменяются кириллическими.
+"""
+import logging
+import os
+import re
+import threading
+import time
+
+HOMOGLYPHS = str.maketrans({
+    'ё': 'е',
+    'a': 'а',
+    'b': 'в',
+    'c': 'с',
+    'e': 'е',
+    'h': 'н',
+    'k': 'к',
+    'm': 'м',
+    'o': 'о',
+    'p': 'р',
+    't': 'т',
+    'x': 'х',
+    'y': 'у',
+})
+WORD_END = ''
+# Как часто, в секундах, проверять mtime файла словаря.
+STAT_INTERVAL = 1
+
+logger = logging.getLogger(__name__)
+
+
+def normalize(text):
+    return text.lower().translate(HOMOGLYPHS)
+
+
+def trie_pattern(node):
+    """Регулярное выражение для поддерева префиксного дерева."""
+    if WORD_END in node:
+        # Для проверки вхождения достаточно самого короткого слова:
+        # более длинные слова с тем же началом можно не проверять.
+        return ''
+    leaves = []
+    branches = []
+    for char, child in sorted(node.items()):
+        if child == {WORD_END: True}:
+            leaves.append(re.escape(char))
+        else:
+            branches.append(re.escape(char) + trie_pattern(child))
+    if len(leaves) == 1:
+        branches.append(leaves[0])
+    elif leaves:
+        branches.append(f'[{"".join(leaves)}]')
+    if len(branches) == 1:
+        return branches[0]
+    return f'(?:{"|".join(branches)})'
+
+
+class BadWordMatcher:
+    """Скомпилированный словарь запрещённых слов."""
+
+    def __init__(self, words):
+        trie = {}
+        for word in words:
+            word = normalize(word.strip())
+            if not word:
+                continue
+            node = trie
+            for char in word:
+                node = node.setdefault(char, {})
+            node[WORD_END] = True
+        self.regex = re.compile(trie_pattern(trie)) if trie else None
+
+    def search(self, text):
+        """Возвращает найденное запрещённое слово или None."""
+        if self.regex is None:
+            return None
+        match = self.regex.search(normalize(text))
+        return match and match.group()
+
+
+def read_words(path):
+    with open(path, encoding='utf-8') as file:
+        return [
+            line.strip() for line in file
+            if line.strip() and not line.startswith('#')
+        ]
+
+
+class LexiconFile:
+    """
+    Словарь из файла, который перечитывается при изменении mtime.
+
+    Первый раз словарь компилируется при первом обращении. Изменённый
+    файл компилирует фоновый поток, а до его готовности запросы
+    получают прежний матчер: большой словарь компилируется секундами.
+    mtime проверяется не чаще раза в STAT_INTERVAL секунд. Если файл
+    недоступен, действует прежний матчер, а без него — пустой словарь.
+    """
+
+    def __init__(self, path, clock=time.monotonic):
+        self.path = path
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.state = (None, None)
+        self.thread = None
+        self.checked = None
+
+    def load(self, mtime):
+        return mtime, BadWordMatcher(read_words(self.path))
+
+    def get_matcher(self):
+        now = self.clock()
+        loaded_mtime, matcher = self.state
+        if (
+            matcher is not None and self.checked is not None
+            and now - self.checked < STAT_INTERVAL
+        ):
+            return matcher
+        self.checked = now
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            logger.exception('Не удалось проверить словарь %s', self.path)
+            with self.lock:
+                if self.state[1] is None:
+                    self.state = (None, BadWordMatcher([]))
+                return self.state[1]
+        if mtime == loaded_mtime:
+            return matcher
+        with self.lock:
+            if self.state[1] is None:
+                try:
+                    self.state = self.load(mtime)
+                except OSError:
+                    logger.exception(
+                        'Не удалось прочитать словарь %s', self.path
+                    )
+                    self.state = (None, BadWordMatcher([]))
+            elif (
+                self.state[0] != mtime
+                and (self.thread is None or not self.thread.is_alive())
+            ):
+                self.thread = threading.Thread(
+                    target=self.reload, args=(mtime,), name='lexicon',
+                    daemon=True
+                )
+                self.thread.start()
+            return self.state[1]
+
+    def reload(self, mtime):
+        """Компилирует словарь и подменяет им прежний одной записью."""
+        try:
+            state = self.load(mtime)
+        except Exception:
+            # Прежний матчер остаётся до следующего изменения файла.
+            logger.exception('Не удалось перечитать словарь %s', self.path)
+            state = (mtime, self.state[1])
+        with self.lock:
+            self.state = state
+
+
+_lexicon_files = {}
+_default_matchers = {}
+
+
+def lexicon_file(path):
+    """Словарь из файла path, один на процесс."""
+    if path not in _lexicon_files:
+        _lexicon_files[path] = LexiconFile(path)
+    return _lexicon_files[path]
+
+
+def get_matcher(path, default_words):
+    """
+    Матчер для словаря из файла path.
+
+    Если файл не задан, используется словарь default_words.
+    Матчеры создаются один раз на процесс.
+    """
+    if path is None:
+        if default_words not in _default_matchers:
+            _default_matchers[default_words] = BadWordMatcher(default_words)
+        return _default_matchers[default_words]
+    return lexicon_file(path).get_matcher()
@@ -0,0 +1,121 @@
+import csv
+import json
+import time
+from datetime import date
+from itertools import islice
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from news.models import News
+
+FORMATS = ('jsonl', 'csv')
+
+
+def read_jsonl(file):
+    for number, line in enumerate(file, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as error:
+            raise CommandError(f'Строка {number}: {error}') from error
+
+
+def read_csv(file):
+    yield from csv.DictReader(file)
+
+
+READERS = {'jsonl': read_jsonl, 'csv': read_csv}
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково загружает новости из JSONL или CSV с полями '
+        'title, text и необязательным date (YYYY-MM-DD).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', type=Path)
+        parser.add_argument(
+            '--format',
+            dest='file_format',
+            choices=FORMATS,
+            help='Формат файла; по умолчанию определяется по расширению.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Сколько новостей вставлять в одной транзакции.'
+        )
+        parser.add_argument(
+            '--skip-existing',
+            action='store_true',
+            help='Пропускать новости, чья пара (title, date) уже есть.'
+        )
+
+    def handle(self, *args, path, file_format, batch_size, skip_existing,
+               verbosity, **options):
+        file_format = file_format or path.suffix.lstrip('.').lower()
+        if file_format not in FORMATS:
+            raise CommandError(
+                f'Не удалось определить формат файла {path}, '
+                f'укажите --format.'
+            )
+        if batch_size < 1:
+            raise CommandError('--batch-size должен быть положительным.')
+        imported = skipped = 0
+        started = time.monotonic()
+        with open(path, encoding='utf-8', newline='') as file:
+            rows = enumerate(READERS[file_format](file), start=1)
+            while batch := list(islice(rows, batch_size)):
+                news = [self.make_news(number, row) for number, row in batch]
+                if skip_existing:
+                    fresh = self.exclude_existing(news)
+                    skipped += len(news) - len(fresh)
+                    news = fresh
+                with transaction.atomic():
+                    News.objects.bulk_create(news)
+                imported += len(news)
+                if verbosity > 1:
+                    self.stdout.write(
+                        self.summary(imported, skipped, started)
+                    )
+        self.stdout.write(self.style.SUCCESS(
+            self.summary(imported, skipped, started)
+        ))
+
+    def make_news(self, number, row):
+        try:
+            news_date = date.today()
+            if row.get('date'):
+                news_date = date.fromisoformat(row['date'])
+            return News(title=row['title'], text=row['text'], date=news_date)
+        except (AttributeError, KeyError, TypeError, ValueError) as error:
+            raise CommandError(f'Строка {number}: {error!r}') from error
+
+    def exclude_existing(self, news):
+        """Убирает из пачки уже загруженные новости и повторы в ней."""
+        seen = set(
+            News.objects.filter(
+                date__in={item.date for item in news},
+                title__in={item.title for item in news},
+            ).values_list('title', 'date')
+        )
+        fresh = []
+        for item in news:
+            key = (item.title, item.date)
+            if key not in seen:
+                seen.add(key)
+                fresh.append(item)
+        return fresh
+
+    def summary(self, imported, skipped, started):
+        elapsed = time.monotonic() - started
+        rate = imported / elapsed if elapsed else 0
+        return (
+            f'Загружено: {imported}, пропущено: {skipped}, '
+            f'{elapsed:.1f} с, {rate:.0f} строк/с'
+        )
@@ -0,0 +1,48 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from news.moderation import moderate_pending
+
+
+class Command(BaseCommand):
+    help = 'Модерирует комментарии, ожидающие проверки.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.COMMENT_MODERATION_BATCH_SIZE,
+            help='Сколько комментариев проверять в одной транзакции.'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Разобрать очередь и завершиться, а не ждать новых.'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='Пауза в секундах, когда очередь пуста.'
+        )
+
+    def handle(self, *args, batch_size, once, interval, verbosity,
+               **options):
+        total_approved = total_rejected = 0
+        while True:
+            approved, rejected = moderate_pending(batch_size)
+            total_approved += approved
+            total_rejected += rejected
+            if verbosity > 1 and approved + rejected:
+                self.stdout.write(
+                    f'Опубликовано: {approved}, отклонено: {rejected}'
+                )
+            if approved + rejected < batch_size:
+                if once:
+                    break
+                time.sleep(interval)
+        self.stdout.write(self.style.SUCCESS(
+            f'Опубликовано: {total_approved}, отклонено: {total_rejected}'
+        ))
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from news.purge import purge_deleted
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет пачками новости и пользователей, помеченные '
+        'удалёнными, вместе с их комментариями.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.PURGE_BATCH_SIZE,
+            help='Сколько комментариев удалять в одной транзакции.'
+        )
+
+    def handle(self, *args, batch_size, **options):
+        news, users = purge_deleted(batch_size)
+        if options['verbosity'] > 0:
+            self.stdout.write(self.style.SUCCESS(
+                f'Удалено новостей: {news}, пользователей: {users}'
+            ))
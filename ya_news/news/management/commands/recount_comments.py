@@ -0,0 +1,72 @@
+from django.core.management.base import BaseCommand
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from news import fragment_cache
+from news.models import Comment, News
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает счётчики опубликованных комментариев '
+        'News.comment_count.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10_000,
+            help='Сколько новостей обновлять в одной транзакции.'
+        )
+
+    def handle(self, *args, batch_size, **options):
+        actual_count = Coalesce(
+            models.Subquery(
+                Comment.objects.filter(
+                    news=models.OuterRef('pk'),
+                    status=Comment.Status.APPROVED
+                )
+                .order_by()
+                .values('news')
+                .annotate(count=models.Count('pk'))
+                .values('count'),
+                output_field=models.PositiveIntegerField()
+            ),
+            0
+        )
+        last_pk = 0
+        updated = 0
+        while True:
+            # Обновляем новости диапазонами первичного ключа, чтобы
+            # не держать блокировку на запись всей таблицы разом.
+            batch = list(
+                News.objects.filter(pk__gt=last_pk)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not batch:
+                break
+            with transaction.atomic():
+                wrong = list(
+                    News.objects.filter(
+                        pk__gte=batch[0], pk__lte=batch[-1]
+                    )
+                    .annotate(actual=actual_count)
+                    .exclude(comment_count=models.F('actual'))
+                    .values_list('pk', flat=True)
+                )
+                News.objects.filter(pk__in=wrong).update(
+                    comment_count=actual_count, updated=timezone.now()
+                )
+            # Исправленные новости отмечаются изменёнными, как при
+            # любой правке счётчика: иначе страницы отдавали бы
+            # устаревший счётчик из кеша фрагментов и по прежнему ETag.
+            for news_id in wrong:
+                fragment_cache.bump_version(news_id)
+            updated += len(wrong)
+            last_pk = batch[-1]
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлены счётчики комментариев: {updated} новостей.'
+        ))
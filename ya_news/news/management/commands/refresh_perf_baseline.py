@@ -0,0 +1,32 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from news.pytest_tests import performance
+
+SUITE = 'news/pytest_tests/test_performance.py'
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогоняет регрессионный набор test_performance и записывает '
+        'замеры в базовую линию performance_baseline.json.'
+    )
+
+    def handle(self, *args, **options):
+        env = {**os.environ, performance.REFRESH_ENV: '1'}
+        # Набор рассчитан на фикстуры pytest, поэтому запускается
+        # отдельным процессом на тестовой базе.
+        result = subprocess.run(
+            [sys.executable, '-m', 'pytest', '-q', SUITE],
+            cwd=settings.BASE_DIR,
+            env=env,
+        )
+        if result.returncode:
+            raise CommandError('Замеры не удалось выполнить.')
+        self.stdout.write(self.style.SUCCESS(
+            f'Базовая линия обновлена: {performance.BASELINE_PATH}'
+        ))
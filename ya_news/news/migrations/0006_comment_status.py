@@ -0,0 +1,22 @@
+# Generated by Django 3.2.15 on 2026-10-18 10:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0005_news_fts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='status',
+            field=models.CharField(choices=[('pending', 'На модерации'), ('approved', 'Опубликован'), ('rejected', 'Отклонён')], default='approved', max_length=16),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['id'], name='comment_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 3.2.15 on 2026-10-18 10:49
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from importlib import import_module
+
+# SQLite добавляет столбец, пересоздавая таблицу news_news, и при этом
+# удаляет её триггеры. Триггеры поиска создаются заново после
+# изменения таблицы, а при откате — после удаления столбца.
+fts = import_module('news.migrations.0005_news_fts')
+restore_fts = fts.run_sqlite(fts.CREATE_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('news', '0006_comment_status'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, restore_fts),
+        migrations.CreateModel(
+            name='UserPurge',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('scheduled', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='is_deleted',
+            field=models.BooleanField(default=False, verbose_name='Удалена'),
+        ),
+        migrations.AddIndex(
+            model_name='news',
+            index=models.Index(condition=models.Q(('is_deleted', True)), fields=['id'], name='news_deleted_idx'),
+        ),
+        migrations.RunPython(restore_fts, migrations.RunPython.noop),
+    ]
@@ -4,13 +4,36 @@ from django.conf import settings
 from django.db import models
 
 
+class NewsManager(models.Manager):
+    """Новости без удалённых, ожидающих очистки в фоне."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_deleted=False)
+
+
 class News(models.Model):
     title = models.CharField(max_length=50)
     text = models.TextField()
     date = models.DateField(default=datetime.today)
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    updated = models.DateTimeField(auto_now=True)
+    # Удалённая новость сразу пропадает с сайта, а сама она
+    # и её комментарии удаляются пачками в фоне, см. news.purge.
+    is_deleted = models.BooleanField('Удалена', default=False)
+
+    objects = NewsManager()
+    all_objects = models.Manager()
 
     class Meta:
         ordering = ('-date',)
+        indexes = (
+            models.Index(fields=('date', 'id'), name='news_date_id_idx'),
+            models.Index(
+                fields=('id',),
+                name='news_deleted_idx',
+                condition=models.Q(is_deleted=True),
+            ),
+        )
         verbose_name_plural = 'Новости'
         verbose_name = 'Новость'
 
@@ -19,6 +42,12 @@ class News(models.Model):
 
 
 class Comment(models.Model):
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'На модерации'
+        APPROVED = 'approved', 'Опубликован'
+        REJECTED = 'rejected', 'Отклонён'
+
     news = models.ForeignKey(
         News,
         on_delete=models.CASCADE
@@ -29,9 +58,53 @@ class Comment(models.Model):
     )
     text = models.TextField()
     created = models.DateTimeField(auto_now_add=True)
+    # Комментарии с сайта проходят модерацию, созданные иначе
+    # (в админке, в коде) публикуются сразу.
+    status = models.CharField(
+        max_length=16,
+        choices=Status.choices,
+        default=Status.APPROVED,
+    )
 
     class Meta:
         ordering = ('created',)
+        indexes = (
+            models.Index(
+                fields=('news', 'created'), name='comment_news_created_idx'
+            ),
+            models.Index(
+                fields=('author', 'created'), name='comment_author_created_idx'
+            ),
+            models.Index(
+                fields=('id',),
+                name='comment_pending_idx',
+                condition=models.Q(status='pending'),
+            ),
+        )
 
     def __str__(self):
         return self.text[:50]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        comment = super().from_db(db, field_names, values)
+        # Статус и новость на момент загрузки нужны, чтобы при
+        # сохранении понять, изменилось ли число опубликованных
+        # комментариев новостей.
+        comment.loaded_status = comment.__dict__.get('status')
+        comment.loaded_news_id = comment.__dict__.get('news_id')
+        return comment
+
+    @property
+    def is_pending(self):
+        return self.status == self.Status.PENDING
+
+
+class UserPurge(models.Model):
+    """Пользователь, чьё удаление запланировано на фоновую очистку."""
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+    )
+    scheduled = models.DateTimeField(auto_now_add=True)
@@ -0,0 +1,177 @@
+"""
+Фоновая модерация комментариев.
+
+Комментарии с сайта сохраняются со статусом «на модерации» и после
+фиксации транзакции ставятся в очередь внутри процесса. Очередь
+разбирают COMMENT_MODERATION_WORKERS рабочих потоков: каждый забирает
+до COMMENT_MODERATION_BATCH_SIZE комментариев и решает их судьбу
+в одной транзакции. Если потоков нет или процесс перезапустился,
+оставшиеся комментарии разбирает manage.py moderate_comments.
+"""
+import logging
+import queue
+import re
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import fragment_cache
+from .forms import BAD_WORDS
+from .lexicon import get_matcher
+from .models import Comment, News
+
+logger = logging.getLogger(__name__)
+
+LINK = re.compile(r'https?://|www\.', re.IGNORECASE)
+
+
+def has_bad_words(comment):
+    matcher = get_matcher(settings.BAD_WORDS_FILE, BAD_WORDS)
+    return matcher.search(comment.text) is not None
+
+
+def has_too_many_links(comment):
+    return len(LINK.findall(comment.text)) > settings.COMMENT_MAX_LINKS
+
+
+def find_duplicates(comments):
+    """
+    Возвращает id комментариев, повторяющих более ранний комментарий
+    того же автора к той же новости. Все кандидаты проверяются одним запросом.
+    """
+    earlier = defaultdict(list)
+    for pk, *key in Comment.objects.filter(
+        news_id__in={comment.news_id for comment in comments},
+        author_id__in={comment.author_id for comment in comments},
+        text__in={comment.text for comment in comments},
+    ).exclude(status=Comment.Status.REJECTED).values_list(
+        'pk', 'news_id', 'author_id', 'text'
+    ):
+        earlier[tuple(key)].append(pk)
+    return {
+        comment.pk for comment in comments
+        if any(
+            pk < comment.pk
+            for pk in earlier[comment.news_id, comment.author_id, comment.text]
+        )
+    }
+
+
+def moderate(comment_ids):
+    """
+    Проверяет пачку комментариев и публикует или отклоняет их.
+
+    Вся пачка обрабатывается в одной транзакции: статусы меняются
+    одним UPDATE на новость, счётчики новостей — через F().
+    Возвращает число опубликованных и отклонённых комментариев.
+    """
+    touched = set()
+    approved_count = rejected_count = 0
+    with transaction.atomic():
+        comments = list(
+            Comment.objects.filter(
+                pk__in=comment_ids, status=Comment.Status.PENDING
+            ).only('pk', 'news_id', 'author_id', 'text')
+        )
+        duplicates = find_duplicates(comments)
+        approved = defaultdict(list)
+        rejected = []
+        for comment in comments:
+            if (
+                comment.pk in duplicates
+                or has_bad_words(comment)
+                or has_too_many_links(comment)
+            ):
+                rejected.append(comment.pk)
+                touched.add(comment.news_id)
+            else:
+                approved[comment.news_id].append(comment.pk)
+        now = timezone.now()
+        for news_id, pks in approved.items():
+            # Комментарий могли удалить или изменить после выборки:
+            # счётчик растёт ровно на число реально одобренных.
+            count = Comment.objects.filter(
+                pk__in=pks, status=Comment.Status.PENDING
+            ).update(status=Comment.Status.APPROVED)
+            if count:
+                News.objects.filter(pk=news_id).update(
+                    comment_count=F('comment_count') + count, updated=now
+                )
+                touched.add(news_id)
+            approved_count += count
+        if rejected:
+            rejected_count = Comment.objects.filter(
+                pk__in=rejected, status=Comment.Status.PENDING
+            ).update(status=Comment.Status.REJECTED)
+            News.objects.filter(pk__in=touched - approved.keys()).update(
+                updated=now
+            )
+    for news_id in touched:
+        fragment_cache.bump_version(news_id)
+    return approved_count, rejected_count
+
+
+def moderate_pending(batch_size):
+    """Модерирует до batch_size самых ранних ожидающих комментариев."""
+    comment_ids = list(
+        Comment.objects.filter(status=Comment.Status.PENDING)
+        .order_by('pk')
+        .values_list('pk', flat=True)[:batch_size]
+    )
+    if not comment_ids:
+        return 0, 0
+    return moderate(comment_ids)
+
+
+class ModerationQueue:
+    """Очередь комментариев на модерацию внутри процесса."""
+
+    def __init__(self):
+        self.queue = queue.SimpleQueue()
+        self.lock = threading.Lock()
+        self.workers = []
+
+    def put(self, comment_id):
+        """Ставит комментарий в очередь после фиксации транзакции."""
+        if settings.COMMENT_MODERATION_WORKERS:
+            transaction.on_commit(lambda: self.submit(comment_id))
+
+    def submit(self, comment_id):
+        self.queue.put(comment_id)
+        with self.lock:
+            while len(self.workers) < settings.COMMENT_MODERATION_WORKERS:
+                worker = threading.Thread(
+                    target=self.work,
+                    name=f'comment-moderation-{len(self.workers)}',
+                    daemon=True,
+                )
+                worker.start()
+                self.workers.append(worker)
+
+    def take_batch(self):
+        batch = [self.queue.get()]
+        while len(batch) < settings.COMMENT_MODERATION_BATCH_SIZE:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def work(self):
+        while True:
+            batch = self.take_batch()
+            try:
+                moderate(batch)
+            except Exception:
+                # Комментарии остаются на модерации до следующего
+                # запуска moderate_comments.
+                logger.exception('Не удалось промодерировать %s', batch)
+            finally:
+                close_old_connections()
+
+
+moderation_queue = ModerationQueue()
@@ -0,0 +1,190 @@
+from django.core import signing
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from django.http import Http404
+
+CURSOR_SALT = 'news.pagination'
+FORWARD = 'n'
+BACKWARD = 'p'
+
+
+class CursorPage:
+    """Страница, полученная по курсору."""
+
+    def __init__(self, object_list, paginator, has_next, has_previous,
+                 window=()):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+        # Все прочитанные строки, с лишней строкой за страницей.
+        self.window = window
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self.object_list)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not self._has_next:
+            return None
+        return self.paginator.make_cursor(self.object_list[-1], FORWARD)
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous:
+            return None
+        return self.paginator.make_cursor(self.object_list[0], BACKWARD)
+
+
+class CursorPaginator:
+    """
+    Постраничный вывод по ключу (keyset pagination).
+
+    Вместо OFFSET страница начинается сразу за последней записью
+    предыдущей: каждая страница — один проход по индексу на ordering,
+    сколь бы далеко от начала она ни была. Ключ состоит из двух полей,
+    второе из которых уникально, и оба сортируются в одном направлении.
+    Курсоры подписаны и для клиента непрозрачны.
+    """
+
+    ordering = ('-date', '-id')
+
+    def __init__(self, object_list, per_page, orphans=0,
+                 allow_empty_first_page=True, ordering=None):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        if ordering is not None:
+            self.ordering = tuple(ordering)
+        self.descending = self.ordering[0].startswith('-')
+        self.fields = tuple(name.lstrip('-') for name in self.ordering)
+
+    def make_cursor(self, obj, direction):
+        values = [
+            self._field(name).value_to_string(obj) for name in self.fields
+        ]
+        return signing.dumps([direction, *values], salt=CURSOR_SALT)
+
+    def window(self, cursor=None):
+        """
+        Запрос строк, которые читает страница по курсору: сама
+        страница и одна строка за ней, чтобы узнать, есть ли ещё.
+        """
+        return self._window(*self._position(cursor))
+
+    def page(self, cursor=None):
+        """Возвращает страницу после (или до) записи из курсора."""
+        direction, values = self._position(cursor)
+        rows = list(self._window(direction, values))
+        has_more = len(rows) > self.per_page
+        if direction is None:
+            return self._page(rows, rows, has_next=has_more)
+        if direction == FORWARD:
+            return self._page(rows, rows, has_next=has_more, has_previous=True)
+        return self._page(
+            rows, rows[:self.per_page][::-1],
+            has_next=True, has_previous=has_more
+        )
+
+    def _position(self, cursor):
+        return self._load(cursor) if cursor else (None, None)
+
+    def _window(self, direction, values):
+        if direction is None:
+            return self._ordered(forward=True)[:self.per_page + 1]
+        forward = direction == FORWARD
+        return self._ordered(forward).filter(
+            self._beyond(values, forward)
+        )[:self.per_page + 1]
+
+    def _page(self, window, rows, has_next=False, has_previous=False):
+        rows = rows[:self.per_page]
+        return CursorPage(
+            rows, self, has_next and bool(rows), has_previous and bool(rows),
+            window
+        )
+
+    def _field(self, name):
+        return self.object_list.model._meta.get_field(name)
+
+    def _load(self, cursor):
+        try:
+            direction, *values = signing.loads(cursor, salt=CURSOR_SALT)
+            if direction not in (FORWARD, BACKWARD):
+                raise ValueError(direction)
+            if len(values) != len(self.fields):
+                raise ValueError(values)
+            return direction, [
+                self._field(name).to_python(value)
+                for name, value in zip(self.fields, values)
+            ]
+        except (signing.BadSignature, TypeError, ValueError,
+                ValidationError) as error:
+            raise InvalidPage('Некорректный курсор.') from error
+
+    def _ordered(self, forward):
+        if forward:
+            return self.object_list.order_by(*self.ordering)
+        return self.object_list.order_by(*(
+            name[1:] if name.startswith('-') else f'-{name}'
+            for name in self.ordering
+        ))
+
+    def _beyond(self, values, forward):
+        """
+        Условие «строго после курсора» в направлении обхода.
+
+        Первая часть — диапазон по ведущему полю индекса, вторая
+        отсекает уже показанные строки с тем же значением этого поля.
+        """
+        (first, second), (first_value, second_value) = self.fields, values
+        lookup = 'lt' if self.descending == forward else 'gt'
+        return Q(**{f'{first}__{lookup}e': first_value}) & (
+            Q(**{f'{first}__{lookup}': first_value})
+            | Q(**{f'{second}__{lookup}': second_value})
+        )
+
+
+def get_page_or_404(paginator, cursor):
+    try:
+        return paginator.page(cursor)
+    except InvalidPage as error:
+        raise Http404(str(error))
+
+
+class CursorPaginationMixin:
+    """Подменяет постраничный вывод ListView на курсорный."""
+
+    paginator_class = CursorPaginator
+    page_kwarg = 'cursor'
+    cursor_ordering = None
+
+    def get_paginator(self, queryset, per_page, **kwargs):
+        return super().get_paginator(
+            queryset, per_page, ordering=self.cursor_ordering, **kwargs
+        )
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = self.get_paginator(queryset, page_size)
+        page = get_page_or_404(
+            paginator, self.request.GET.get(self.page_kwarg)
+        )
+        return paginator, page, page.object_list, page.has_other_pages()
@@ -0,0 +1,134 @@
+"""
+Фоновое удаление новостей и пользователей с большим числом комментариев.
+
+Удаление через Django загружает в память все зависимые объекты
+и отправляет сигнал на каждый из них. Здесь новость или пользователь
+сначала помечаются удалёнными, а комментарии затем удаляются пачками
+по PURGE_BATCH_SIZE строк, по транзакции на пачку. Очистку после
+фиксации транзакции запускает фоновый поток; если процесс
+перезапустился, оставшееся дочищает manage.py purge_deleted.
+"""
+import logging
+import queue
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import fragment_cache
+from .models import Comment, News, UserPurge
+
+logger = logging.getLogger(__name__)
+
+
+def raw_delete(queryset):
+    # Удаление без сбора объектов и сигналов post_delete:
+    # счётчики новостей обновляются ниже одним UPDATE на новость.
+    return queryset._raw_delete(queryset.db)
+
+
+def delete_comments(queryset, batch_size):
+    """
+    Удаляет комментарии queryset пачками, каждую в своей транзакции.
+
+    Счётчик новости уменьшается на число реально удалённых
+    опубликованных комментариев. Возвращает число удалённых.
+    """
+    deleted = 0
+    while True:
+        touched = set()
+        with transaction.atomic():
+            batch = list(queryset.values_list('pk', 'news_id')[:batch_size])
+            if not batch:
+                return deleted
+            by_news = defaultdict(list)
+            for pk, news_id in batch:
+                by_news[news_id].append(pk)
+            now = timezone.now()
+            for news_id, pks in by_news.items():
+                approved = raw_delete(Comment.objects.filter(
+                    pk__in=pks, status=Comment.Status.APPROVED
+                ))
+                # Счётчики удалённых новостей не обновляем: новости
+                # удаляются следом за комментариями.
+                if approved:
+                    News.objects.filter(pk=news_id).update(
+                        comment_count=F('comment_count') - approved,
+                        updated=now
+                    )
+                    touched.add(news_id)
+                deleted += approved
+            deleted += raw_delete(
+                Comment.objects.filter(pk__in=[pk for pk, _ in batch])
+            )
+        for news_id in touched:
+            fragment_cache.bump_version(news_id)
+
+
+def purge_news(batch_size):
+    """Удаляет новости, помеченные удалёнными, вместе с комментариями."""
+    purged = 0
+    deleted_news = News.all_objects.filter(is_deleted=True)
+    for news_id in deleted_news.values_list('pk', flat=True):
+        delete_comments(Comment.objects.filter(news_id=news_id), batch_size)
+        deleted_news.filter(pk=news_id).delete()
+        purged += 1
+    return purged
+
+
+def purge_users(batch_size):
+    """Удаляет пользователей из UserPurge вместе с комментариями."""
+    purged = 0
+    for user_id in UserPurge.objects.values_list('user_id', flat=True):
+        delete_comments(Comment.objects.filter(author_id=user_id), batch_size)
+        get_user_model().objects.filter(pk=user_id).delete()
+        purged += 1
+    return purged
+
+
+def purge_deleted(batch_size):
+    """Дочищает удалённые новости и пользователей."""
+    return purge_news(batch_size), purge_users(batch_size)
+
+
+class PurgeWorker:
+    """Поток, который запускает очистку после удаления в админке."""
+
+    def __init__(self):
+        self.wakeups = queue.SimpleQueue()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def schedule(self):
+        """Запускает очистку после фиксации транзакции."""
+        transaction.on_commit(self.wake)
+
+    def wake(self):
+        self.wakeups.put(None)
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(
+                    target=self.work, name='purge', daemon=True
+                )
+                self.thread.start()
+
+    def work(self):
+        while True:
+            self.wakeups.get()
+            # Несколько удалений подряд разбираются одной очисткой.
+            while not self.wakeups.empty():
+                self.wakeups.get_nowait()
+            try:
+                purge_deleted(settings.PURGE_BATCH_SIZE)
+            except Exception:
+                # Помеченные записи дочистит следующий запуск.
+                logger.exception('Не удалось завершить очистку')
+            finally:
+                close_old_connections()
+
+
+purge_worker = PurgeWorker()
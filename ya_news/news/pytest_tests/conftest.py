@@ -1,12 +1,23 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 
 import pytest
+from django.conf import settings
+from django.core.cache import cache
 from django.test.client import Client
 
+from news import fragment_cache
 from news.models import News, Comment
 
 
 NEWS_COMMENTS_COUNT = 10
+NEWS_ARCHIVE_COUNT = 25
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Кеш не откатывается вместе с базой, очищаем его перед тестом."""
+    cache.clear()
+    fragment_cache.stats.reset()
 
 
 @pytest.fixture
@@ -33,6 +44,16 @@ def reader_client(reader):
     return client
 
 
+@pytest.fixture
+def staff_client(django_user_model):
+    """Сотрудник без прав суперпользователя, например для выгрузки."""
+    client = Client()
+    client.force_login(
+        django_user_model.objects.create(username='STAFF', is_staff=True)
+    )
+    return client
+
+
 @pytest.fixture
 def news():
     return News.objects.create(
@@ -52,6 +73,20 @@ def create_news():
         )
 
 
+@pytest.fixture
+def news_archive():
+    """Архив новостей, в котором по три новости за каждый день."""
+    today = datetime.today()
+    return News.objects.bulk_create(
+        News(
+            title=f'Archive News {i}',
+            text=f'Archive content {i}',
+            date=today - timedelta(days=i // 3)
+        )
+        for i in range(NEWS_ARCHIVE_COUNT)
+    )
+
+
 @pytest.fixture
 def comment(author, news):
     return Comment.objects.create(
@@ -72,6 +107,15 @@ def create_comment(author, news):
         )
 
 
+@pytest.fixture
+def comments_thread(author, news):
+    """Обсуждение новости длиной в несколько страниц комментариев."""
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Thread comment {i}')
+        for i in range(settings.COMMENTS_COUNT_ON_DETAIL_PAGE * 2 + 5)
+    )
+
+
 @pytest.fixture
 def pk_news(news):
     return (news.pk,)
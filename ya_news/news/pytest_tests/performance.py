@@ -0,0 +1,133 @@
+"""
+Замеры запросов к базе для регрессионных тестов.
+
+Для каждого адреса фиксируется число запросов и число строк, которые
+вернули SELECT-запросы. Результат сравнивается с базовой линией в
+performance_baseline.json. Базовую линию обновляет запуск тестов с
+переменной окружения REFRESH_PERF_BASELINE.
+
+Время ответа не проверяется: оно зависит от машины и её загрузки,
+и тест на общем CI падал бы случайно. Запросы и строки от машины не
+зависят и ловят те же регрессии — N+1 и чтение лишних строк.
+"""
+import json
+import os
+from pathlib import Path
+
+from django.db import connection
+from django.urls import URLPattern, URLResolver, get_resolver
+
+BASELINE_PATH = Path(__file__).with_name('performance_baseline.json')
+REFRESH_ENV = 'REFRESH_PERF_BASELINE'
+
+# Допустимый рост числа строк относительно базовой линии. Лишний
+# запрос — это почти всегда N+1, поэтому число запросов расти не
+# может вовсе.
+ROWS_TOLERANCE = 0.1
+
+
+def named_routes(urlconf=None, namespace=None):
+    """Имена всех именованных адресов вида namespace:name."""
+    for pattern in get_resolver(urlconf).url_patterns:
+        yield from _walk(pattern, namespace)
+
+
+def _walk(pattern, namespace):
+    if isinstance(pattern, URLResolver):
+        inner = namespace
+        if pattern.namespace:
+            inner = f'{namespace}:{pattern.namespace}' if namespace else (
+                pattern.namespace
+            )
+        for child in pattern.url_patterns:
+            yield from _walk(child, inner)
+    elif isinstance(pattern, URLPattern) and pattern.name:
+        yield f'{namespace}:{pattern.name}' if namespace else pattern.name
+
+
+class QueryRecorder:
+    """Запоминает SQL и параметры всех запросов внутри блока with."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append((sql, params))
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self.wrapper = connection.execute_wrapper(self)
+        self.wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.wrapper.__exit__(*exc_info)
+
+    def count_rows(self):
+        """
+        Сколько строк вернули SELECT-запросы.
+
+        Запросы повторяются как COUNT(*) уже после ответа: курсор
+        обёртки отдаёт строки представлению и заглядывать в него нельзя.
+        """
+        rows = 0
+        with connection.cursor() as cursor:
+            for sql, params in self.queries:
+                if sql.lstrip().upper().startswith('SELECT'):
+                    cursor.execute(f'SELECT COUNT(*) FROM ({sql})', params)
+                    rows += cursor.fetchone()[0]
+        return rows
+
+
+def measure(client, url):
+    """Число запросов и прочитанных строк при GET-запросе."""
+    with QueryRecorder() as recorder:
+        response = client.get(url)
+        if response.streaming:
+            # Потоковый ответ читает базу, пока его отдают клиенту.
+            b''.join(response.streaming_content)
+    return {
+        'queries': len(recorder.queries),
+        'rows': recorder.count_rows(),
+    }
+
+
+def load_baseline():
+    if not BASELINE_PATH.exists():
+        return {}
+    with open(BASELINE_PATH, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def save_measurement(key, measured):
+    baseline = load_baseline()
+    baseline[key] = measured
+    with open(BASELINE_PATH, 'w', encoding='utf-8') as file:
+        json.dump(baseline, file, ensure_ascii=False, indent=2, sort_keys=True)
+        file.write('\n')
+
+
+def regressions(expected, measured):
+    """Список превышений базовой линии, пустой, если их нет."""
+    problems = []
+    if measured['queries'] > expected['queries']:
+        problems.append(
+            f'запросов {measured["queries"]} вместо {expected["queries"]}'
+        )
+    if measured['rows'] > expected['rows'] * (1 + ROWS_TOLERANCE):
+        problems.append(f'строк {measured["rows"]} вместо {expected["rows"]}')
+    return problems
+
+
+def check_baseline(key, measured):
+    """
+    Сравнивает замер с базовой линией или записывает его в неё,
+    если задана переменная окружения REFRESH_PERF_BASELINE.
+    """
+    if os.environ.get(REFRESH_ENV):
+        save_measurement(key, measured)
+        return []
+    expected = load_baseline().get(key)
+    if expected is None:
+        return [f'нет базовой линии для {key}, обновите её']
+    return regressions(expected, measured)
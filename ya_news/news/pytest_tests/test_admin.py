@@ -0,0 +1,164 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from news.admin import INLINE_COMMENTS_COUNT
+from news.models import Comment, News, UserPurge
+
+
+def count_queries(client, url):
+    # Первый запрос заполняет кеш ContentType, его не считаем.
+    client.get(url)
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    return response, len(context.captured_queries)
+
+
+def add_comments(news, author, count):
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Комментарий {i}')
+        for i in range(count)
+    )
+
+
+@pytest.mark.django_db
+def test_news_change_page_does_not_grow_with_thread(
+    admin_client, django_user_model, news, author
+):
+    """
+    Тестирует, что страница новости в админке показывает только
+    последние комментарии и число запросов не зависит от их количества.
+    """
+    django_user_model.objects.bulk_create(
+        django_user_model(username=f'user{i}') for i in range(50)
+    )
+    url = reverse('admin:news_news_change', args=[news.pk])
+    add_comments(news, author, 3)
+    _, few_queries = count_queries(admin_client, url)
+    add_comments(news, author, INLINE_COMMENTS_COUNT * 5)
+    response, many_queries = count_queries(admin_client, url)
+    assert many_queries == few_queries
+    formset = response.context['inline_admin_formsets'][0].formset
+    assert len(formset.forms) == INLINE_COMMENTS_COUNT
+    assert b'<select name="comment_set' not in response.content
+
+
+@pytest.mark.django_db
+def test_news_changelist_query_count(admin_client, news_archive, comment):
+    """
+    Тестирует, что список новостей выводит счётчик комментариев
+    без запроса на каждую новость и без точного подсчёта таблицы.
+    """
+    url = reverse('admin:news_news_changelist')
+    _, queries = count_queries(admin_client, url)
+    News.objects.bulk_create(
+        News(title=f'Новость {i}', text='Текст') for i in range(20)
+    )
+    response, more_queries = count_queries(admin_client, url)
+    assert more_queries == queries
+    assert response.context['cl'].show_full_result_count is False
+
+
+@pytest.mark.django_db
+def test_comment_changelist_query_count(admin_client, news, author, reader):
+    """
+    Тестирует, что список комментариев читает новости и авторов
+    вместе с комментариями.
+    """
+    url = reverse('admin:news_comment_changelist')
+    add_comments(news, author, 2)
+    _, queries = count_queries(admin_client, url)
+    add_comments(News.objects.create(title='Другая', text='Текст'), reader, 30)
+    response, more_queries = count_queries(admin_client, url)
+    assert more_queries == queries
+    assert response.context['cl'].result_count == 32
+
+
+@pytest.mark.django_db
+def test_comment_changelist_filtered_by_news(admin_client, news, author):
+    """Тестирует ссылку со страницы новости на её комментарии."""
+    add_comments(news, author, 2)
+    add_comments(News.objects.create(title='Другая', text='Текст'), author, 3)
+    response = admin_client.get(
+        reverse('admin:news_comment_changelist'),
+        {'news__id__exact': news.pk}
+    )
+    assert response.context['cl'].result_count == 2
+
+
+@pytest.mark.django_db
+def test_news_purge_action_returns_immediately(
+    admin_client, news, comments_thread
+):
+    """
+    Тестирует, что действие админки только помечает новость
+    удалённой, а стандартное удаление выбранных недоступно.
+    """
+    url = reverse('admin:news_news_changelist')
+    response = admin_client.post(url, {
+        'action': 'schedule_purge', '_selected_action': [news.pk]
+    })
+    assert response.status_code == HTTPStatus.FOUND
+    assert News.all_objects.get(pk=news.pk).is_deleted
+    assert Comment.objects.filter(news=news).exists()
+    actions = admin_client.get(url).context['action_form'].fields['action']
+    assert 'delete_selected' not in dict(actions.choices)
+
+
+@pytest.mark.django_db
+def test_user_purge_action(admin_client, admin_user, author, comment):
+    """
+    Тестирует, что действие админки отключает пользователя
+    и ставит его на удаление, не трогая комментарии.
+    """
+    admin_client.post(reverse('admin:auth_user_changelist'), {
+        'action': 'schedule_purge',
+        '_selected_action': [author.pk, admin_user.pk],
+    })
+    author.refresh_from_db()
+    admin_user.refresh_from_db()
+    assert not author.is_active
+    assert admin_user.is_active
+    assert list(UserPurge.objects.values_list('user_id', flat=True)) == [
+        author.pk
+    ]
+    assert Comment.objects.filter(author=author).exists()
+
+
+@pytest.mark.django_db
+def test_news_delete_page_schedules_purge(
+    admin_client, news, author, comments_thread
+):
+    """
+    Тестирует, что удаление со страницы новости не собирает
+    комментарии для подтверждения, а только помечает новость удалённой.
+    """
+    url = reverse('admin:news_news_delete', args=[news.pk])
+    response, queries = count_queries(admin_client, url)
+    assert response.status_code == HTTPStatus.OK
+    assert 'Thread comment' not in response.content.decode()
+    add_comments(news, author, 100)
+    _, more_queries = count_queries(admin_client, url)
+    assert more_queries == queries
+    response = admin_client.post(url, {'post': 'yes'})
+    assert response.status_code == HTTPStatus.FOUND
+    assert News.all_objects.get(pk=news.pk).is_deleted
+    assert Comment.objects.filter(news=news).exists()
+
+
+@pytest.mark.django_db
+def test_user_delete_page_schedules_purge(admin_client, author, comment):
+    """
+    Тестирует, что удаление со страницы пользователя отключает его
+    и ставит на удаление, не трогая комментарии.
+    """
+    url = reverse('admin:auth_user_delete', args=[author.pk])
+    response = admin_client.post(url, {'post': 'yes'})
+    assert response.status_code == HTTPStatus.FOUND
+    author.refresh_from_db()
+    assert not author.is_active
+    assert UserPurge.objects.filter(user=author).exists()
+    assert Comment.objects.filter(author=author).exists()
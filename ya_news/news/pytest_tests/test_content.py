@@ -1,8 +1,20 @@
+import csv
+import io
+import json
+from http import HTTPStatus
+
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from yanews.settings import NEWS_COUNT_ON_HOME_PAGE
+from yanews.settings import (
+    COMMENTS_COUNT_ON_DETAIL_PAGE, NEWS_COUNT_ON_HOME_PAGE
+)
+from news.export import EXPORT_FIELDS
 from news.forms import CommentForm
+from news.fragment_cache import stats
+from news.models import Comment, News
 
 
 @pytest.mark.django_db
@@ -71,3 +83,227 @@ def test_comment_form_for_reader(reader_client, comment):
     assert 'form' in response.context
     form_obj = response.context['form']
     assert isinstance(form_obj, CommentForm)
+
+
+def walk_home_pages(client, direction, cursor=None):
+    """Обходит главную страницу по курсорам в заданном направлении."""
+    url = reverse('news:home')
+    pages = []
+    while True:
+        response = client.get(url, {'cursor': cursor} if cursor else None)
+        page = response.context['page_obj']
+        pages.append([news.pk for news in page])
+        cursor = getattr(page, f'{direction}_cursor')
+        if cursor is None:
+            return pages, page
+
+
+@pytest.mark.django_db
+def test_home_page_cursor_pagination(client, news_archive):
+    """
+    Тестирует, что курсорная пагинация проходит весь архив
+    без пропусков и повторов в порядке (date, id) по убыванию.
+    """
+    expected = list(
+        News.objects.order_by('-date', '-pk').values_list('pk', flat=True)
+    )
+    pages, last_page = walk_home_pages(client, 'next')
+    assert all(len(page) <= NEWS_COUNT_ON_HOME_PAGE for page in pages)
+    assert sum(pages, []) == expected
+    back_pages, _ = walk_home_pages(
+        client, 'previous', last_page.previous_cursor
+    )
+    assert back_pages == pages[-2::-1]
+
+
+@pytest.mark.django_db
+def test_home_page_single_query(
+    client, news_archive, create_comment, django_assert_num_queries
+):
+    """
+    Тестирует, что главная страница со счётчиками комментариев
+    строится одним запросом к базе.
+    """
+    with django_assert_num_queries(1):
+        response = client.get(reverse('news:home'))
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'backend',
+    (
+        'django.core.cache.backends.locmem.LocMemCache',
+        'django.core.cache.backends.filebased.FileBasedCache',
+    )
+)
+def test_home_page_fragment_cache(
+    client, author, news_archive, settings, tmp_path, backend
+):
+    """
+    Тестирует, что фрагменты новостей на главной берутся из кеша
+    и перерисовываются только для изменённой новости.
+    """
+    settings.CACHES = {
+        'default': {'BACKEND': backend, 'LOCATION': str(tmp_path)}
+    }
+    url = reverse('news:home')
+    client.get(url)
+    assert (stats.hits, stats.misses) == (0, NEWS_COUNT_ON_HOME_PAGE)
+    stats.reset()
+    response = client.get(url)
+    assert (stats.hits, stats.misses) == (NEWS_COUNT_ON_HOME_PAGE, 0)
+    stats.reset()
+    news = response.context['page_obj'][0]
+    Comment.objects.create(news=news, author=author, text='Текст')
+    response = client.get(url)
+    assert (stats.hits, stats.misses) == (NEWS_COUNT_ON_HOME_PAGE - 1, 1)
+    assert 'Комментариев: 1' in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_home_page_invalid_cursor(client, news_archive):
+    """Тестирует, что подделанный курсор приводит к 404."""
+    response = client.get(reverse('news:home'), {'cursor': 'forged'})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_news_detail_shows_first_comments_page(
+    client, pk_news, comments_thread
+):
+    """
+    Тестирует, что на странице новости выводится только
+    первая страница комментариев.
+    """
+    response = client.get(reverse('news:detail', args=pk_news))
+    comments = response.context['comments']
+    assert len(comments) == COMMENTS_COUNT_ON_DETAIL_PAGE
+    assert comments.has_next()
+
+
+@pytest.mark.django_db
+def test_comments_fragment_loads_rest_of_thread(
+    client, news, pk_news, comments_thread
+):
+    """
+    Тестирует, что фрагменты «Показать ещё» по очереди отдают
+    все комментарии в хронологическом порядке и без шаблона страницы.
+    """
+    response = client.get(reverse('news:detail', args=pk_news))
+    page = response.context['comments']
+    loaded = [comment.pk for comment in page]
+    while page.has_next():
+        response = client.get(
+            reverse('news:comments', args=pk_news),
+            {'cursor': page.next_cursor}
+        )
+        assert '<html>' not in response.content.decode()
+        page = response.context['page_obj']
+        loaded += [comment.pk for comment in page]
+    assert loaded == list(
+        news.comment_set.order_by('created', 'pk')
+        .values_list('pk', flat=True)
+    )
+
+
+@pytest.mark.django_db
+def test_comments_fragment_invalid_cursor(client, pk_news):
+    """Тестирует, что подделанный курсор комментариев приводит к 404."""
+    response = client.get(
+        reverse('news:comments', args=pk_news), {'cursor': 'forged'}
+    )
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_search_ranks_title_matches_first(client, news):
+    """
+    Тестирует, что поиск находит слово в заголовке и тексте
+    и ставит совпадение в заголовке выше.
+    """
+    in_text = News.objects.create(
+        title='Новости науки', text='Марсоход прислал новые снимки.'
+    )
+    in_title = News.objects.create(
+        title='Марсоход снова в пути', text='Подробности позже.'
+    )
+    response = client.get(reverse('news:search'), {'q': 'марсоход'})
+    assert list(response.context['object_list']) == [in_title, in_text]
+
+
+@pytest.mark.django_db
+def test_search_index_follows_news_writes(client, news):
+    """
+    Тестирует, что индекс поиска обновляется при изменении
+    и удалении новости.
+    """
+    url = reverse('news:search')
+    news.title = 'Кометы'
+    news.save()
+    assert list(client.get(url, {'q': 'кометы'}).context['object_list']) == [
+        news
+    ]
+    assert not client.get(url, {'q': 'заголовок'}).context['object_list']
+    news.delete()
+    assert not client.get(url, {'q': 'кометы'}).context['object_list']
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('query', ('', '"AND (', 'NEAR(*', '-'))
+def test_search_ignores_fts_syntax(client, news, query):
+    """Тестирует, что служебные символы FTS5 в запросе не ломают поиск."""
+    response = client.get(reverse('news:search'), {'q': query})
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+def test_search_pagination(client, news_archive):
+    """Тестирует, что результаты поиска разбиты на страницы."""
+    url = reverse('news:search')
+    first = client.get(url, {'q': 'archive'}).context['page_obj']
+    assert len(first) == NEWS_COUNT_ON_HOME_PAGE
+    last = client.get(
+        url, {'q': 'archive', 'page': first.paginator.num_pages}
+    ).context['page_obj']
+    assert first.paginator.count == len(news_archive)
+    assert not set(first.object_list) & set(last.object_list)
+
+
+@pytest.mark.django_db
+def test_comment_export_csv(admin_client, author, news, comments_thread):
+    """
+    Тестирует, что CSV-выгрузка отдаёт все комментарии новости
+    потоком, читая их одним запросом.
+    """
+    Comment.objects.create(news=news, author=author, text='Текст, "кавычки"')
+    response = admin_client.get(reverse('news:export', args=[news.pk]))
+    assert response.streaming
+    assert response['Content-Disposition'] == (
+        f'attachment; filename="news-{news.pk}-comments.csv"'
+    )
+    with CaptureQueriesContext(connection) as context:
+        content = b''.join(response.streaming_content).decode()
+    assert len(context.captured_queries) == 1
+    rows = list(csv.reader(io.StringIO(content)))
+    assert rows[0] == list(EXPORT_FIELDS)
+    assert len(rows) == Comment.objects.filter(news=news).count() + 1
+    assert rows[-1][1:2] + rows[-1][3:] == [
+        author.username, 'approved', 'Текст, "кавычки"'
+    ]
+
+
+@pytest.mark.django_db
+def test_comment_export_jsonl(admin_client, news, comment):
+    """Тестирует, что JSONL-выгрузка отдаёт по объекту на строку."""
+    response = admin_client.get(
+        reverse('news:export', args=[news.pk]), {'format': 'jsonl'}
+    )
+    lines = b''.join(response.streaming_content).decode().splitlines()
+    assert [json.loads(line) for line in lines] == [{
+        'id': comment.pk,
+        'author': comment.author.username,
+        'created': comment.created.isoformat(),
+        'status': comment.status,
+        'text': comment.text,
+    }]
@@ -1,11 +1,23 @@
+import json
+import os
+import time
+from datetime import date
 from http import HTTPStatus
+from io import StringIO
 
 import pytest
+from django.core.management import CommandError, call_command
 from django.urls import reverse
 from pytest_django.asserts import assertFormError
 
-from news.models import Comment
-from news.forms import BAD_WORDS, WARNING
+from news.models import Comment, News, UserPurge
+from news.moderation import moderate_pending
+from news.purge import delete_comments, purge_deleted
+from news.forms import BAD_WORDS, WARNING, CommentForm
+from news import lexicon
+from news.lexicon import LexiconFile, lexicon_file
+from news.pytest_tests.conftest import NEWS_COMMENTS_COUNT
+from news.ratelimit import TokenBucket
 
 
 @pytest.mark.django_db
@@ -83,3 +95,428 @@ def test_reader_cant_edit_comment(reader_client, comment, comment_form):
     assert response.status_code == HTTPStatus.NOT_FOUND
     comment.refresh_from_db()
     assert comment.text == original_text
+
+
+@pytest.mark.django_db
+def test_comment_count_follows_comment_writes(
+    reader_client, author_client, news, comment, comment_form
+):
+    """
+    Тестирует, что счётчик опубликованных комментариев новости
+    меняется при модерации и удалении комментария через сайт.
+    """
+    news.refresh_from_db()
+    assert news.comment_count == 1
+    reader_client.post(reverse('news:detail', args=[news.pk]), comment_form)
+    news.refresh_from_db()
+    assert news.comment_count == 1
+    moderate_pending(batch_size=10)
+    news.refresh_from_db()
+    assert news.comment_count == 2
+    author_client.post(reverse('news:delete', args=[comment.pk]))
+    news.refresh_from_db()
+    assert news.comment_count == 1
+
+
+@pytest.mark.django_db
+def test_comment_count_on_bulk_and_cascade_delete(
+    author, reader, news, create_comment
+):
+    """
+    Тестирует, что счётчик комментариев уменьшается при удалении
+    комментариев набором (как в админке) и каскадом вместе с автором.
+    """
+    Comment.objects.create(news=news, author=reader, text='Текст')
+    Comment.objects.filter(author=reader).delete()
+    news.refresh_from_db()
+    assert news.comment_count == NEWS_COMMENTS_COUNT
+    author.delete()
+    news.refresh_from_db()
+    assert news.comment_count == 0
+
+
+@pytest.mark.django_db
+def test_comment_count_when_comment_moves(admin_client, news, comment):
+    """
+    Тестирует, что при переносе комментария в другую новость через
+    админку счётчик переходит из прежней новости в новую.
+    """
+    other = News.objects.create(title='Другая', text='Текст')
+    response = admin_client.post(
+        reverse('admin:news_comment_change', args=[comment.pk]),
+        {
+            'news': other.pk,
+            'author': comment.author_id,
+            'text': comment.text,
+            'status': Comment.Status.APPROVED,
+        }
+    )
+    assert response.status_code == HTTPStatus.FOUND
+    news.refresh_from_db()
+    other.refresh_from_db()
+    assert (news.comment_count, other.comment_count) == (0, 1)
+    comment = Comment.objects.get(pk=comment.pk)
+    comment.news = news
+    comment.status = Comment.Status.REJECTED
+    comment.save()
+    news.refresh_from_db()
+    other.refresh_from_db()
+    assert (news.comment_count, other.comment_count) == (0, 0)
+
+
+@pytest.mark.django_db
+def test_recount_comments_command(news, create_comment):
+    """Тестирует, что команда recount_comments исправляет счётчики."""
+    News.objects.update(comment_count=100)
+    call_command('recount_comments', batch_size=1, stdout=StringIO())
+    news.refresh_from_db()
+    assert news.comment_count == NEWS_COMMENTS_COUNT
+
+
+@pytest.mark.django_db
+def test_recount_comments_refreshes_home(client, news, create_comment):
+    """
+    Тестирует, что после recount_comments главная страница показывает
+    исправленный счётчик, а не закешированный.
+    """
+    News.objects.update(comment_count=100)
+    url = reverse('news:home')
+    response = client.get(url)
+    assert 'Комментариев: 100' in response.content.decode()
+    call_command('recount_comments', stdout=StringIO())
+    response = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+    assert response.status_code == HTTPStatus.OK
+    content = response.content.decode()
+    assert f'Комментариев: {NEWS_COMMENTS_COUNT}' in content
+    assert 'Комментариев: 100' not in content
+
+
+@pytest.fixture
+def news_feed(tmp_path):
+    path = tmp_path / 'feed.jsonl'
+    path.write_text(
+        '\n'.join(
+            json.dumps({
+                'title': f'Лента {i}', 'text': 'Текст', 'date': '2024-01-0'
+                + str(i % 3 + 1)
+            })
+            for i in range(5)
+        ),
+        encoding='utf-8'
+    )
+    return path
+
+
+@pytest.mark.django_db
+def test_import_news_jsonl(news_feed):
+    """Тестирует загрузку новостей из JSONL небольшими пачками."""
+    call_command('import_news', news_feed, batch_size=2, stdout=StringIO())
+    assert News.objects.count() == 5
+    assert News.objects.get(title='Лента 4').date == date(2024, 1, 2)
+
+
+@pytest.mark.django_db
+def test_import_news_csv(tmp_path):
+    """Тестирует загрузку новостей из CSV без даты."""
+    path = tmp_path / 'feed.csv'
+    path.write_text(
+        'title,text\nПервая,"Текст, с запятой"\nВторая,Текст\n',
+        encoding='utf-8'
+    )
+    call_command('import_news', path, stdout=StringIO())
+    assert News.objects.get(title='Первая').text == 'Текст, с запятой'
+    assert News.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_import_news_skip_existing(news_feed):
+    """
+    Тестирует, что с --skip-existing повторная загрузка
+    не создаёт дубликатов (title, date).
+    """
+    call_command('import_news', news_feed, stdout=StringIO())
+    call_command(
+        'import_news', news_feed, skip_existing=True, stdout=StringIO()
+    )
+    assert News.objects.count() == 5
+
+
+@pytest.mark.django_db
+def test_import_news_invalid_row(tmp_path):
+    """Тестирует, что строка без обязательного поля прерывает загрузку."""
+    path = tmp_path / 'feed.jsonl'
+    path.write_text('{"title": "Без текста"}\n', encoding='utf-8')
+    with pytest.raises(CommandError):
+        call_command('import_news', path, stdout=StringIO())
+
+
+@pytest.mark.parametrize('text', ('РЕДИСКА', 'ну ты и pедиcка', 'HEГOДЯЙ'))
+def test_bad_words_with_homoglyphs(text):
+    """
+    Тестирует, что запрещённое слово находится независимо
+    от регистра и латинских букв, похожих на кириллицу.
+    """
+    form = CommentForm(data={'text': text})
+    assert not form.is_valid()
+    assert form.errors['text'] == [WARNING]
+
+
+def test_bad_words_file_reload(tmp_path, settings, monkeypatch):
+    """
+    Тестирует, что словарь из файла нормализует ё и после изменения
+    файла перечитывается в фоне, а до того действует прежний словарь.
+    """
+    monkeypatch.setattr(lexicon, 'STAT_INTERVAL', 0)
+    path = tmp_path / 'bad_words.txt'
+    path.write_text('# Словарь\nёжик\n', encoding='utf-8')
+    settings.BAD_WORDS_FILE = path
+    assert not CommentForm(data={'text': 'Ежик в тумане'}).is_valid()
+    assert CommentForm(data={'text': 'редиска'}).is_valid()
+    path.write_text('редиска\n', encoding='utf-8')
+    mtime = path.stat().st_mtime_ns + 1_000_000_000
+    os.utime(path, ns=(mtime, mtime))
+    assert not CommentForm(data={'text': 'Ёжик в тумане'}).is_valid()
+    lexicon_file(path).thread.join()
+    assert CommentForm(data={'text': 'Ёжик в тумане'}).is_valid()
+    assert not CommentForm(data={'text': 'редиска'}).is_valid()
+
+
+def test_bad_words_file_unavailable(tmp_path, caplog):
+    """
+    Тестирует, что mtime словаря проверяется не чаще STAT_INTERVAL,
+    а недоступный файл не ломает проверку: остаётся прежний словарь,
+    а без него действует пустой.
+    """
+    now = [0]
+    path = tmp_path / 'bad_words.txt'
+    missing = LexiconFile(path, clock=lambda: now[0])
+    assert missing.get_matcher().search('редиска') is None
+    assert 'Не удалось проверить словарь' in caplog.text
+    path.write_text('редиска\n', encoding='utf-8')
+    file = LexiconFile(path, clock=lambda: now[0])
+    assert file.get_matcher().search('редиска') == 'редиска'
+    path.unlink()
+    now[0] += lexicon.STAT_INTERVAL / 2
+    assert file.get_matcher().search('редиска') == 'редиска'
+    assert file.checked == 0
+    now[0] += lexicon.STAT_INTERVAL
+    caplog.clear()
+    assert file.get_matcher().search('редиска') == 'редиска'
+    assert 'Не удалось проверить словарь' in caplog.text
+    assert file.checked == now[0]
+
+
+@pytest.mark.django_db
+def test_submitted_comment_waits_for_moderation(
+    client, reader_client, news, comment_form
+):
+    """
+    Тестирует, что комментарий с сайта до модерации виден
+    только своему автору.
+    """
+    url = reverse('news:detail', args=[news.pk])
+    reader_client.post(url, comment_form)
+    comment = Comment.objects.get()
+    assert comment.is_pending
+    assert list(reader_client.get(url).context['comments']) == [comment]
+    assert not list(client.get(url).context['comments'])
+    assert moderate_pending(batch_size=10) == (1, 0)
+    assert list(client.get(url).context['comments']) == [comment]
+
+
+@pytest.mark.django_db
+def test_edited_comment_returns_to_moderation(
+    author_client, news, comment, comment_form
+):
+    """Тестирует, что отредактированный комментарий снова ждёт проверки."""
+    author_client.post(reverse('news:edit', args=[comment.pk]), comment_form)
+    comment.refresh_from_db()
+    news.refresh_from_db()
+    assert comment.is_pending
+    assert news.comment_count == 0
+
+
+@pytest.mark.django_db
+def test_moderation_rejects_duplicates_and_links(author, news):
+    """
+    Тестирует, что модерация отклоняет повтор комментария
+    и комментарий с большим числом ссылок.
+    """
+    pending = Comment.Status.PENDING
+    links = ' '.join(['https://example.com'] * 3)
+    for text in ('Первый', 'Первый', links):
+        Comment.objects.create(
+            news=news, author=author, text=text, status=pending
+        )
+    assert moderate_pending(batch_size=10) == (1, 2)
+    assert list(
+        Comment.objects.filter(status=Comment.Status.APPROVED)
+        .values_list('text', flat=True)
+    ) == ['Первый']
+
+
+@pytest.mark.django_db
+def test_moderation_batch_query_count(
+    author, news_archive, django_assert_max_num_queries
+):
+    """
+    Тестирует, что пачка из сотен комментариев к нескольким новостям
+    модерируется постоянным числом запросов в одной транзакции.
+    """
+    all_news = News.objects.all()[:3]
+    Comment.objects.bulk_create(
+        Comment(
+            news=all_news[i % 3], author=author, text=f'Комментарий {i}',
+            status=Comment.Status.PENDING
+        )
+        for i in range(300)
+    )
+    # Выборка id, комментариев и дублей, затем по два UPDATE на новость.
+    with django_assert_max_num_queries(3 + 2 * 3 + 2):
+        assert moderate_pending(batch_size=300) == (300, 0)
+    assert sum(News.objects.values_list('comment_count', flat=True)) == 300
+
+
+@pytest.mark.django_db
+def test_moderate_comments_command(author, news):
+    """Тестирует, что команда moderate_comments разбирает очередь."""
+    Comment.objects.create(
+        news=news, author=author, text='Текст', status=Comment.Status.PENDING
+    )
+    call_command('moderate_comments', once=True, stdout=StringIO())
+    assert not Comment.objects.filter(status=Comment.Status.PENDING).exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_moderation_worker_thread(reader_client, news, comment_form, settings):
+    """
+    Тестирует, что рабочий поток модерирует комментарий,
+    отправленный через сайт.
+    """
+    settings.COMMENT_MODERATION_WORKERS = 1
+    reader_client.post(reverse('news:detail', args=[news.pk]), comment_form)
+    deadline = time.monotonic() + 5
+    while Comment.objects.filter(status=Comment.Status.PENDING).exists():
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    assert Comment.objects.get().status == Comment.Status.APPROVED
+
+
+@pytest.mark.django_db
+def test_comment_rate_limit(
+    reader_client, author_client, news, comment_form, settings
+):
+    """
+    Тестирует, что сверх лимита комментарии не принимаются:
+    ответ 429 с Retry-After, у других пользователей свой лимит.
+    """
+    settings.RATE_LIMITS = {'comment_create': (2, 60)}
+    url = reverse('news:detail', args=[news.pk])
+    for _ in range(2):
+        assert reader_client.post(url, comment_form).status_code == (
+            HTTPStatus.FOUND
+        )
+    response = reader_client.post(url, comment_form)
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert response['Retry-After'] == '30'
+    assert author_client.post(url, comment_form).status_code == (
+        HTTPStatus.FOUND
+    )
+    assert Comment.objects.count() == 3
+
+
+@pytest.mark.django_db
+def test_comment_edit_rate_limit(
+    author_client, comment, comment_form, settings
+):
+    """Тестирует лимит на редактирование комментария."""
+    settings.RATE_LIMITS = {'comment_edit': (1, 60)}
+    url = reverse('news:edit', args=[comment.pk])
+    assert author_client.post(url, comment_form).status_code == (
+        HTTPStatus.FOUND
+    )
+    assert author_client.post(url, comment_form).status_code == (
+        HTTPStatus.TOO_MANY_REQUESTS
+    )
+    assert author_client.get(url).status_code == HTTPStatus.OK
+
+
+def test_token_bucket_refills():
+    """Тестирует, что ведро наполняется со временем, но не сверх ёмкости."""
+    bucket = TokenBucket(3, 30)
+    assert [bucket.take('bucket', 0) for _ in range(4)] == [0, 0, 0, 10]
+    assert bucket.take('bucket', 5) == 5
+    assert bucket.take('bucket', 10) == 0
+    assert bucket.take('bucket', 10) == 10
+    assert [bucket.take('bucket', 1000) for _ in range(4)] == [0, 0, 0, 10]
+
+
+@pytest.mark.django_db
+def test_deleted_news_is_hidden(client, news, comment):
+    """Тестирует, что удалённая новость сразу пропадает с сайта."""
+    News.objects.filter(pk=news.pk).update(is_deleted=True)
+    assert news not in client.get(reverse('news:home')).context['object_list']
+    response = client.get(reverse('news:detail', args=[news.pk]))
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    response = client.get(reverse('news:comments', args=[news.pk]))
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert News.all_objects.filter(pk=news.pk).exists()
+
+
+@pytest.mark.django_db
+def test_purge_deletes_comments_in_batches(
+    news, comments_thread, django_assert_max_num_queries
+):
+    """
+    Тестирует, что комментарии удаляются пачками заданного размера,
+    а не все разом с загрузкой объектов в память.
+    """
+    call_command('recount_comments', stdout=StringIO())
+    total = Comment.objects.count()
+    batch_size = 10
+    batches = -(-total // batch_size)
+    # На пачку: savepoint, выборка id, удаление опубликованных,
+    # UPDATE новости, удаление остальных и release; в конце пустая
+    # выборка в своей транзакции.
+    with django_assert_max_num_queries(batches * 6 + 3):
+        assert delete_comments(
+            Comment.objects.filter(news=news), batch_size
+        ) == total
+    news.refresh_from_db()
+    assert news.comment_count == 0
+
+
+@pytest.mark.django_db
+def test_purge_deleted_news(news, comments_thread):
+    """Тестирует очистку новости, помеченной удалённой."""
+    other = News.objects.create(title='Другая', text='Текст')
+    News.objects.filter(pk=news.pk).update(is_deleted=True)
+    assert purge_deleted(batch_size=10) == (1, 0)
+    assert not News.all_objects.filter(pk=news.pk).exists()
+    assert not Comment.objects.exists()
+    assert News.objects.get() == other
+
+
+@pytest.mark.django_db
+def test_purge_deleted_user(author, reader, news, comment):
+    """
+    Тестирует, что очистка удаляет пользователя с его комментариями
+    и уменьшает счётчики новостей.
+    """
+    kept = Comment.objects.create(news=news, author=reader, text='Текст')
+    UserPurge.objects.create(user=author)
+    assert purge_deleted(batch_size=10) == (0, 1)
+    assert list(Comment.objects.all()) == [kept]
+    assert not type(author).objects.filter(pk=author.pk).exists()
+    news.refresh_from_db()
+    assert news.comment_count == 1
+
+
+@pytest.mark.django_db
+def test_purge_deleted_command(news, comment):
+    """Тестирует команду purge_deleted."""
+    News.objects.filter(pk=news.pk).update(is_deleted=True)
+    out = StringIO()
+    call_command('purge_deleted', batch_size=1, stdout=out)
+    assert 'Удалено новостей: 1' in out.getvalue()
+    assert not Comment.objects.exists()
@@ -0,0 +1,81 @@
+import pytest
+from django.urls import reverse
+from pytest_lazyfixture import lazy_fixture
+
+# Сессия и пользователь авторизованного клиента.
+AUTH = 2
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'user_client, method, name, args, num_queries',
+    (
+        # Страница новостей: без If-None-Match ETag считается по ней.
+        (lazy_fixture('client'), 'get', 'news:home', None, 1),
+        (lazy_fixture('reader_client'), 'get', 'news:home', None, AUTH + 1),
+        # Число результатов и страница результатов поиска.
+        (lazy_fixture('client'), 'get', 'news:search', None, 2),
+        # Валидатор, новость и первая страница комментариев с авторами.
+        (
+            lazy_fixture('client'), 'get', 'news:detail',
+            lazy_fixture('pk_news'), 3
+        ),
+        (
+            lazy_fixture('reader_client'), 'get', 'news:detail',
+            lazy_fixture('pk_news'), AUTH + 3
+        ),
+        # Страница комментариев с авторами.
+        (
+            lazy_fixture('client'), 'get', 'news:comments',
+            lazy_fixture('pk_news'), 1
+        ),
+        # Анонимный пользователь сразу перенаправляется на логин.
+        (
+            lazy_fixture('client'), 'post', 'news:detail',
+            lazy_fixture('pk_news'), 0
+        ),
+        # Новость, INSERT комментария и UPDATE счётчика новости.
+        (
+            lazy_fixture('reader_client'), 'post', 'news:detail',
+            lazy_fixture('pk_news'), AUTH + 3
+        ),
+        # Комментарий вместе с новостью.
+        (
+            lazy_fixture('author_client'), 'get', 'news:edit',
+            lazy_fixture('pk_comment'), AUTH + 1
+        ),
+        (
+            lazy_fixture('author_client'), 'get', 'news:delete',
+            lazy_fixture('pk_comment'), AUTH + 1
+        ),
+        # Комментарий, его UPDATE или DELETE и UPDATE новости.
+        (
+            lazy_fixture('author_client'), 'post', 'news:edit',
+            lazy_fixture('pk_comment'), AUTH + 3
+        ),
+        (
+            lazy_fixture('author_client'), 'post', 'news:delete',
+            lazy_fixture('pk_comment'), AUTH + 3
+        ),
+        # Новость и все комментарии с авторами одним потоковым запросом.
+        (
+            lazy_fixture('staff_client'), 'get', 'news:export',
+            lazy_fixture('pk_news'), AUTH + 2
+        ),
+    )
+)
+def test_num_queries(
+    user_client, method, name, args, num_queries, comment_form,
+    comments_thread, django_assert_num_queries
+):
+    """
+    Тестирует точное количество запросов к базе для каждого
+    адреса приложения news; запись обходится одним чтением.
+    """
+    url = reverse(name, args=args)
+    data = comment_form if method == 'post' else {'q': 'текст'}
+    with django_assert_num_queries(num_queries):
+        response = getattr(user_client, method)(url, data)
+        if response.streaming:
+            # Потоковый ответ читает базу, пока его отдают клиенту.
+            b''.join(response.streaming_content)
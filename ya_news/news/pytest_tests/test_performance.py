@@ -0,0 +1,48 @@
+import pytest
+from django.urls import reverse
+
+from news.pytest_tests.performance import check_baseline, measure, named_routes
+
+# Админка проверяется самим Django и требует отдельного клиента.
+SKIPPED_NAMESPACES = ('admin',)
+CLIENTS = {
+    'anonymous': 'client',
+    'author': 'author_client',
+    'other': 'reader_client',
+    'staff': 'staff_client',
+}
+# Фикстура, чей pk подставляется в адрес, и строка запроса.
+ROUTE_ARGS = {
+    'news:detail': 'news',
+    'news:comments': 'news',
+    'news:export': 'news',
+    'news:edit': 'comment',
+    'news:delete': 'comment',
+}
+ROUTE_QUERY = {
+    'news:search': '?q=Archive',
+}
+ROUTES = [
+    name for name in named_routes()
+    if name.split(':')[0] not in SKIPPED_NAMESPACES
+]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('user', CLIENTS)
+@pytest.mark.parametrize('name', ROUTES)
+def test_route_performance(
+    request, name, user, news_archive, comments_thread, comment
+):
+    """
+    Тестирует, что число запросов и прочитанных строк при GET-запросе
+    к адресу не выросли относительно базовой линии.
+    """
+    args = None
+    if name in ROUTE_ARGS:
+        args = (request.getfixturevalue(ROUTE_ARGS[name]).pk,)
+    url = reverse(name, args=args) + ROUTE_QUERY.get(name, '')
+    client = request.getfixturevalue(CLIENTS[user])
+    measured = measure(client, url)
+    problems = check_baseline(f'{name} {user}', measured)
+    assert not problems, f'{url}: ' + '; '.join(problems)
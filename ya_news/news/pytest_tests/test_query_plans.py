@@ -0,0 +1,89 @@
+import re
+
+import pytest
+from django.db import connection
+from django.test.client import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from news.export import export_queryset
+from news.views import CommentUpdate
+
+FULL_SCAN = re.compile(r'^SCAN (TABLE )?\S+$')
+TEMP_SORT = 'USE TEMP B-TREE'
+
+
+def query_plan(sql, params=()):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def assert_indexed(sql, params=()):
+    """Проверяет, что запрос обходится без полного скана и сортировки."""
+    plan = query_plan(sql, params)
+    for step in plan:
+        assert not FULL_SCAN.match(step), f'{sql}\n{plan}'
+        assert TEMP_SORT not in step, f'{sql}\n{plan}'
+
+
+def assert_view_queries_indexed(client, url):
+    with CaptureQueriesContext(connection) as context:
+        client.get(url)
+    selects = [
+        query['sql'] for query in context.captured_queries
+        if query['sql'].startswith('SELECT')
+    ]
+    assert selects
+    for sql in selects:
+        assert_indexed(sql)
+
+
+@pytest.mark.django_db
+def test_news_list_query_plan(client, news_archive):
+    """
+    Тестирует, что первая и последующие страницы главной
+    читаются по индексу (date, id).
+    """
+    url = reverse('news:home')
+    assert_view_queries_indexed(client, url)
+    next_cursor = client.get(url).context['page_obj'].next_cursor
+    assert_view_queries_indexed(client, f'{url}?cursor={next_cursor}')
+
+
+@pytest.mark.django_db
+def test_news_detail_query_plan(client, pk_news, comments_thread):
+    """
+    Тестирует, что новость и страницы её комментариев с авторами
+    читаются по индексам.
+    """
+    url = reverse('news:detail', args=pk_news)
+    assert_view_queries_indexed(client, url)
+    next_cursor = client.get(url).context['comments'].next_cursor
+    assert_view_queries_indexed(
+        client,
+        f"{reverse('news:comments', args=pk_news)}?cursor={next_cursor}"
+    )
+
+
+@pytest.mark.django_db
+def test_comment_base_queryset_query_plan(author, create_comment):
+    """
+    Тестирует, что комментарии пользователя в хронологическом
+    порядке читаются по индексу (author_id, created).
+    """
+    view = CommentUpdate()
+    view.request = RequestFactory().get('/')
+    view.request.user = author
+    sql, params = view.get_queryset().query.sql_with_params()
+    assert_indexed(sql, params)
+
+
+@pytest.mark.django_db
+def test_comment_export_query_plan(pk_news):
+    """
+    Тестирует, что выгрузка читает комментарии новости по индексу
+    (news_id, created) без сортировки.
+    """
+    sql, params = export_queryset(pk_news[0]).query.sql_with_params()
+    assert_indexed(sql, params)
@@ -5,6 +5,8 @@ import pytest
 from pytest_lazyfixture import lazy_fixture
 from pytest_django.asserts import assertRedirects
 
+from news.models import Comment, News
+
 
 @pytest.mark.django_db
 @pytest.mark.parametrize(
@@ -81,3 +83,113 @@ def test_reader_cant_edit_delete_comment(reader_client, name, args):
     url = reverse(name, args=args)
     response = reader_client.get(url)
     assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_comments_of_missing_news(client, news, comment):
+    """
+    Тестирует, что комментарии несуществующей или удалённой новости
+    отдают 404, а новости без комментариев — пустую страницу.
+    """
+    url = reverse('news:comments', args=[news.pk + 1])
+    assert client.get(url).status_code == HTTPStatus.NOT_FOUND
+    url = reverse('news:comments', args=[news.pk])
+    Comment.objects.all().delete()
+    response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    assert not response.context['object_list']
+    News.objects.filter(pk=news.pk).update(is_deleted=True)
+    assert client.get(url).status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_news_detail_conditional_get(client, author, pk_news):
+    """
+    Тестирует, что неизменённая страница новости отдаёт 304,
+    а новый комментарий меняет её валидаторы.
+    """
+    url = reverse('news:detail', args=pk_news)
+    response = client.get(url)
+    assert response.has_header('Last-Modified')
+    etag = response['ETag']
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    Comment.objects.create(news_id=pk_news[0], author=author, text='Текст')
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+def test_home_page_cursor_conditional_get(
+    client, news_archive, django_assert_num_queries
+):
+    """
+    Тестирует, что страница по курсору отдаёт 304 одним агрегатом
+    по своему окну, а удаление новости с неё меняет ETag.
+    """
+    page = client.get(reverse('news:home')).context['page_obj']
+    url = f"{reverse('news:home')}?cursor={page.next_cursor}"
+    response = client.get(url)
+    etag = response['ETag']
+    with django_assert_num_queries(1):
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    News.objects.filter(
+        pk=client.get(url).context['object_list'][0].pk
+    ).update(is_deleted=True)
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+def test_home_page_conditional_get(
+    client, news_archive, news, django_assert_num_queries
+):
+    """
+    Тестирует, что неизменённая главная отдаёт 304 одним запросом
+    валидатора, а правка новости на ней меняет ETag.
+    """
+    url = reverse('news:home')
+    etag = client.get(url)['ETag']
+    with django_assert_num_queries(1):
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    news.title = 'Новый заголовок'
+    news.save()
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('name', ('news:home', 'news:detail'))
+def test_conditional_get_varies_by_user(
+    client, author_client, reader_client, pk_news, name
+):
+    """
+    Тестирует, что ETag различается для анонима и разных
+    пользователей, а пользователю не отдаётся Last-Modified.
+    """
+    url = reverse(name, args=pk_news if name == 'news:detail' else None)
+    responses = [c.get(url) for c in (client, author_client, reader_client)]
+    assert len({response['ETag'] for response in responses}) == 3
+    assert not responses[1].has_header('Last-Modified')
+
+
+@pytest.mark.django_db
+def test_comment_export_is_staff_only(
+    client, reader_client, admin_client, pk_news
+):
+    """
+    Тестирует, что выгрузка комментариев доступна только сотрудникам:
+    аноним уходит на логин, обычный пользователь получает 403.
+    """
+    url = reverse('news:export', args=pk_news)
+    assertRedirects(
+        client.get(url), f'{reverse("users:login")}?next={url}'
+    )
+    assert reader_client.get(url).status_code == HTTPStatus.FORBIDDEN
+    assert admin_client.get(url).status_code == HTTPStatus.OK
+    response = admin_client.get(url, {'format': 'xml'})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    response = admin_client.get(reverse('news:export', args=[0]))
+    assert response.status_code == HTTPStatus.NOT_FOUND
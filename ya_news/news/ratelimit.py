@@ -0,0 +1,92 @@
+"""
+Ограничение частоты запросов на запись.
+
+Для каждой пары «область, пользователь» в кеше лежит ведро токенов:
+ведро вмещает capacity токенов и наполняется заново за period секунд,
+каждый запрос на запись забирает один токен. Проверка стоит одного
+чтения и не больше одной записи в кеш. Чтение и запись не атомарны,
+поэтому при одновременных запросах ведро изредка может пропустить
+лишний запрос — для защиты от скриптов этого достаточно.
+"""
+import math
+import time
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+RATE_LIMIT_KEY = 'ratelimit:{scope}:{ident}'
+WRITE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+
+class TokenBucket:
+    """Ведро на capacity токенов, наполняемое за period секунд."""
+
+    def __init__(self, capacity, period):
+        self.capacity = capacity
+        self.period = period
+        self.rate = capacity / period
+
+    def take(self, key, now):
+        """
+        Забирает токен из ведра key.
+
+        Возвращает 0, если токен нашёлся, иначе — сколько секунд ждать
+        следующего. Отказ в кеш не пишется: состояние ведра от него
+        не меняется.
+        """
+        tokens, updated = cache.get(key, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+        if tokens < 1:
+            return (1 - tokens) / self.rate
+        # Отсутствующий ключ означает полное ведро, поэтому хранить
+        # его дольше, чем ведро наполняется, незачем.
+        cache.set(key, (tokens - 1, now), math.ceil(self.period))
+        return 0
+
+
+def get_bucket(scope):
+    """Ведро для области scope из settings.RATE_LIMITS или None."""
+    limit = settings.RATE_LIMITS.get(scope)
+    return limit and TokenBucket(*limit)
+
+
+def get_ident(request):
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    return f'ip:{request.META.get("REMOTE_ADDR")}'
+
+
+def too_many_requests(retry_after):
+    response = HttpResponse(
+        'Слишком много запросов, попробуйте позже.',
+        content_type='text/plain; charset=utf-8',
+        status=HTTPStatus.TOO_MANY_REQUESTS
+    )
+    response['Retry-After'] = str(math.ceil(retry_after))
+    return response
+
+
+class RateLimitMixin:
+    """
+    Ограничивает частоту запросов на запись к представлению.
+
+    Лимит берётся из settings.RATE_LIMITS по rate_limit_scope;
+    при превышении возвращается ответ 429 с заголовком Retry-After.
+    Миксин ставится после LoginRequiredMixin, чтобы запросы анонимов
+    уходили на страницу входа, не расходуя токены.
+    """
+    rate_limit_scope = None
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method in WRITE_METHODS:
+            bucket = get_bucket(self.rate_limit_scope)
+            if bucket is not None:
+                key = RATE_LIMIT_KEY.format(
+                    scope=self.rate_limit_scope, ident=get_ident(request)
+                )
+                retry_after = bucket.take(key, time.time())
+                if retry_after:
+                    return too_many_requests(retry_after)
+        return super().dispatch(request, *args, **kwargs)
@@ -0,0 +1,32 @@
+"""Полнотекстовый поиск по новостям через индекс SQLite FTS5."""
+import re
+
+from .models import News
+
+FTS_TABLE = 'news_news_fts'
+# Совпадение в заголовке весит больше, чем в тексте.
+RANK_SQL = f'bm25({FTS_TABLE}, 10.0, 1.0)'
+
+
+def build_match_query(text):
+    """
+    Превращает пользовательский ввод в запрос FTS5.
+
+    Каждое слово берётся в кавычки, поэтому операторы и спецсимволы
+    FTS5 во вводе не ломают запрос; слова объединяются через AND.
+    """
+    return ' '.join(f'"{word}"' for word in re.findall(r'\w+', text))
+
+
+def search_news(text):
+    """Новости, подходящие под запрос, от самых релевантных."""
+    match = build_match_query(text)
+    if not match:
+        return News.objects.none()
+    return News.objects.extra(
+        select={'rank': RANK_SQL},
+        tables=[FTS_TABLE],
+        where=[f'{FTS_TABLE}.rowid = news_news.id', f'{FTS_TABLE} MATCH %s'],
+        params=[match],
+        order_by=['rank', '-id'],
+    )
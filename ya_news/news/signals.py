@@ -0,0 +1,60 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import fragment_cache
+from .models import Comment, News
+
+
+def touch_news(news_id, **fields):
+    """
+    Отмечает новость изменённой, заодно обновляя поля fields.
+
+    Счётчик опубликованных комментариев меняется атомарно через F().
+    """
+    News.objects.filter(pk=news_id).update(updated=timezone.now(), **fields)
+    fragment_cache.bump_version(news_id)
+
+
+def approved_delta(was_approved, is_approved):
+    """Изменение счётчика опубликованных комментариев."""
+    fields = {}
+    if was_approved != is_approved:
+        delta = 1 if is_approved else -1
+        fields['comment_count'] = F('comment_count') + delta
+    return fields
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    was_approved = (
+        not created
+        and getattr(instance, 'loaded_status', None) == Comment.Status.APPROVED
+    )
+    is_approved = instance.status == Comment.Status.APPROVED
+    loaded_news_id = getattr(instance, 'loaded_news_id', None)
+    if not created and loaded_news_id not in (None, instance.news_id):
+        # Комментарий перенесли в другую новость: прежняя его теряет,
+        # а новая получает как новый.
+        touch_news(loaded_news_id, **approved_delta(was_approved, False))
+        was_approved = False
+    touch_news(instance.news_id, **approved_delta(was_approved, is_approved))
+    instance.loaded_status = instance.status
+    instance.loaded_news_id = instance.news_id
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    # Срабатывает и при удалении из админки, и при каскадном удалении
+    # вместе с новостью или автором.
+    was_approved = instance.status == Comment.Status.APPROVED
+    touch_news(instance.news_id, **approved_delta(was_approved, False))
+
+
+@receiver(post_save, sender=News)
+@receiver(post_delete, sender=News)
+def news_changed(sender, instance, **kwargs):
+    fragment_cache.bump_version(instance.pk)
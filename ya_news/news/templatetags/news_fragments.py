@@ -0,0 +1,39 @@
+from django import template
+
+from news import fragment_cache
+
+register = template.Library()
+
+
+class NewsFragmentNode(template.Node):
+
+    def __init__(self, nodelist, news):
+        self.nodelist = nodelist
+        self.news = news
+
+    def render(self, context):
+        news = self.news.resolve(context)
+        return fragment_cache.get_fragment(
+            news.pk, lambda: self.nodelist.render(context)
+        )
+
+
+@register.tag
+def news_fragment(parser, token):
+    """
+    Кеширует блок новости на главной странице.
+
+    Использование::
+
+        {% news_fragment news %}
+            ...
+        {% endnews_fragment %}
+    """
+    bits = token.split_contents()
+    if len(bits) != 2:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' принимает ровно один аргумент — новость."
+        )
+    nodelist = parser.parse(('endnews_fragment',))
+    parser.delete_first_token()
+    return NewsFragmentNode(nodelist, parser.compile_filter(bits[1]))
@@ -27,7 +27,7 @@ class TestHomePage(TestCase):
     def test_news_count(self):
         response = self.client.get(self.HOME_URL)
         object_list = response.context['object_list']
-        news_count = object_list.count()
+        news_count = len(object_list)
         self.assertEqual(news_count, settings.NEWS_COUNT_ON_HOME_PAGE)
 
     def test_news_order(self):
@@ -6,7 +6,18 @@ app_name = 'news'
 
 urlpatterns = [
     path('', views.NewsList.as_view(), name='home'),
+    path('search/', views.NewsSearch.as_view(), name='search'),
     path('news/<int:pk>/', views.NewsDetailView.as_view(), name='detail'),
+    path(
+        'news/<int:pk>/comments/',
+        views.NewsComments.as_view(),
+        name='comments'
+    ),
+    path(
+        'news/<int:pk>/comments/export/',
+        views.CommentExport.as_view(),
+        name='export'
+    ),
     path(
         'delete_comment/<int:pk>/',
         views.CommentDelete.as_view(),
@@ -1,53 +1,141 @@
 from django.conf import settings
-from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.db.models import Q
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
+from django.utils.decorators import method_decorator
+from django.utils.http import quote_etag
 from django.views import generic
+from django.views.decorators.http import condition
 
+from .conditional import (
+    news_detail_etag, news_detail_last_modified, news_list_etag, page_etag
+)
+from .export import EXPORT_FORMATS, export_rows
 from .forms import CommentForm
 from .models import Comment, News
-
-
-class NewsList(generic.ListView):
-    """Список новостей."""
+from .moderation import moderation_queue
+from .pagination import (
+    CursorPaginationMixin, CursorPaginator, get_page_or_404
+)
+from .ratelimit import RateLimitMixin
+from .search import search_news
+
+COMMENT_ORDERING = ('created', 'id')
+
+
+def visible_comments(queryset, user):
+    """
+    Опубликованные комментарии и комментарии пользователя,
+    ожидающие модерации.
+    """
+    visible = Q(status=Comment.Status.APPROVED)
+    if user.is_authenticated:
+        visible |= Q(status=Comment.Status.PENDING, author=user)
+    return queryset.filter(visible)
+
+
+def get_comments_page(news, user, cursor=None):
+    """Страница комментариев к новости, начиная с курсора."""
+    paginator = CursorPaginator(
+        visible_comments(news.comment_set, user).select_related('author'),
+        settings.COMMENTS_COUNT_ON_DETAIL_PAGE,
+        ordering=COMMENT_ORDERING
+    )
+    return get_page_or_404(paginator, cursor)
+
+
+@method_decorator(condition(etag_func=news_list_etag), name='get')
+class NewsList(CursorPaginationMixin, generic.ListView):
+    """
+    Список новостей.
+
+    Новости выводятся страницами от самых свежих, переход между
+    страницами — по курсору на (date, id). Размер страницы
+    определяется в настройках проекта.
+    """
     model = News
     template_name = 'news/home.html'
+    paginate_by = settings.NEWS_COUNT_ON_HOME_PAGE
 
-    def get_queryset(self):
-        """
-        Выводим только несколько последних новостей.
+    def render_to_response(self, context, **response_kwargs):
+        response = super().render_to_response(context, **response_kwargs)
+        response['ETag'] = quote_etag(
+            page_etag(self.request, context['page_obj'])
+        )
+        return response
 
-        Их количество определяется в настройках проекта.
-        """
-        return self.model.objects.prefetch_related(
-            'comment_set'
-        )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+
+class NewsSearch(generic.ListView):
+    """Поиск по новостям с ранжированием по bm25."""
+    template_name = 'news/search.html'
+    paginate_by = settings.NEWS_COUNT_ON_HOME_PAGE
+
+    def get_queryset(self):
+        return search_news(self.request.GET.get('q', ''))
 
 
 class NewsDetail(generic.DetailView):
+    """
+    Новость с первой страницей комментариев.
+
+    Остальные комментарии подгружаются по курсору через NewsComments,
+    поэтому за запрос в память попадает не больше одной страницы.
+    """
     model = News
     template_name = 'news/detail.html'
 
     def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
-            pk=self.kwargs['pk']
-        )
-        return obj
+        return get_object_or_404(self.model, pk=self.kwargs['pk'])
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        context['comments'] = get_comments_page(
+            self.object, self.request.user, self.request.GET.get('cursor')
+        )
         if self.request.user.is_authenticated:
             context['form'] = CommentForm()
         return context
 
 
+class NewsComments(CursorPaginationMixin, generic.ListView):
+    """
+    Следующая страница комментариев к новости в виде фрагмента.
+
+    Новость проверяется, только когда страница пуста: непустая
+    страница уже означает, что новость есть и не удалена.
+    """
+    model = Comment
+    template_name = 'includes/comments.html'
+    paginate_by = settings.COMMENTS_COUNT_ON_DETAIL_PAGE
+    cursor_ordering = COMMENT_ORDERING
+
+    def get_queryset(self):
+        return visible_comments(
+            self.model.objects.filter(
+                news_id=self.kwargs['pk'], news__is_deleted=False
+            ),
+            self.request.user
+        ).select_related('author')
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator, page, object_list, is_paginated = (
+            super().paginate_queryset(queryset, page_size)
+        )
+        if not object_list:
+            get_object_or_404(News.objects.only('pk'), pk=self.kwargs['pk'])
+        return paginator, page, object_list, is_paginated
+
+
 class NewsComment(
         LoginRequiredMixin,
+        RateLimitMixin,
         generic.detail.SingleObjectMixin,
         generic.FormView
 ):
     model = News
+    rate_limit_scope = 'comment_create'
     form_class = CommentForm
     template_name = 'news/detail.html'
 
@@ -55,50 +143,103 @@ class NewsComment(
         self.object = self.get_object()
         return super().post(request, *args, **kwargs)
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['comments'] = get_comments_page(
+            self.object, self.request.user
+        )
+        return context
+
     def form_valid(self, form):
         comment = form.save(commit=False)
         comment.news = self.object
         comment.author = self.request.user
+        comment.status = Comment.Status.PENDING
         comment.save()
+        moderation_queue.put(comment.pk)
         return super().form_valid(form)
 
     def get_success_url(self):
-        post = self.get_object()
-        return reverse('news:detail', kwargs={'pk': post.pk}) + '#comments'
+        return reverse(
+            'news:detail', kwargs={'pk': self.object.pk}
+        ) + '#comments'
 
 
+@method_decorator(
+    condition(news_detail_etag, news_detail_last_modified), name='get'
+)
 class NewsDetailView(generic.View):
+    detail_view = staticmethod(NewsDetail.as_view())
+    comment_view = staticmethod(NewsComment.as_view())
 
     def get(self, request, *args, **kwargs):
-        view = NewsDetail.as_view()
-        return view(request, *args, **kwargs)
+        return self.detail_view(request, *args, **kwargs)
 
     def post(self, request, *args, **kwargs):
-        view = NewsComment.as_view()
-        return view(request, *args, **kwargs)
+        return self.comment_view(request, *args, **kwargs)
 
 
 class CommentBase(LoginRequiredMixin):
-    """Базовый класс для работы с комментариями."""
+    """
+    Базовый класс для работы с комментариями.
+
+    Комментарий вместе с новостью читается одним запросом в get_object,
+    дальше представления используют только self.object.
+    """
     model = Comment
 
     def get_success_url(self):
-        comment = self.get_object()
         return reverse(
-            'news:detail', kwargs={'pk': comment.news.pk}
+            'news:detail', kwargs={'pk': self.object.news_id}
         ) + '#comments'
 
     def get_queryset(self):
         """Пользователь может работать только со своими комментариями."""
-        return self.model.objects.filter(author=self.request.user)
+        return self.model.objects.filter(
+            author=self.request.user, news__is_deleted=False
+        ).select_related('news')
 
 
-class CommentUpdate(CommentBase, generic.UpdateView):
-    """Редактирование комментария."""
+class CommentUpdate(CommentBase, RateLimitMixin, generic.UpdateView):
+    """Редактирование комментария: новый текст снова проходит модерацию."""
     template_name = 'news/edit.html'
     form_class = CommentForm
+    rate_limit_scope = 'comment_edit'
+
+    def form_valid(self, form):
+        form.instance.status = Comment.Status.PENDING
+        response = super().form_valid(form)
+        moderation_queue.put(self.object.pk)
+        return response
 
 
 class CommentDelete(CommentBase, generic.DeleteView):
     """Удаление комментария."""
     template_name = 'news/delete.html'
+
+
+class CommentExport(LoginRequiredMixin, UserPassesTestMixin, generic.View):
+    """
+    Потоковая выгрузка всех комментариев новости для сотрудников.
+
+    Формат задаётся параметром format: csv (по умолчанию) или jsonl.
+    """
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request, pk):
+        export_format = request.GET.get('format', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return HttpResponseBadRequest(
+                f'Неизвестный формат выгрузки: {export_format}'
+            )
+        get_object_or_404(News.objects.only('id'), pk=pk)
+        content_type, lines = EXPORT_FORMATS[export_format]
+        response = StreamingHttpResponse(
+            lines(export_rows(pk)), content_type=content_type
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="news-{pk}-comments.{export_format}"'
+        )
+        return response
@@ -80,3 +80,31 @@ LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('news:home')
 
 NEWS_COUNT_ON_HOME_PAGE = 10
+
+COMMENTS_COUNT_ON_DETAIL_PAGE = 20
+
+# Файл со словарём запрещённых слов, по одному на строку.
+# Если не задан, используется news.forms.BAD_WORDS.
+BAD_WORDS_FILE = None
+
+# Модерация комментариев: число рабочих потоков в процессе (0 — только
+# manage.py moderate_comments), размер пачки и допустимое число ссылок.
+COMMENT_MODERATION_WORKERS = 1
+COMMENT_MODERATION_BATCH_SIZE = 200
+COMMENT_MAX_LINKS = 2
+
+# Сколько комментариев удалять в одной транзакции при фоновой
+# очистке удалённых новостей и пользователей.
+PURGE_BATCH_SIZE = 1000
+
+# Лимиты запросов на запись для RateLimitMixin: область —
+# (число запросов, за сколько секунд). Области без лимита не ограничены.
+RATE_LIMITS = {
+    'comment_create': (10, 60),
+    'comment_edit': (20, 60),
+}
+
+# Сколько строк читать из базы за раз при выгрузке комментариев.
+EXPORT_CHUNK_SIZE = 2000
+
+NEWS_FRAGMENT_CACHE_TIMEOUT = 60 * 60
@@ -0,0 +1,71 @@
+"""
+Рост хранилища версий при правках большой заметки.
+
+    python -m benchmarks.note_revisions [--size 100000] [--edits 1000]
+
+Создаёт заметку из --size байт текста, правит в ней по одной строке
+--edits раз и сравнивает объём версий с хранением полных копий, а
+также время сохранения версии и восстановления самой дальней от
+снимка версии.
+"""
+import argparse
+import random
+import time
+
+from benchmarks import measure, report, setup
+
+LINE_LENGTH = 80
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', type=int, default=100_000)
+    parser.add_argument('--edits', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    setup()
+
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.db.models import Sum
+    from django.db.models.functions import Length
+
+    from notes.models import Note, NoteRevision
+    from notes.revisions import record_revision, revision_text
+
+    rng = random.Random(0)
+    letters = 'абвгдежзийклмнопрстуфхцчшщэюя '
+    lines = [
+        ''.join(rng.choice(letters) for _ in range(LINE_LENGTH - 1)) + '\n'
+        for _ in range(args.size // LINE_LENGTH)
+    ]
+    author = get_user_model().objects.create(username='bench')
+    note = Note.objects.create(
+        title='Большая заметка', text=''.join(lines), author=author
+    )
+    record_revision(note)
+    full_copies = len(note.text) * (args.edits + 1)
+    start = time.perf_counter()
+    for _ in range(args.edits):
+        index = rng.randrange(len(lines))
+        lines[index] = lines[index][::-1].lstrip('\n') + '\n'
+        note.text = ''.join(lines)
+        record_revision(note)
+    elapsed = (time.perf_counter() - start) * 1000 / args.edits
+    stored = NoteRevision.objects.filter(note=note).aggregate(
+        size=Sum(Length('data'))
+    )['size']
+    interval = settings.NOTE_REVISION_SNAPSHOT_INTERVAL
+    farthest = interval * (args.edits // interval)
+    print(f'Revisions: {args.edits + 1}, snapshot interval: {interval}')
+    print(f'{"full copies, characters":<50} {full_copies:10}')
+    print(f'{"snapshots and deltas, characters":<50} {stored:10}')
+    print(f'{"ratio":<50} {full_copies / stored:10.1f}')
+    report('record revision, mean', elapsed)
+    report(f'restore revision {farthest}', measure(
+        lambda: revision_text(note.pk, farthest), args.repeat
+    ))
+
+
+if __name__ == '__main__':
+    main()
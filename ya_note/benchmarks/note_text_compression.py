@@ -0,0 +1,101 @@
+"""
+Чтение, запись и размер больших заметок со сжатием и без.
+
+    python -m benchmarks.note_text_compression [--notes 20]
+
+Для текстов по 1 и 5 МБ сохраняет --notes заметок без сжатия, с zlib
+и с lzma и сравнивает время записи и чтения заметки и объём,
+занятый в базе, включая полнотекстовый индекс. Тестовая база SQLite
+живёт в памяти, так что время чтения с диска сюда не входит.
+"""
+import argparse
+import random
+
+from benchmarks import measure, report, setup
+
+SIZES = (1024 * 1024, 5 * 1024 * 1024)
+VOCABULARY_SIZE = 5000
+# Без сжатия: порог больше любого текста.
+MODES = (('plain', 'zlib', 10 ** 12), ('zlib', 'zlib', 16 * 1024),
+         ('lzma', 'lzma', 16 * 1024))
+
+
+def make_text(size, rng):
+    # Текстовый дамп: строки журнала из слов частотного словаря.
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    vocabulary = [
+        ''.join(rng.choice(letters) for _ in range(rng.randint(3, 10)))
+        for _ in range(VOCABULARY_SIZE)
+    ]
+    weights = [1 / rank for rank in range(1, VOCABULARY_SIZE + 1)]
+    lines = []
+    length = 0
+    while length < size:
+        line = f'{len(lines):08d} ' + ' '.join(
+            rng.choices(vocabulary, weights=weights, k=12)
+        ) + '\n'
+        lines.append(line)
+        length += len(line)
+    return ''.join(lines)[:size]
+
+
+def used_bytes(connection):
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA page_size')
+        page_size = cursor.fetchone()[0]
+        cursor.execute('PRAGMA page_count')
+        pages = cursor.fetchone()[0]
+        cursor.execute('PRAGMA freelist_count')
+        free = cursor.fetchone()[0]
+    return (pages - free) * page_size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--notes', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    setup()
+
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+    from django.test import override_settings
+
+    from notes.models import Note
+
+    author = get_user_model().objects.create(username='bench')
+    rng = random.Random(0)
+    for size in SIZES:
+        text = make_text(size, rng)
+        for label, algorithm, threshold in MODES:
+            Note.objects.all().delete()
+            with override_settings(
+                NOTE_TEXT_COMPRESSION=algorithm,
+                NOTE_TEXT_COMPRESS_THRESHOLD=threshold,
+            ):
+                before = used_bytes(connection)
+                Note.objects.bulk_create(
+                    Note(title=f'Дамп {i}', text=text, slug=f'dump-{i}',
+                         author=author)
+                    for i in range(args.notes)
+                )
+                stored = used_bytes(connection) - before
+                note = Note(title='Дамп', text=text, author=author)
+
+                def write():
+                    note.pk = None
+                    note.slug = ''
+                    note.save()
+
+                name = f'{size // 1024 // 1024} MB, {label}'
+                report(f'{name}, write', measure(write, args.repeat))
+                report(f'{name}, read', measure(
+                    lambda: Note.objects.get(slug='dump-0').text,
+                    args.repeat
+                ))
+                print(f'{name + ", MB per note in db":<50} '
+                      f'{stored / args.notes / 1024 / 1024:10.3f}')
+
+
+if __name__ == '__main__':
+    main()
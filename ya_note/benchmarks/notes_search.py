@@ -0,0 +1,98 @@
+"""
+Поиск FTS5 против icontains по заметкам одного пользователя.
+
+    python -m benchmarks.notes_search [--size 1000000] [--users 1000]
+
+Засевает базу из --size заметок со случайным текстом, поровну
+разделённых между --users авторами, и сравнивает первую страницу
+поиска одного автора по редкому и частому слову.
+"""
+import argparse
+import random
+from itertools import accumulate, islice
+
+from benchmarks import measure, report, setup
+
+VOCABULARY_SIZE = 20_000
+WORDS_IN_TEXT = 60
+
+
+def make_vocabulary():
+    # Латинские псевдослова: частота слова убывает с его номером.
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    rng = random.Random(0)
+    return [
+        ''.join(rng.choice(letters) for _ in range(rng.randint(4, 10)))
+        for _ in range(VOCABULARY_SIZE)
+    ]
+
+
+def seed(total, authors, vocabulary):
+    from notes.models import Note
+
+    rng = random.Random(1)
+    cum_weights = list(accumulate(
+        1 / rank for rank in range(1, len(vocabulary) + 1)
+    ))
+
+    def notes():
+        for i in range(total):
+            words = rng.choices(
+                vocabulary, cum_weights=cum_weights, k=WORDS_IN_TEXT
+            )
+            yield Note(
+                title=' '.join(words[:5]),
+                text=' '.join(words),
+                slug=f'note-{i}',
+                author=authors[i % len(authors)]
+            )
+
+    # bulk_create превращает аргумент в список, поэтому отдаём заметки
+    # частями, чтобы не держать в памяти миллион объектов.
+    stream = notes()
+    while batch := list(islice(stream, 10_000)):
+        Note.objects.bulk_create(batch)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', type=int, default=1_000_000)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    setup()
+
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+
+    from notes.models import Note
+    from notes.search import search_notes
+
+    User = get_user_model()
+    User.objects.bulk_create(
+        User(username=f'user-{i}') for i in range(args.users)
+    )
+    authors = list(User.objects.order_by('pk'))
+    vocabulary = make_vocabulary()
+    seed(args.size, authors, vocabulary)
+    author = authors[0]
+    per_page = settings.NOTES_COUNT_ON_LIST_PAGE
+    print(f'Notes: {Note.objects.count()}, '
+          f'author notes: {Note.objects.filter(author=author).count()}')
+    for label, word in (('rare', vocabulary[-1]), ('common', vocabulary[0])):
+        report(f'fts5, {label} word, page 1', measure(
+            lambda: list(search_notes(author, word)[:per_page]), args.repeat
+        ))
+        report(f'fts5, {label} word, count', measure(
+            lambda: search_notes(author, word).count(), args.repeat
+        ))
+        report(f'icontains, {label} word, page 1', measure(
+            lambda: list(Note.objects.filter(
+                author=author, text__icontains=word
+            )[:per_page]),
+            args.repeat
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Скорость slug из заголовков: pytils против notes.translit.
+
+    python -m benchmarks.translit [--titles 10000] [--unique 0.5]
+
+Генерирует --titles русских заголовков, из которых доля --unique
+различна, и сравнивает pytils.translit.slugify, slugify без памяти,
+с заполненной памятью и slugify_many на всю пачку. База не нужна.
+"""
+import argparse
+import random
+
+from pytils.translit import slugify as pytils_slugify
+
+from benchmarks import measure, report
+from notes.translit import slugify, slugify_many
+
+WORDS = (
+    'Список', 'покупок', 'на', 'неделю', 'Заметка', 'о', 'встрече',
+    'План', 'отпуска', 'Идеи', 'для', 'подарка', 'Чтение', '№', '2024',
+    'Ёлка', 'и', 'щука', 'R&D', '«Проект»', '—', 'итоги', 'Q3',
+)
+
+
+def make_titles(total, unique, rng):
+    distinct = [
+        ' '.join(rng.choices(WORDS, k=rng.randint(2, 8)))
+        for _ in range(max(1, int(total * unique)))
+    ]
+    return [rng.choice(distinct) for _ in range(total)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--titles', type=int, default=10_000)
+    parser.add_argument('--unique', type=float, default=0.5)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    titles = make_titles(args.titles, args.unique, random.Random(0))
+    assert slugify_many(titles) == [pytils_slugify(t) for t in titles]
+
+    def cold():
+        slugify.cache_clear()
+        for title in titles:
+            slugify(title)
+
+    def warm():
+        for title in titles:
+            slugify(title)
+
+    name = f'{args.titles} titles'
+    report(f'{name}, pytils', measure(
+        lambda: [pytils_slugify(title) for title in titles], args.repeat
+    ))
+    report(f'{name}, slugify, empty memo', measure(cold, args.repeat))
+    warm()
+    report(f'{name}, slugify, warm memo', measure(warm, args.repeat))
+    report(f'{name}, slugify_many', measure(
+        lambda: slugify_many(titles), args.repeat
+    ))
+
+
+if __name__ == '__main__':
+    main()
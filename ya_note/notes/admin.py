@@ -1,5 +1,69 @@
 from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin
 
-from .models import Note
+from .models import Note, UserPurge
+from .purge import purge_worker
+
+User = get_user_model()
 
 admin.site.register(Note)
+admin.site.unregister(User)
+
+
+@admin.register(User)
+class PurgeUserAdmin(UserAdmin):
+    """
+    Пользователи удаляются в фоне: и выбранные в списке, и удаляемые
+    со страницы пользователя.
+
+    Стандартное удаление строит список всех заметок пользователя
+    и удаляет их в одном запросе к админке.
+    """
+    actions = ('schedule_purge',)
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    def get_deleted_objects(self, objs, request):
+        # Заметки удалит фоновая очистка, поэтому страница
+        # подтверждения их не собирает и не перечисляет.
+        return (
+            [str(obj) for obj in objs],
+            {self.opts.verbose_name_plural: len(objs)},
+            set(),
+            [],
+        )
+
+    def delete_model(self, request, obj):
+        self.purge(request, self.get_queryset(request).filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        self.purge(request, queryset)
+
+    @admin.action(
+        description='Удалить выбранных пользователей в фоне',
+        permissions=('delete',)
+    )
+    def schedule_purge(self, request, queryset):
+        count = self.purge(request, queryset)
+        self.message_user(
+            request, f'Пользователей поставлено на удаление: {count}.'
+        )
+
+    def purge(self, request, queryset):
+        users = queryset.exclude(pk=request.user.pk)
+        UserPurge.objects.bulk_create(
+            [
+                UserPurge(user_id=pk)
+                for pk in users.values_list('pk', flat=True)
+            ],
+            ignore_conflicts=True
+        )
+        # Пользователь сразу теряет доступ к сайту, а его заметки
+        # удаляются в фоне.
+        count = users.update(is_active=False)
+        purge_worker.schedule()
+        return count
@@ -0,0 +1,94 @@
+"""
+Текстовое поле с прозрачным сжатием длинных значений.
+
+Значения длиннее NOTE_TEXT_COMPRESS_THRESHOLD байт в UTF-8 хранятся
+в том же столбце как BLOB: байт-метка алгоритма и сжатые данные.
+Короткие значения и те, что не сжимаются, остаются обычным текстом.
+Сжимается только записываемое значение, а не значения в условиях
+запросов: filter(text=...) и text__contains сравнивают с текстом как
+есть и находят несжатые значения.
+"""
+import lzma
+import zlib
+
+from django.conf import settings
+from django.db import models
+from django.db.models.query_utils import DeferredAttribute
+
+# Алгоритм: байт-метка в начале значения, сжатие и распаковка.
+COMPRESSORS = {
+    'zlib': (b'z', zlib.compress, zlib.decompress),
+    'lzma': (b'x', lzma.compress, lzma.decompress),
+}
+DECOMPRESSORS = {
+    marker: decompress for marker, _, decompress in COMPRESSORS.values()
+}
+# Функция SQLite, которая возвращает текст столбца. Ею пользовался
+# индекс поиска из миграций 0006 и 0007, и она нужна, пока они
+# применяются или откатываются.
+SQL_TEXT_FUNCTION = 'notes_text'
+
+
+def compress_text(value):
+    """Сжатое значение для базы или сам текст, если сжимать не нужно."""
+    data = value.encode()
+    if len(data) <= settings.NOTE_TEXT_COMPRESS_THRESHOLD:
+        return value
+    marker, compress, _ = COMPRESSORS[settings.NOTE_TEXT_COMPRESSION]
+    packed = marker + compress(data)
+    return packed if len(packed) < len(data) else value
+
+
+def decompress_text(value):
+    """Текст из значения столбца, сжатого или нет."""
+    if not isinstance(value, (bytes, memoryview)):
+        return value
+    value = bytes(value)
+    return DECOMPRESSORS[value[:1]](value[1:]).decode()
+
+
+def register_text_function(sender, connection, **kwargs):
+    """Добавляет notes_text() в каждое новое соединение с SQLite."""
+    if connection.vendor == 'sqlite':
+        connection.connection.create_function(
+            SQL_TEXT_FUNCTION, 1, decompress_text, deterministic=True
+        )
+
+
+class CompressedTextDescriptor(DeferredAttribute):
+    """
+    Распаковывает значение при первом обращении к атрибуту.
+
+    В отличие от DeferredAttribute задаёт __set__: иначе значение из
+    __dict__ экземпляра закрывало бы дескриптор.
+    """
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        value = super().__get__(instance, cls)
+        if isinstance(value, (bytes, memoryview)):
+            value = decompress_text(value)
+            instance.__dict__[self.field.attname] = value
+        return value
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.field.attname] = value
+
+
+class CompressedTextField(models.TextField):
+    """
+    TextField, который сжимает длинные значения.
+
+    Модель распаковывает текст лениво, при обращении к атрибуту, а
+    values() и values_list() отдают сжатые значения как есть: для них
+    есть decompress_text.
+    """
+
+    descriptor_class = CompressedTextDescriptor
+
+    def get_db_prep_save(self, value, connection):
+        value = super().get_db_prep_save(value, connection)
+        if value is None:
+            return value
+        return compress_text(value)
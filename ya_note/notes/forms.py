@@ -1,5 +1,3 @@
-from pytils.translit import slugify
-
 from django import forms
 from django.core.exceptions import ValidationError
 
@@ -16,14 +14,27 @@ class NoteForm(forms.ModelForm):
         fields = ('title', 'text', 'slug')
 
     def clean_slug(self):
-        """Обрабатывает случай, если slug не уникален."""
-        cleaned_data = super().clean()
-        slug = cleaned_data.get('slug')
-        if not slug:
-            title = cleaned_data.get('title')
-            slug = slugify(title)[:100]
-        if Note.objects.filter(
+        """
+        Обрабатывает случай, если slug не уникален.
+
+        Пустой slug подбирает Note.save: к slug из заголовка
+        добавляется свободный числовой суффикс.
+        """
+        slug = self.cleaned_data.get('slug')
+        if slug and Note.objects.filter(
                 slug=slug
         ).exclude(id=self.instance.pk).exists():
             raise ValidationError(slug + WARNING)
         return slug
+
+
+class NoteImportForm(forms.Form):
+    """Форма загрузки файла с заметками."""
+
+    file = forms.FileField(
+        label='Файл',
+        help_text=(
+            'ZIP-архив с файлами Markdown (.md) или JSONL с полями '
+            'title, text и необязательным slug'
+        )
+    )
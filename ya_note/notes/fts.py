@@ -0,0 +1,36 @@
+"""
+Запись заметок в полнотекстовый индекс SQLite FTS5.
+
+Индекс хранит копию заголовка и несжатого текста заметок, из неё же
+поиск берёт подсветку и сниппеты. Сохранённые заметки записывает в
+индекс приложение: сигнал post_save и bulk_create заметок, — так как
+распаковать текст умеет только оно. Удалённые заметки убирает
+триггер базы, которому хватает rowid.
+"""
+from django.db import DEFAULT_DB_ALIAS, connections
+
+FTS_TABLE = 'notes_note_fts'
+DELETE_SQL = f'DELETE FROM {FTS_TABLE} WHERE rowid = %s'
+INSERT_SQL = (
+    f'INSERT INTO {FTS_TABLE}(rowid, title, text, author_id) '
+    'VALUES (%s, %s, %s, %s)'
+)
+
+
+def index_notes(notes, using=DEFAULT_DB_ALIAS, created=False):
+    """
+    Записывает заметки в индекс вместо их прежних строк.
+
+    Для только что созданных заметок created=True избавляет от
+    удаления строк, которых в индексе ещё нет.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    rows = [
+        (note.pk, note.title, note.text, note.author_id) for note in notes
+    ]
+    with connection.cursor() as cursor:
+        if not created:
+            cursor.executemany(DELETE_SQL, [row[:1] for row in rows])
+        cursor.executemany(INSERT_SQL, rows)
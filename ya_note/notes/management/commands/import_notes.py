@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from notes.transfer import NoteImportError, import_notes
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортирует заметки пользователя из ZIP с файлами Markdown '
+        'или из JSONL.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', help='Автор заметок.')
+        parser.add_argument('path', help='Файл .zip или .jsonl.')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.NOTES_IMPORT_BATCH_SIZE,
+            help='Сколько заметок сохранять одним запросом.'
+        )
+
+    def handle(self, *args, username, path, batch_size, **options):
+        User = get_user_model()
+        try:
+            author = User.objects.get(**{User.USERNAME_FIELD: username})
+        except User.DoesNotExist:
+            raise CommandError(f'Пользователь {username} не найден.')
+        try:
+            with open(path, 'rb') as file:
+                imported = import_notes(author, file, path, batch_size)
+        except (OSError, NoteImportError) as error:
+            raise CommandError(str(error))
+        self.stdout.write(self.style.SUCCESS(
+            f'Импортировано заметок: {imported}'
+        ))
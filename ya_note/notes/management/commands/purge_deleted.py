@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from notes.purge import purge_users
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет пачками пользователей, поставленных на удаление, '
+        'вместе с их заметками.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.PURGE_BATCH_SIZE,
+            help='Сколько заметок удалять в одной транзакции.'
+        )
+
+    def handle(self, *args, batch_size, **options):
+        users = purge_users(batch_size)
+        if options['verbosity'] > 0:
+            self.stdout.write(self.style.SUCCESS(
+                f'Удалено пользователей: {users}'
+            ))
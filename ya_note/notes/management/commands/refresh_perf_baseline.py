@@ -0,0 +1,27 @@
+import os
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from notes.tests import performance
+
+SUITE = 'notes.tests.test_performance'
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогоняет регрессионный набор test_performance и записывает '
+        'замеры в базовую линию performance_baseline.json.'
+    )
+
+    def handle(self, *args, **options):
+        os.environ[performance.REFRESH_ENV] = '1'
+        try:
+            # Тестовый прогон создаёт и удаляет отдельную базу,
+            # рабочая база не затрагивается.
+            call_command('test', SUITE, verbosity=0)
+        finally:
+            del os.environ[performance.REFRESH_ENV]
+        self.stdout.write(self.style.SUCCESS(
+            f'Базовая линия обновлена: {performance.BASELINE_PATH}'
+        ))
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.15 on 2026-10-18 10:51
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('notes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserPurge',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('scheduled', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
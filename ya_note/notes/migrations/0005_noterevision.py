@@ -0,0 +1,30 @@
+# Generated by Django 3.2.15 on 2026-10-18 11:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0004_note_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NoteRevision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField(verbose_name='Номер версии')),
+                ('title', models.CharField(max_length=100, verbose_name='Заголовок')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Сохранена')),
+                ('is_snapshot', models.BooleanField(verbose_name='Полный текст')),
+                ('data', models.TextField(verbose_name='Текст или дельта')),
+                ('note', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='notes.note')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='noterevision',
+            constraint=models.UniqueConstraint(fields=('note', 'number'), name='note_revision_number'),
+        ),
+    ]
@@ -0,0 +1,121 @@
+# Generated by Django 3.2.15 on 2026-10-18 11:10
+
+from importlib import import_module
+
+from django.conf import settings
+from django.db import migrations
+
+import notes.fields
+
+# Сжатый текст хранится как BLOB, поэтому индекс FTS5 читает тексты
+# через представление с функцией notes_text(), которая распаковывает
+# их. Сниппеты поиска берутся из того же представления. Смена поля
+# пересоздаёт таблицу notes_note и удаляет её триггеры, поэтому
+# индекс из 0004 удаляется до неё и создаётся заново после. Так же
+# должны поступать и следующие миграции, пересоздающие notes_note:
+# SQLite не переименует таблицу, на которую ссылается представление.
+fts = import_module('notes.migrations.0004_note_fts')
+
+CREATE_SQL = (
+    """
+    CREATE VIEW IF NOT EXISTS notes_note_plain AS
+    SELECT id, title, notes_text(text) AS text, author_id FROM notes_note
+    """,
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS notes_note_fts USING fts5(
+        title, text, author_id,
+        content='notes_note_plain', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS notes_note_fts_insert
+    AFTER INSERT ON notes_note BEGIN
+        INSERT INTO notes_note_fts(rowid, title, text, author_id)
+        VALUES (new.id, new.title, notes_text(new.text), new.author_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS notes_note_fts_delete
+    AFTER DELETE ON notes_note BEGIN
+        INSERT INTO notes_note_fts(notes_note_fts, rowid, title, text, author_id)
+        VALUES (
+            'delete', old.id, old.title, notes_text(old.text), old.author_id
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS notes_note_fts_update
+    AFTER UPDATE OF title, text, author_id ON notes_note BEGIN
+        INSERT INTO notes_note_fts(notes_note_fts, rowid, title, text, author_id)
+        VALUES (
+            'delete', old.id, old.title, notes_text(old.text), old.author_id
+        );
+        INSERT INTO notes_note_fts(rowid, title, text, author_id)
+        VALUES (new.id, new.title, notes_text(new.text), new.author_id);
+    END
+    """,
+    "INSERT INTO notes_note_fts(notes_note_fts) VALUES ('rebuild')",
+)
+
+DROP_SQL = fts.DROP_SQL + ('DROP VIEW IF EXISTS notes_note_plain',)
+
+# Сколько текстов читать за раз при сжатии и распаковке.
+CHUNK_SIZE = 100
+
+
+def rewrite_texts(convert, condition, params=()):
+    """Перезаписывает тексты заметок, подходящие под condition."""
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT id FROM notes_note WHERE {condition}', params
+            )
+            ids = [pk for pk, in cursor.fetchall()]
+            for start in range(0, len(ids), CHUNK_SIZE):
+                chunk = ids[start:start + CHUNK_SIZE]
+                cursor.execute(
+                    'SELECT id, text FROM notes_note WHERE id IN ('
+                    + ', '.join(['%s'] * len(chunk)) + ')',
+                    chunk
+                )
+                cursor.executemany(
+                    'UPDATE notes_note SET text = %s WHERE id = %s',
+                    [(convert(text), pk) for pk, text in cursor.fetchall()]
+                )
+    return run
+
+
+compress_texts = rewrite_texts(
+    notes.fields.compress_text,
+    "typeof(text) = 'text' AND length(CAST(text AS BLOB)) > %s",
+    (settings.NOTE_TEXT_COMPRESS_THRESHOLD,),
+)
+decompress_texts = rewrite_texts(
+    notes.fields.decompress_text,
+    "typeof(text) = 'blob'",
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0005_noterevision'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            fts.run_sqlite(fts.DROP_SQL), fts.run_sqlite(fts.CREATE_SQL)
+        ),
+        migrations.AlterField(
+            model_name='note',
+            name='text',
+            field=notes.fields.CompressedTextField(help_text='Добавьте подробностей', verbose_name='Текст'),
+        ),
+        migrations.RunPython(
+            fts.run_sqlite(CREATE_SQL), fts.run_sqlite(DROP_SQL)
+        ),
+        migrations.RunPython(compress_texts, decompress_texts),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 3.2.15 on 2026-10-18 12:40
+
+from importlib import import_module
+
+from django.db import migrations, models
+import django.utils.timezone
+
+# Новое поле пересоздаёт таблицу notes_note: индекс поиска из 0006
+# удаляется до этого и создаётся заново после.
+fts = import_module('notes.migrations.0004_note_fts')
+compression = import_module('notes.migrations.0006_note_text_compression')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0006_note_text_compression'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            fts.run_sqlite(compression.DROP_SQL),
+            fts.run_sqlite(compression.CREATE_SQL)
+        ),
+        migrations.AddField(
+            model_name='note',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Изменена'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(
+            fts.run_sqlite(compression.CREATE_SQL),
+            fts.run_sqlite(compression.DROP_SQL)
+        ),
+    ]
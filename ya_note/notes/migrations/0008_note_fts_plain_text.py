@@ -0,0 +1,84 @@
+from importlib import import_module
+
+from django.db import migrations
+
+from notes.fields import decompress_text
+
+# Индекс поиска хранит собственную копию заголовка и текста, и
+# триггерам SQLite больше не нужна функция notes_text(): запись в
+# notes_note из любого соединения, в том числе без неё, не ломается.
+# Заметки записывает в индекс приложение (notes.search.index_notes)
+# при сохранении, так как только оно умеет распаковывать текст.
+# Удаление, в том числе каскадом и пачками в обход сигналов, снимает
+# строку индекса триггером: для этого достаточно rowid. Индекс больше
+# не ссылается на notes_note, поэтому миграциям, пересоздающим
+# таблицу, остаётся вернуть только триггер.
+fts = import_module('notes.migrations.0004_note_fts')
+compression = import_module('notes.migrations.0006_note_text_compression')
+
+CREATE_SQL = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS notes_note_fts USING fts5(
+        title, text, author_id,
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS notes_note_fts_delete
+    AFTER DELETE ON notes_note BEGIN
+        DELETE FROM notes_note_fts WHERE rowid = old.id;
+    END
+    """,
+)
+
+DROP_SQL = (
+    'DROP TRIGGER IF EXISTS notes_note_fts_delete',
+    'DROP TABLE IF EXISTS notes_note_fts',
+)
+
+# Сколько заметок переносить в индекс за раз.
+CHUNK_SIZE = 100
+
+
+def fill_index(apps, schema_editor):
+    """Записывает в индекс заметки, которые уже есть в базе."""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    last_id = 0
+    with schema_editor.connection.cursor() as cursor:
+        while True:
+            cursor.execute(
+                'SELECT id, title, text, author_id FROM notes_note '
+                'WHERE id > %s ORDER BY id LIMIT %s',
+                (last_id, CHUNK_SIZE)
+            )
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            cursor.executemany(
+                'INSERT INTO notes_note_fts(rowid, title, text, author_id) '
+                'VALUES (%s, %s, %s, %s)',
+                [
+                    (pk, title, decompress_text(text), author_id)
+                    for pk, title, text, author_id in rows
+                ]
+            )
+            last_id = rows[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0007_note_updated'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            fts.run_sqlite(compression.DROP_SQL),
+            fts.run_sqlite(compression.CREATE_SQL)
+        ),
+        migrations.RunPython(
+            fts.run_sqlite(CREATE_SQL), fts.run_sqlite(DROP_SQL)
+        ),
+        migrations.RunPython(fill_index, migrations.RunPython.noop),
+    ]
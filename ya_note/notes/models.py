@@ -1,7 +1,76 @@
+import random
+import time
+
 from django.conf import settings
-from django.db import models
+from django.db import (
+    IntegrityError, OperationalError, models, router, transaction
+)
+
+from .fields import CompressedTextField
+from .fts import index_notes
+from .translit import slugify, slugify_many
+
+# Сколько раз пробовать подобрать свободный slug, если его успели
+# занять между поиском суффикса и записью.
+SLUG_SAVE_ATTEMPTS = 10
+# Текст ошибки SQLite, которым отклоняется запись при встречной блокировке.
+SQLITE_LOCKED_MESSAGE = 'database is locked'
+# Наибольшая пауза перед повтором отклонённой транзакции в секундах на
+# каждую сделанную попытку: случайная пауза разводит повторы потоков.
+LOCK_RETRY_DELAY = 0.05
+# Место под суффикс вида -123456 в конце автоматического slug.
+SLUG_SUFFIX_LENGTH = 7
+# Сколько основ slug проверять одним запросом: на каждую уходит три
+# параметра, а SQLite принимает не больше 999.
+SLUG_QUERY_CHUNK = 250
+# Slug для заголовков, в которых нет ни одной буквы или цифры.
+DEFAULT_SLUG = 'note'
+
+
+def atomic_retry(func, using=None, attempts=SLUG_SAVE_ATTEMPTS):
+    """
+    Выполняет func в транзакции и повторяет транзакцию целиком, если
+    SQLite отклонил запись из-за встречной блокировки.
+
+    Транзакция SQLite сначала берёт блокировку чтения, и запись в ней
+    отклоняется сразу, если другой писатель ждёт снятия этой
+    блокировки: ожидание здесь было бы взаимным. Откат снимает
+    блокировку, но повторить можно только внешнюю транзакцию.
+    """
+    for attempt in range(attempts):
+        try:
+            with transaction.atomic(using=using):
+                return func()
+        except OperationalError as error:
+            if (
+                SQLITE_LOCKED_MESSAGE not in str(error)
+                or transaction.get_connection(using).in_atomic_block
+                or attempt == attempts - 1
+            ):
+                raise
+        time.sleep(random.uniform(0, LOCK_RETRY_DELAY * (attempt + 1)))
+
 
-from pytils.translit import slugify
+class NoteQuerySet(models.QuerySet):
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """
+        bulk_create, который записывает заметки в индекс поиска.
+
+        SQLite не возвращает id вставленных строк, поэтому они
+        читаются по уникальному slug.
+        """
+        notes = super().bulk_create(objs, *args, **kwargs)
+        missing = [note for note in notes if note.pk is None]
+        for start in range(0, len(missing), SLUG_QUERY_CHUNK):
+            chunk = missing[start:start + SLUG_QUERY_CHUNK]
+            pks = dict(self.filter(
+                slug__in=[note.slug for note in chunk]
+            ).values_list('slug', 'pk'))
+            for note in chunk:
+                note.pk = pks[note.slug]
+        index_notes(notes, self.db, created=True)
+        return notes
 
 
 class Note(models.Model):
@@ -11,7 +80,7 @@ class Note(models.Model):
         default='Название заметки',
         help_text='Дайте короткое название заметке'
     )
-    text = models.TextField(
+    text = CompressedTextField(
         'Текст',
         help_text='Добавьте подробностей'
     )
@@ -27,12 +96,140 @@ class Note(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    # Меняется при каждом сохранении: по нему кеш заметок узнаёт, что
+    # страница заметки устарела, в том числе после правки в другом
+    # процессе.
+    updated = models.DateTimeField('Изменена', auto_now=True)
+
+    objects = NoteQuerySet.as_manager()
+
+    class Meta:
+        indexes = (
+            models.Index(fields=('author', 'id'), name='note_author_id_idx'),
+        )
 
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            max_slug_length = self._meta.get_field('slug').max_length
-            self.slug = slugify(self.title)[:max_slug_length]
-        super().save(*args, **kwargs)
+        if self.slug:
+            return super().save(*args, **kwargs)
+        using = kwargs.get('using') or router.db_for_write(
+            type(self), instance=self
+        )
+        for attempt in range(SLUG_SAVE_ATTEMPTS):
+            self.slug = self.free_slug(using)
+            try:
+                with transaction.atomic(using=using):
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                # Slug занял параллельный запрос: ищем суффикс заново.
+                self.slug = ''
+                if attempt == SLUG_SAVE_ATTEMPTS - 1:
+                    raise
+            except OperationalError:
+                # Отклонённую из-за блокировки запись повторяет
+                # atomic_retry вокруг всей транзакции, и slug для неё
+                # подбирается заново.
+                self.slug = ''
+                raise
+
+    def free_slug(self, using):
+        """Свободный slug для заголовка заметки."""
+        return self.free_slugs([self.title], using, exclude_pk=self.pk)[0]
+
+    @classmethod
+    def slug_stems(cls, titles):
+        """
+        Основы автоматического slug: заголовки латиницей. Одиночный
+        заголовок берётся из памяти slugify, пачка — одним проходом.
+        """
+        max_length = cls._meta.get_field('slug').max_length
+        if len(titles) == 1:
+            slugs = [slugify(titles[0])]
+        else:
+            slugs = slugify_many(titles)
+        return [
+            slug[:max_length - SLUG_SUFFIX_LENGTH] or DEFAULT_SLUG
+            for slug in slugs
+        ]
+
+    @classmethod
+    def free_slugs(cls, titles, using=None, exclude_pk=None, reserved=()):
+        """
+        Свободные slug для заголовков: из заголовка, а если он занят —
+        с наименьшим свободным числовым суффиксом: spisok-pokupok,
+        spisok-pokupok-2, spisok-pokupok-3.
+
+        Одинаковые заголовки получают разные slug, slug из reserved
+        считаются занятыми. Занятые варианты читаются запросом по
+        диапазонам индекса slug: сама основа и всё от «stem-0» до
+        «stem-:», так как двоеточие следует за цифрами в таблице
+        символов. Суффиксом считаются только цифры сразу после основы,
+        поэтому slug вроде spisok-2024 или spisok-pokupok не сдвигают
+        нумерацию для основы spisok.
+        """
+        stems = cls.slug_stems(titles)
+        unique = list(dict.fromkeys(stems))
+        manager = cls._default_manager.db_manager(using)
+        taken = set(reserved)
+        for start in range(0, len(unique), SLUG_QUERY_CHUNK):
+            condition = models.Q()
+            for stem in unique[start:start + SLUG_QUERY_CHUNK]:
+                condition |= models.Q(slug=stem) | models.Q(
+                    slug__gte=f'{stem}-0', slug__lt=f'{stem}-:'
+                )
+            taken.update(
+                manager.filter(condition).exclude(pk=exclude_pk)
+                .values_list('slug', flat=True)
+            )
+        # Наименьший свободный суффикс для основы только растёт:
+        # занятые slug из taken не освобождаются.
+        suffixes = {}
+        slugs = []
+        for stem in stems:
+            slug = stem
+            if slug in taken:
+                suffix = suffixes.get(stem, 2)
+                while f'{stem}-{suffix}' in taken:
+                    suffix += 1
+                suffixes[stem] = suffix
+                slug = f'{stem}-{suffix}'
+            taken.add(slug)
+            slugs.append(slug)
+        return slugs
+
+
+class NoteRevision(models.Model):
+    """
+    Версия заметки после сохранения: полный текст (снимок) или дельта
+    к тексту предыдущей версии.
+    """
+    note = models.ForeignKey(
+        Note, on_delete=models.CASCADE, related_name='revisions'
+    )
+    number = models.PositiveIntegerField('Номер версии')
+    title = models.CharField('Заголовок', max_length=100)
+    created = models.DateTimeField('Сохранена', auto_now_add=True)
+    is_snapshot = models.BooleanField('Полный текст')
+    data = models.TextField('Текст или дельта')
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('note', 'number'), name='note_revision_number'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.note_id} v{self.number}'
+
+
+class UserPurge(models.Model):
+    """Пользователь, чьё удаление запланировано на фоновую очистку."""
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+    )
+    scheduled = models.DateTimeField(auto_now_add=True)
@@ -0,0 +1,121 @@
+"""
+Кеш заметок в памяти процесса для страниц заметки.
+
+Хранит id заметки по автору и slug и отрисованную страницу заметки
+вместе со временем изменения, для которого она отрисована. Записям не
+верят на слово: заметка по id ищется вместе со slug, а страница
+отдаётся, только если время изменения заметки в базе то же. Поэтому
+правка или удаление заметки, в том числе в другом процессе, сразу
+делает её записи недействительными. Записи живут не дольше
+NOTE_CACHE_TTL секунд, а при переполнении вытесняются давно не
+использованные.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+class LRUCache:
+    """Словарь не больше max_entries записей со сроком жизни ttl."""
+
+    def __init__(self, max_entries, ttl, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[1] <= self.clock():
+                del self.entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value):
+        if self.max_entries <= 0:
+            return
+        with self.lock:
+            self.entries[key] = (value, self.clock() + self.ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+        }
+
+
+class NoteCache:
+    """Id заметок по (id автора, slug) и страницы заметок по id."""
+
+    def __init__(self):
+        self.pks = LRUCache(
+            settings.NOTE_CACHE_MAX_ENTRIES, settings.NOTE_CACHE_TTL
+        )
+        self.pages = LRUCache(
+            settings.NOTE_PAGE_CACHE_MAX_ENTRIES, settings.NOTE_CACHE_TTL
+        )
+
+    def get_pk(self, author_id, slug):
+        return self.pks.get((author_id, slug))
+
+    def set_pk(self, author_id, slug, pk):
+        self.pks.set((author_id, slug), pk)
+
+    def delete_pk(self, author_id, slug):
+        self.pks.delete((author_id, slug))
+
+    def get_page(self, pk):
+        """Время изменения заметки и её страница или None."""
+        return self.pages.get(pk)
+
+    def set_page(self, note, content):
+        # Страницы длинных заметок вытеснили бы из кеша все остальные.
+        if len(content) <= settings.NOTE_PAGE_CACHE_MAX_SIZE:
+            self.pages.set(note.pk, (note.updated, content))
+
+    def clear(self):
+        self.pks.clear()
+        self.pages.clear()
+        self.pks.reset_stats()
+        self.pages.reset_stats()
+
+    def stats(self):
+        return {'pks': self.pks.stats(), 'pages': self.pages.stats()}
+
+
+note_cache = NoteCache()
@@ -0,0 +1,110 @@
+from django.core.paginator import InvalidPage
+from django.http import Http404
+
+AFTER = 'after'
+BEFORE = 'before'
+
+
+class KeysetPage:
+    """Страница, полученная по ключу соседней записи."""
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f'<KeysetPage of {len(self.object_list)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_key(self):
+        return self.object_list[-1].pk if self._has_next else None
+
+    @property
+    def previous_key(self):
+        return self.object_list[0].pk if self._has_previous else None
+
+
+class KeysetPaginator:
+    """
+    Постраничный вывод по первичному ключу (keyset pagination).
+
+    Страница начинается сразу за id последней записи предыдущей
+    страницы (параметр after) или заканчивается перед id первой
+    записи следующей (before). Вместе с фильтром по автору это один
+    проход по индексу (author_id, id), как бы далеко ни была страница.
+    """
+
+    def __init__(self, object_list, per_page, orphans=0,
+                 allow_empty_first_page=True):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+
+    def page(self, after=None, before=None):
+        """Возвращает страницу после after или перед before."""
+        if before is not None:
+            rows = list(
+                self.object_list.filter(pk__lt=self._key(before))
+                .order_by('-pk')[:self.per_page + 1]
+            )
+            has_more = len(rows) > self.per_page
+            return self._page(
+                rows[:self.per_page][::-1],
+                has_next=True,
+                has_previous=has_more
+            )
+        queryset = self.object_list.order_by('pk')
+        if after is not None:
+            queryset = queryset.filter(pk__gt=self._key(after))
+        rows = list(queryset[:self.per_page + 1])
+        return self._page(
+            rows[:self.per_page],
+            has_next=len(rows) > self.per_page,
+            has_previous=after is not None
+        )
+
+    def _page(self, rows, has_next, has_previous):
+        return KeysetPage(
+            rows, self, has_next and bool(rows), has_previous and bool(rows)
+        )
+
+    def _key(self, value):
+        try:
+            return int(value)
+        except (TypeError, ValueError) as error:
+            raise InvalidPage('Некорректный ключ страницы.') from error
+
+
+class KeysetPaginationMixin:
+    """Подменяет постраничный вывод ListView на вывод по ключу."""
+
+    paginator_class = KeysetPaginator
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = self.get_paginator(queryset, page_size)
+        try:
+            page = paginator.page(
+                self.request.GET.get(AFTER), self.request.GET.get(BEFORE)
+            )
+        except InvalidPage as error:
+            raise Http404(str(error))
+        return paginator, page, page.object_list, page.has_other_pages()
@@ -0,0 +1,95 @@
+"""
+Фоновое удаление пользователей с большим числом заметок.
+
+Удаление пользователя через Django загружает в память все его
+заметки. Здесь пользователь сначала отключается и ставится в очередь
+UserPurge, а заметки затем удаляются пачками по PURGE_BATCH_SIZE
+строк, по транзакции на пачку. Очистку после фиксации транзакции
+запускает фоновый поток; если процесс перезапустился, оставшееся
+дочищает manage.py purge_deleted.
+"""
+import logging
+import queue
+import threading
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections, transaction
+
+from .models import Note, NoteRevision, UserPurge
+
+logger = logging.getLogger(__name__)
+
+
+def raw_delete(queryset):
+    # Удаление без сбора объектов: Django выбрал бы заметки пачки
+    # ещё раз, чтобы найти их версии.
+    return queryset._raw_delete(queryset.db)
+
+
+def delete_notes(queryset, batch_size):
+    """
+    Удаляет заметки queryset пачками, каждую в своей транзакции.
+
+    У заметок нет сигналов, поэтому пачка удаляется без сбора
+    объектов: DELETE версий и DELETE заметок. Возвращает число
+    удалённых.
+    """
+    deleted = 0
+    while True:
+        with transaction.atomic():
+            pks = list(queryset.values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                return deleted
+            raw_delete(NoteRevision.objects.filter(note_id__in=pks))
+            deleted += raw_delete(Note.objects.filter(pk__in=pks))
+
+
+def purge_users(batch_size):
+    """Удаляет пользователей из UserPurge вместе с заметками."""
+    purged = 0
+    for user_id in UserPurge.objects.values_list('user_id', flat=True):
+        delete_notes(Note.objects.filter(author_id=user_id), batch_size)
+        get_user_model().objects.filter(pk=user_id).delete()
+        purged += 1
+    return purged
+
+
+class PurgeWorker:
+    """Поток, который запускает очистку после удаления в админке."""
+
+    def __init__(self):
+        self.wakeups = queue.SimpleQueue()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def schedule(self):
+        """Запускает очистку после фиксации транзакции."""
+        transaction.on_commit(self.wake)
+
+    def wake(self):
+        self.wakeups.put(None)
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(
+                    target=self.work, name='purge', daemon=True
+                )
+                self.thread.start()
+
+    def work(self):
+        while True:
+            self.wakeups.get()
+            # Несколько удалений подряд разбираются одной очисткой.
+            while not self.wakeups.empty():
+                self.wakeups.get_nowait()
+            try:
+                purge_users(settings.PURGE_BATCH_SIZE)
+            except Exception:
+                # Поставленных в очередь пользователей дочистит
+                # следующий запуск.
+                logger.exception('Не удалось завершить очистку')
+            finally:
+                close_old_connections()
+
+
+purge_worker = PurgeWorker()
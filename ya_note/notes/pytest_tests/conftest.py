@@ -3,6 +3,15 @@ import pytest
 from django.test.client import Client
 
 from notes.models import Note
+from notes.note_cache import note_cache
+from notes.slug_filter import slug_filter
+
+
+@pytest.fixture(autouse=True)
+def clear_note_cache():
+    """Кеш заметок и фильтр slug живут в процессе и пережили бы откат базы."""
+    note_cache.clear()
+    slug_filter.clear()
 
 
 @pytest.fixture
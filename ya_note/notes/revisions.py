@@ -0,0 +1,125 @@
+"""
+История версий заметок с дельта-сжатием.
+
+Каждая NOTE_REVISION_SNAPSHOT_INTERVAL-я версия хранит полный текст,
+остальные — дельту к предыдущей версии по строкам. Дельта — это JSON
+со списком операций: пара [начало, конец] копирует строки прежнего
+текста, строка вставляется как есть. Чтобы восстановить версию,
+достаточно последнего снимка до неё и дельт после него.
+"""
+import json
+from difflib import SequenceMatcher, unified_diff
+
+from django.conf import settings
+from django.db.models import Subquery
+
+from .fields import decompress_text
+from .models import Note, NoteRevision
+
+
+def make_delta(old, new):
+    """Дельта, превращающая текст old в new."""
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    operations = []
+    matcher = SequenceMatcher(None, old_lines, new_lines)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            operations.append([i1, i2])
+        elif j1 < j2:
+            operations.append(''.join(new_lines[j1:j2]))
+    return json.dumps(operations, ensure_ascii=False, separators=(',', ':'))
+
+
+def apply_delta(old, delta):
+    lines = old.splitlines(keepends=True)
+    return ''.join(
+        operation if isinstance(operation, str)
+        else ''.join(lines[operation[0]:operation[1]])
+        for operation in json.loads(delta)
+    )
+
+
+def is_snapshot_number(number):
+    return (number - 1) % settings.NOTE_REVISION_SNAPSHOT_INTERVAL == 0
+
+
+def revision_text(note_id, number):
+    """
+    Текст версии number: снимок и дельты после него одним запросом.
+
+    Берётся последний снимок не новее версии, а не снимок в пределах
+    интервала: интервал мог измениться с тех пор, как история писалась.
+    """
+    revisions = NoteRevision.objects.filter(
+        note_id=note_id, number__lte=number
+    )
+    snapshot = revisions.filter(is_snapshot=True).order_by(
+        '-number'
+    ).values('number')[:1]
+    chain = list(revisions.filter(
+        number__gte=Subquery(snapshot)
+    ).order_by('number').values_list('number', 'data'))
+    if not chain or chain[-1][0] != number:
+        raise NoteRevision.DoesNotExist
+    text = chain[0][1]
+    for _, delta in chain[1:]:
+        text = apply_delta(text, delta)
+    return text
+
+
+def start_history(note_id):
+    """Первая версия из сохранённого в базе текста для заметки без истории."""
+    if NoteRevision.objects.filter(note_id=note_id).exists():
+        return
+    title, text = Note.objects.values_list('title', 'text').get(pk=note_id)
+    NoteRevision.objects.create(
+        note_id=note_id,
+        number=1,
+        title=title,
+        is_snapshot=True,
+        data=decompress_text(text)
+    )
+
+
+def record_revision(note):
+    """
+    Сохраняет версию заметки, если заголовок или текст изменились.
+
+    Дельта не длиннее текста, иначе версия хранится снимком.
+    """
+    last = NoteRevision.objects.filter(note=note).order_by(
+        '-number'
+    ).only('number', 'title').first()
+    if last is None:
+        number, data, is_snapshot = 1, note.text, True
+    else:
+        old = revision_text(note.pk, last.number)
+        if last.title == note.title and old == note.text:
+            return None
+        number = last.number + 1
+        data, is_snapshot = note.text, True
+        if not is_snapshot_number(number):
+            delta = make_delta(old, note.text)
+            if len(delta) < len(note.text):
+                data, is_snapshot = delta, False
+    return NoteRevision.objects.create(
+        note=note,
+        number=number,
+        title=note.title,
+        is_snapshot=is_snapshot,
+        data=data
+    )
+
+
+def revision_diff(note_id, number):
+    """Текст версии number и строки unified diff с предыдущей версией."""
+    new = revision_text(note_id, number)
+    old = revision_text(note_id, number - 1) if number > 1 else ''
+    return new, list(unified_diff(
+        old.splitlines(),
+        new.splitlines(),
+        f'v{number - 1}',
+        f'v{number}',
+        lineterm=''
+    ))
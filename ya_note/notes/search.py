@@ -0,0 +1,73 @@
+"""Полнотекстовый поиск по заметкам пользователя через индекс SQLite FTS5."""
+import re
+
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .fts import FTS_TABLE
+from .models import Note
+
+# Совпадение в заголовке весит больше, чем в тексте; author_id
+# служит только фильтром и в ранжировании не участвует.
+RANK_SQL = f'bm25({FTS_TABLE}, 10.0, 1.0, 0.0)'
+# Границы совпадений в выдаче FTS5. Управляющие символы не встречаются
+# в заметках, поэтому текст можно экранировать целиком, а границы
+# заменить на теги уже после этого.
+MATCH_START = '\x02'
+MATCH_END = '\x03'
+HIGHLIGHT_SQL = (
+    f"highlight({FTS_TABLE}, 0, '{MATCH_START}', '{MATCH_END}')"
+)
+SNIPPET_WORDS = 24
+SNIPPET_SQL = (
+    f"snippet({FTS_TABLE}, 1, '{MATCH_START}', '{MATCH_END}', '…', "
+    f'{SNIPPET_WORDS})'
+)
+
+
+def build_match_query(author_id, text):
+    """
+    Превращает пользовательский ввод в запрос FTS5 по заметкам автора.
+
+    Каждое слово берётся в кавычки, поэтому операторы и спецсимволы
+    FTS5 во вводе не ломают запрос; слова ищутся в заголовке и тексте
+    и объединяются через AND.
+    """
+    words = ' '.join(f'"{word}"' for word in re.findall(r'\w+', text))
+    if not words:
+        return ''
+    return f'author_id : "{author_id}" AND {{title text}} : ({words})'
+
+
+def search_notes(author, text):
+    """Заметки автора, подходящие под запрос, от самых релевантных."""
+    match = build_match_query(author.pk, text)
+    if not match:
+        return Note.objects.none()
+    return Note.objects.filter(author=author).only(
+        'id', 'slug', 'title'
+    ).extra(
+        select={
+            'rank': RANK_SQL,
+            'title_highlight': HIGHLIGHT_SQL,
+            'snippet': SNIPPET_SQL,
+        },
+        tables=[FTS_TABLE],
+        # Унарный плюс не даёт планировщику перебирать заметки автора
+        # с поиском по индексу для каждой: без него так строится COUNT.
+        where=[
+            f'notes_note.id = +{FTS_TABLE}.rowid',
+            f'{FTS_TABLE} MATCH %s',
+        ],
+        params=[match],
+        order_by=['rank', '-id'],
+    )
+
+
+def mark_matches(value):
+    """Экранирует фрагмент из FTS5 и выделяет совпадения тегом <mark>."""
+    return mark_safe(
+        escape(value)
+        .replace(MATCH_START, '<mark>')
+        .replace(MATCH_END, '</mark>')
+    )
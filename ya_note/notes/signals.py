@@ -0,0 +1,17 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .fts import index_notes
+from .models import Note
+from .slug_filter import slug_filter
+
+# Поля заметки, которые хранит индекс поиска.
+INDEXED_FIELDS = {'title', 'text', 'author', 'author_id'}
+
+
+@receiver(post_save, sender=Note)
+def note_saved(sender, instance, created, using, update_fields=None,
+               **kwargs):
+    slug_filter.add(instance.slug)
+    if update_fields is None or INDEXED_FIELDS & set(update_fields):
+        index_notes([instance], using, created)
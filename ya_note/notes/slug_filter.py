@@ -0,0 +1,185 @@
+"""
+Фильтр Блума занятых slug для быстрой проверки, свободен ли slug.
+
+Фильтр строится из базы при первой проверке после запуска процесса
+и пересобирается раз в NOTE_SLUG_FILTER_REBUILD_INTERVAL секунд, а
+slug сохранённых в этом процессе заметок добавляются в него сразу.
+Пересборка идёт в фоновом потоке, и до её конца отвечает прежний
+фильтр: ждёт сборки только самая первая проверка.
+Промахов у фильтра нет: если slug в нём не найден, он свободен, и
+база не нужна. Найденный slug может оказаться ложным срабатыванием,
+поэтому его занятость проверяется запросом. Ложные срабатывания
+случаются не чаще NOTE_SLUG_FILTER_ERROR_RATE, пока в фильтре не
+больше slug, чем его ёмкость. Slug из других процессов фильтр видит
+только после пересборки, так что ответ «свободен» — подсказка, а
+окончательно slug проверяет форма заметки.
+"""
+import hashlib
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+
+from .models import Note
+
+# Сколько slug читать из базы за раз при сборке фильтра.
+LOAD_CHUNK_SIZE = 10000
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """
+    Множество строк с ложными срабатываниями, но без промахов.
+
+    Размер и число хешей подобраны так, чтобы после capacity строк
+    доля ложных срабатываний не превышала error_rate. Позиции битов
+    считаются двойным хешированием от одного дайджеста BLAKE2b.
+    """
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, math.ceil(
+            -capacity * math.log(error_rate) / math.log(2) ** 2
+        ))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        step = int.from_bytes(digest[8:], 'little') | 1
+        return [
+            (first + index * step) % self.size
+            for index in range(self.hashes)
+        ]
+
+    def add(self, item):
+        for position in self.positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self.positions(item)
+        )
+
+
+class SlugFilter:
+    """Фильтр Блума slug всех заметок с пересборкой из базы."""
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.filter = None
+        self.built = None
+        self.pending = None
+        self.thread = None
+        # lock защищает биты фильтра, build_lock — саму пересборку.
+        self.lock = threading.Lock()
+        self.build_lock = threading.Lock()
+
+    def is_stale(self):
+        return (
+            self.filter is None
+            or self.filter.count > self.filter.capacity
+            or self.clock() - self.built
+            >= settings.NOTE_SLUG_FILTER_REBUILD_INTERVAL
+        )
+
+    def current(self):
+        """
+        Фильтр для проверки. Первый фильтр строится сразу, устаревший
+        пересобирается в фоне, а пока отвечает он сам.
+        """
+        if self.filter is None:
+            with self.build_lock:
+                if self.filter is None:
+                    self.rebuild()
+        elif self.is_stale():
+            self.start_rebuild()
+        return self.filter
+
+    def start_rebuild(self):
+        with self.lock:
+            if self.thread is not None and self.thread.is_alive():
+                return
+            self.thread = threading.Thread(
+                target=self.rebuild_in_background, name='slug-filter',
+                daemon=True
+            )
+            self.thread.start()
+
+    def rebuild_in_background(self):
+        try:
+            with self.build_lock:
+                if self.is_stale():
+                    self.rebuild()
+        except Exception:
+            logger.exception('Не удалось пересобрать фильтр slug')
+            # Прежний фильтр остаётся, а новая попытка будет не раньше
+            # чем через интервал пересборки, а не на каждую проверку.
+            with self.lock:
+                if self.filter is not None:
+                    self.built = self.clock()
+        finally:
+            connection.close()
+
+    def rebuild(self):
+        """
+        Собирает фильтр заново из базы.
+
+        Slug, сохранённые во время чтения базы, попадают и в новый
+        фильтр, даже если чтение их не застало.
+        """
+        with self.lock:
+            self.pending = []
+        bloom = None
+        try:
+            bloom = self.load()
+        finally:
+            with self.lock:
+                if bloom is not None:
+                    for slug in self.pending:
+                        bloom.add(slug)
+                    self.filter = bloom
+                    self.built = self.clock()
+                self.pending = None
+
+    def load(self):
+        """Фильтр со slug всех заметок и запасом ёмкости вдвое."""
+        slugs = Note.objects.values_list('slug', flat=True)
+        bloom = BloomFilter(
+            max(settings.NOTE_SLUG_FILTER_CAPACITY, 2 * slugs.count()),
+            settings.NOTE_SLUG_FILTER_ERROR_RATE
+        )
+        for slug in slugs.iterator(chunk_size=LOAD_CHUNK_SIZE):
+            bloom.add(slug)
+        return bloom
+
+    def add(self, *slugs):
+        with self.lock:
+            for slug in slugs:
+                if self.filter is not None:
+                    self.filter.add(slug)
+                if self.pending is not None:
+                    self.pending.append(slug)
+
+    def is_taken(self, slug):
+        """Занят ли slug: база читается, только если фильтр его нашёл."""
+        if slug not in self.current():
+            return False
+        return Note.objects.filter(slug=slug).exists()
+
+    def clear(self):
+        with self.build_lock, self.lock:
+            self.filter = None
+            self.built = None
+
+
+slug_filter = SlugFilter()
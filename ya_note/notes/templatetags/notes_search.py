@@ -0,0 +1,11 @@
+from django import template
+
+from notes.search import mark_matches
+
+register = template.Library()
+
+
+@register.filter
+def marked(value):
+    """Фрагмент результата поиска с выделенными совпадениями."""
+    return mark_matches(value)
@@ -1,10 +1,14 @@
 from http import HTTPStatus
+from unittest import mock
 
+from django.db import connection
 from django.test import TestCase, Client
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 
 from notes.models import Note
+from notes.search import build_match_query
+from notes.views import NoteSearch, NotesList
 from notes.forms import NoteForm
 
 
@@ -63,3 +67,169 @@ class TestContent(TestCase):
                 self.assertIn('form', response.context)
                 form_obj = response.context['form']
                 self.assertIsInstance(form_obj, NoteForm)
+
+
+class TestNotesListPagination(TestCase):
+    PER_PAGE = 5
+    NOTES_COUNT = 12
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='MANY')
+        cls.other = User.objects.create(username='OTHER')
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+        for i in range(cls.NOTES_COUNT):
+            for author in (cls.author, cls.other):
+                Note.objects.create(
+                    title=f'Заметка {i}',
+                    text='Длинный текст',
+                    slug=f'{author.username}-{i}',
+                    author=author
+                )
+        cls.url = reverse('notes:list')
+
+    def setUp(self):
+        patcher = mock.patch.object(NotesList, 'paginate_by', self.PER_PAGE)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def walk(self, direction, key):
+        """Проходит все страницы списка в одном направлении."""
+        pages = []
+        while key is not None:
+            response = self.author_client.get(self.url, {direction: key})
+            page = response.context['page_obj']
+            pages.append([note.pk for note in page])
+            key = page.next_key if direction == 'after' else (
+                page.previous_key
+            )
+        return pages
+
+    def test_pages_cover_own_notes_once(self):
+        """Страницы по id по порядку покрывают все заметки автора."""
+        response = self.author_client.get(self.url)
+        first_page = response.context['page_obj']
+        self.assertFalse(first_page.has_previous())
+        pages = [[note.pk for note in first_page]]
+        pages += self.walk('after', first_page.next_key)
+        expected = list(
+            Note.objects.filter(author=self.author)
+            .order_by('id').values_list('id', flat=True)
+        )
+        self.assertEqual(sum(pages, []), expected)
+        self.assertEqual([len(page) for page in pages], [5, 5, 2])
+        last_key = pages[-1][0]
+        self.assertEqual(
+            sum(reversed(self.walk('before', last_key)), []),
+            expected[:-2]
+        )
+
+    def test_text_is_not_loaded(self):
+        """Список не читает текст заметок."""
+        response = self.author_client.get(self.url)
+        for note in response.context['object_list']:
+            self.assertIn('text', note.get_deferred_fields())
+
+    def test_invalid_key(self):
+        """Некорректный ключ страницы даёт 404."""
+        response = self.author_client.get(self.url, {'after': 'abc'})
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_page_query_uses_author_id_index(self):
+        """Страница читается по индексу (author_id, id) без сортировки."""
+        queryset = Note.objects.filter(
+            author=self.author, pk__gt=0
+        ).only('id', 'slug', 'title').order_by('pk')[:self.PER_PAGE + 1]
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' '.join(row[-1] for row in cursor.fetchall())
+        self.assertIn('note_author_id_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+
+class TestNoteSearch(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='SEEKER')
+        cls.other = User.objects.create(username='STRANGER')
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+        cls.url = reverse('notes:search')
+
+    def search(self, query):
+        response = self.author_client.get(self.url, {'q': query})
+        return list(response.context['object_list'])
+
+    def create(self, title, text, author=None):
+        return Note.objects.create(
+            title=title, text=text, author=author or self.author
+        )
+
+    def test_search_only_own_notes(self):
+        """Поиск находит только заметки текущего пользователя."""
+        own = self.create('Молоко', 'Купить молоко')
+        self.create('Молоко', 'Купить молоко', author=self.other)
+        self.assertEqual(self.search('молоко'), [own])
+
+    def test_title_matches_rank_first(self):
+        """Совпадение в заголовке выше совпадения в тексте."""
+        in_text = self.create('Покупки', 'Не забыть хлеб и молоко.')
+        in_title = self.create('Хлеб', 'Ржаной.')
+        self.assertEqual(self.search('хлеб'), [in_title, in_text])
+
+    def test_author_id_in_text_does_not_leak(self):
+        """Число, равное id автора, в чужом тексте не даёт совпадений."""
+        self.create('Заметка', f'Код {self.author.pk} слово', self.other)
+        self.assertEqual(self.search('слово'), [])
+
+    def test_snippet_is_highlighted_and_escaped(self):
+        """Совпадения выделены тегом mark, разметка заметки экранирована."""
+        self.create('<b>Список</b>', 'Купить <script>молоко</script>.')
+        response = self.author_client.get(self.url, {'q': 'молоко список'})
+        content = response.content.decode()
+        self.assertIn('&lt;b&gt;<mark>Список</mark>&lt;/b&gt;', content)
+        self.assertIn(
+            '&lt;script&gt;<mark>молоко</mark>&lt;/script&gt;', content
+        )
+        self.assertNotIn('<script>', content)
+
+    def test_index_follows_writes(self):
+        """Индекс поиска обновляется при изменении и удалении заметки."""
+        note = self.create('Кометы', 'Текст')
+        note.title = 'Астероиды'
+        note.save()
+        self.assertEqual(self.search('кометы'), [])
+        self.assertEqual(self.search('астероиды'), [note])
+        note.delete()
+        self.assertEqual(self.search('астероиды'), [])
+
+    def test_fts_syntax_is_ignored(self):
+        """Операторы FTS5 во вводе не ломают запрос."""
+        note = self.create('Заметка', 'Текст')
+        for query in ('"', 'текст OR', 'NEAR(текст', 'author_id:1', '*'):
+            with self.subTest(query=query):
+                response = self.author_client.get(self.url, {'q': query})
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(self.search('текст*'), [note])
+        self.assertEqual(build_match_query(1, '*'), '')
+
+    def test_search_is_paginated(self):
+        """Результаты выводятся страницами."""
+        Note.objects.bulk_create(
+            Note(
+                title=f'Заметка {i}',
+                text='Общий текст',
+                slug=f'page-{i}',
+                author=self.author
+            )
+            for i in range(7)
+        )
+        with mock.patch.object(NoteSearch, 'paginate_by', 5):
+            first = self.author_client.get(self.url, {'q': 'общий'})
+            second = self.author_client.get(
+                self.url, {'q': 'общий', 'page': 2}
+            )
+        self.assertEqual(len(first.context['object_list']), 5)
+        self.assertEqual(len(second.context['object_list']), 2)
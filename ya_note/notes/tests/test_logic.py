@@ -1,12 +1,43 @@
+import io
+import json
+import os
+import random
+import tempfile
+import threading
+import zipfile
 from http import HTTPStatus
+from unittest import mock
 from pytils.translit import slugify
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase, Client
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import (
+    Client, TestCase, TransactionTestCase, override_settings
+)
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 
 from notes.forms import WARNING
-from notes.models import Note
+from notes.fields import compress_text, decompress_text
+from notes.models import (
+    SLUG_SUFFIX_LENGTH, Note, NoteRevision, UserPurge, atomic_retry
+)
+from notes.note_cache import LRUCache, note_cache
+from notes.purge import delete_notes, purge_users
+from notes.revisions import (
+    apply_delta, make_delta, revision_text, start_history
+)
+from notes.search import search_notes
+from notes.slug_filter import BloomFilter, SlugFilter, slug_filter
+from notes.transfer import (
+    NoteImportError, export_rows, import_notes, zip_chunks
+)
+from notes.translit import SEPARATOR, slugify_many
+from notes.translit import slugify as fast_slugify
 
 
 User = get_user_model()
@@ -140,3 +171,1138 @@ class TestNoteEditDelete(TestCase):
         self.assertEqual(self.note.slug, original_slug)
         self.assertEqual(self.note.title, original_title)
         self.assertEqual(self.note.text, original_text)
+
+
+@override_settings(RATE_LIMITS={
+    'note_create': (2, 60),
+    'note_update': (1, 60),
+    'note_delete': (1, 60),
+})
+class TestNoteRateLimit(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='RATE')
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+        cls.reader = User.objects.create(username='LIMIT')
+        cls.reader_client = Client()
+        cls.reader_client.force_login(cls.reader)
+        cls.note = Note.objects.create(
+            title='Заголовок',
+            text='Текст',
+            slug='slug',
+            author=cls.author
+        )
+        cls.edit_url = reverse('notes:edit', args=(cls.note.slug,))
+        cls.delete_url = reverse('notes:delete', args=(cls.note.slug,))
+
+    def setUp(self):
+        # Ведра лежат в кеше, который не откатывается вместе с базой.
+        cache.clear()
+
+    def test_create_limit(self):
+        """Сверх лимита заметки не создаются, ответ 429 с Retry-After."""
+        url = reverse('notes:add')
+        for slug in ('first', 'second'):
+            response = self.author_client.post(
+                url, data={'title': slug, 'text': 'Текст', 'slug': slug}
+            )
+            self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        response = self.author_client.post(
+            url, data={'title': 'third', 'text': 'Текст', 'slug': 'third'}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertEqual(response['Retry-After'], '30')
+        self.assertFalse(Note.objects.filter(slug='third').exists())
+
+    def test_limit_is_per_user(self):
+        """У каждого пользователя своё ведро."""
+        form_data = {'title': 'New', 'text': 'Текст'}
+        self.reader_client.post(self.edit_url, data=form_data)
+        response = self.author_client.post(self.edit_url, data=form_data)
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+    def test_update_and_delete_limits(self):
+        """Лимиты на изменение и удаление считаются отдельно."""
+        form_data = {'title': 'New', 'text': 'Текст', 'slug': 'slug'}
+        response = self.author_client.post(self.edit_url, data=form_data)
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        response = self.author_client.post(self.edit_url, data=form_data)
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        response = self.author_client.get(self.edit_url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        response = self.author_client.post(self.delete_url)
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        response = self.author_client.post(self.delete_url)
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+
+
+class TestUserPurge(TestCase):
+    NOTES_COUNT = 25
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(username='ADMIN')
+        cls.admin_client = Client()
+        cls.admin_client.force_login(cls.admin)
+        cls.author = User.objects.create(username='PURGE')
+        cls.reader = User.objects.create(username='KEEP')
+        Note.objects.bulk_create(
+            Note(
+                title=f'Заметка {i}',
+                text='Текст',
+                slug=f'purge-{i}',
+                author=cls.author
+            )
+            for i in range(cls.NOTES_COUNT)
+        )
+        Note.objects.create(
+            title='Чужая', text='Текст', slug='keep', author=cls.reader
+        )
+
+    def test_admin_action_schedules_purge(self):
+        """Действие админки отключает пользователя, не удаляя заметки."""
+        url = reverse('admin:auth_user_changelist')
+        response = self.admin_client.post(url, {
+            'action': 'schedule_purge',
+            '_selected_action': [self.author.pk, self.admin.pk],
+        })
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        self.author.refresh_from_db()
+        self.admin.refresh_from_db()
+        self.assertFalse(self.author.is_active)
+        self.assertTrue(self.admin.is_active)
+        self.assertEqual(
+            list(UserPurge.objects.values_list('user_id', flat=True)),
+            [self.author.pk]
+        )
+        self.assertEqual(Note.objects.count(), self.NOTES_COUNT + 1)
+        actions = self.admin_client.get(url).context['action_form']
+        self.assertNotIn(
+            'delete_selected', dict(actions.fields['action'].choices)
+        )
+
+    def test_admin_delete_page_schedules_purge(self):
+        """
+        Удаление со страницы пользователя не перечисляет его заметки
+        и только ставит пользователя в очередь на удаление.
+        """
+        url = reverse('admin:auth_user_delete', args=(self.author.pk,))
+        response = self.admin_client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertNotContains(response, 'Заметка 0')
+        response = self.admin_client.post(url, {'post': 'yes'})
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        self.author.refresh_from_db()
+        self.assertFalse(self.author.is_active)
+        self.assertTrue(UserPurge.objects.filter(user=self.author).exists())
+        self.assertEqual(Note.objects.count(), self.NOTES_COUNT + 1)
+
+    def test_notes_deleted_in_batches(self):
+        """Заметки удаляются пачками: выборка id и DELETE с версиями."""
+        batch_size = 10
+        batches = -(-self.NOTES_COUNT // batch_size)
+        # На пачку: savepoint, выборка id, DELETE версий, DELETE
+        # заметок и release; в конце пустая выборка в своей транзакции.
+        with self.assertNumQueries(batches * 5 + 3):
+            deleted = delete_notes(
+                Note.objects.filter(author=self.author), batch_size
+            )
+        self.assertEqual(deleted, self.NOTES_COUNT)
+
+    def test_purge_users(self):
+        """Очистка удаляет пользователя с заметками, чужие не трогает."""
+        UserPurge.objects.create(user=self.author)
+        self.assertEqual(purge_users(batch_size=10), 1)
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
+        self.assertEqual(
+            list(Note.objects.values_list('slug', flat=True)), ['keep']
+        )
+        self.assertFalse(UserPurge.objects.exists())
+
+    def test_purge_deleted_command(self):
+        """Команда purge_deleted дочищает очередь."""
+        UserPurge.objects.create(user=self.author)
+        call_command('purge_deleted', batch_size=7, verbosity=0)
+        self.assertEqual(Note.objects.count(), 1)
+
+
+class TestSlugAllocation(TestCase):
+    TITLE = 'Список покупок'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='FIRST')
+        cls.reader = User.objects.create(username='SECOND')
+        cls.reader_client = Client()
+        cls.reader_client.force_login(cls.reader)
+
+    def test_same_title_gets_suffix(self):
+        """Заметка с уже занятым заголовком получает slug с суффиксом."""
+        Note.objects.create(
+            title=self.TITLE, text='Текст', author=self.author
+        )
+        response = self.reader_client.post(
+            reverse('notes:add'), data={'title': self.TITLE, 'text': 'Текст'}
+        )
+        self.assertRedirects(response, reverse('notes:success'))
+        self.assertEqual(
+            Note.objects.get(author=self.reader).slug,
+            f'{slugify(self.TITLE)}-2'
+        )
+
+    def test_lowest_free_suffix(self):
+        """Берётся наименьший свободный суффикс, прочие slug не мешают."""
+        stem = slugify(self.TITLE)
+        for slug in (stem, f'{stem}-3', f'{stem}-old', f'{stem}s'):
+            Note.objects.create(
+                title=self.TITLE, text='Текст', slug=slug, author=self.author
+            )
+        note = Note(title=self.TITLE, text='Текст', author=self.reader)
+        with self.assertNumQueries(1):
+            self.assertEqual(note.free_slug('default'), f'{stem}-2')
+        self.assertEqual(
+            Note.free_slugs([self.TITLE] * 3),
+            [f'{stem}-{suffix}' for suffix in (2, 4, 5)]
+        )
+
+    def test_numeric_slug_is_not_a_suffix(self):
+        """Slug пользователя с числом на конце не сдвигает нумерацию."""
+        Note.objects.create(
+            title='Список', text='Текст', slug='spisok-2024',
+            author=self.author
+        )
+        Note.objects.create(title='Список', text='Текст', author=self.author)
+        self.assertEqual(Note.free_slugs(['Список']), ['spisok-2'])
+
+    def test_suffix_for_truncated_stem(self):
+        """Суффикс считается от обрезанной основы, а не от её начала."""
+        max_length = Note._meta.get_field('slug').max_length
+        title = 'а' * max_length
+        stem = Note.slug_stems([title])[0]
+        self.assertEqual(len(stem), max_length - SLUG_SUFFIX_LENGTH)
+        for slug in (stem, f'{stem[:-1]}-2', f'{stem}-2x'):
+            Note.objects.create(
+                title=title, text='Текст', slug=slug, author=self.author
+            )
+        note = Note.objects.create(
+            title=title, text='Текст', author=self.reader
+        )
+        self.assertEqual(note.slug, f'{stem}-2')
+        self.assertLessEqual(len(note.slug), max_length)
+
+    def test_stem_is_reused_when_free(self):
+        """Свободный slug из заголовка берётся без суффикса."""
+        stem = slugify(self.TITLE)
+        Note.objects.create(
+            title=self.TITLE,
+            text='Текст',
+            slug=f'{stem}-2',
+            author=self.author
+        )
+        note = Note.objects.create(
+            title=self.TITLE, text='Текст', author=self.reader
+        )
+        self.assertEqual(note.slug, stem)
+
+    def test_edit_keeps_own_slug(self):
+        """При правке с пустым slug заметка не конфликтует сама с собой."""
+        note = Note.objects.create(
+            title=self.TITLE, text='Текст', author=self.reader
+        )
+        self.reader_client.post(
+            reverse('notes:edit', args=(note.slug,)),
+            data={'title': self.TITLE, 'text': 'Новый текст'}
+        )
+        note.refresh_from_db()
+        self.assertEqual(note.slug, slugify(self.TITLE))
+
+    def test_title_without_letters(self):
+        """Заголовок без букв и цифр даёт slug по умолчанию."""
+        slugs = [
+            Note.objects.create(
+                title=title, text='Текст', author=self.author
+            ).slug
+            for title in ('!!!', '???')
+        ]
+        self.assertEqual(slugs, ['note', 'note-2'])
+
+
+class FileDatabaseRouter:
+    """Направляет все запросы в базу FileDatabaseTestCase."""
+
+    def __init__(self, alias):
+        self.alias = alias
+
+    def db_for_read(self, model, **hints):
+        return self.alias
+
+    db_for_write = db_for_read
+
+
+class FileDatabaseTestCase(TransactionTestCase):
+    """
+    Тесты одновременной записи из нескольких потоков.
+
+    Тестовая база SQLite живёт в памяти, поэтому для настоящей
+    конкуренции за запись заводится отдельная база в файле.
+    """
+    ALIAS = 'slug_concurrency'
+    THREADS = 8
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        connections.databases[self.ALIAS] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(self.directory.name, 'notes.sqlite3'),
+            'OPTIONS': {'timeout': 20},
+        }
+        call_command('migrate', database=self.ALIAS, verbosity=0)
+        self.author = User.objects.db_manager(self.ALIAS).create(
+            username='RACE'
+        )
+
+    def tearDown(self):
+        connections[self.ALIAS].close()
+        del connections[self.ALIAS]
+        del connections.databases[self.ALIAS]
+        self.directory.cleanup()
+
+    def run_threads(self, target, *args):
+        """Запускает target в THREADS потоках разом, возвращает ошибки."""
+        barrier = threading.Barrier(self.THREADS)
+        errors = []
+
+        def run(number):
+            try:
+                barrier.wait()
+                target(number, *args)
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connections[self.ALIAS].close()
+
+        threads = [
+            threading.Thread(target=run, args=(number,))
+            for number in range(self.THREADS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return errors
+
+
+class TestSlugConcurrency(FileDatabaseTestCase):
+    """Параллельное создание заметок с одинаковым заголовком."""
+
+    def create_note(self, number):
+        atomic_retry(
+            Note(
+                title='Список покупок', text='Текст', author=self.author
+            ).save,
+            self.ALIAS
+        )
+
+    def test_concurrent_notes_get_distinct_slugs(self):
+        """Одновременные заметки получают разные slug без ошибок."""
+        self.assertEqual(self.run_threads(self.create_note), [])
+        stem = slugify('Список покупок')
+        self.assertEqual(
+            set(Note.objects.using(self.ALIAS).values_list('slug', flat=True)),
+            {stem} | {f'{stem}-{i}' for i in range(2, self.THREADS + 1)}
+        )
+
+
+class TestNoteFormConcurrency(FileDatabaseTestCase):
+    """Одновременные запросы к формам заметок не заканчиваются ошибкой."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.router = override_settings(
+            DATABASE_ROUTERS=[FileDatabaseRouter(self.ALIAS)]
+        )
+        self.router.enable()
+
+    def tearDown(self):
+        self.router.disable()
+        super().tearDown()
+
+    def post(self, url, data, statuses):
+        client = Client(raise_request_exception=False)
+        client.force_login(self.author)
+        statuses.append(client.post(url, data).status_code)
+
+    def test_concurrent_creation(self):
+        """Одинаковые заголовки через форму получают разные slug."""
+        statuses = []
+        errors = self.run_threads(
+            lambda number: self.post(
+                reverse('notes:add'),
+                {'title': 'Список покупок', 'text': f'Текст {number}'},
+                statuses
+            )
+        )
+        self.assertEqual(errors, [])
+        self.assertEqual(statuses, [HTTPStatus.FOUND] * self.THREADS)
+        self.assertEqual(
+            Note.objects.using(self.ALIAS).values('slug').distinct().count(),
+            self.THREADS
+        )
+
+    def test_concurrent_edits(self):
+        """
+        Правки разных заметок через форму проходят без ошибок, хотя
+        каждая пишет ещё в индекс поиска и историю версий.
+        """
+        Note.objects.using(self.ALIAS).bulk_create(
+            Note(
+                title=f'Заметка {number}', text='Старый текст',
+                slug=f'note-{number}', author=self.author
+            )
+            for number in range(self.THREADS)
+        )
+        statuses = []
+        errors = self.run_threads(
+            lambda number: self.post(
+                reverse('notes:edit', args=(f'note-{number}',)),
+                {'title': f'Заметка {number}', 'text': 'Новый текст',
+                 'slug': f'note-{number}'},
+                statuses
+            )
+        )
+        self.assertEqual(errors, [])
+        self.assertEqual(statuses, [HTTPStatus.FOUND] * self.THREADS)
+        self.assertEqual(
+            len(search_notes(self.author, 'Новый').using(self.ALIAS)),
+            self.THREADS
+        )
+        self.assertEqual(
+            NoteRevision.objects.using(self.ALIAS).count(), 2 * self.THREADS
+        )
+
+
+class TestNoteImportExport(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='MOVER')
+        cls.other = User.objects.create(username='KEEPER')
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+        cls.import_url = reverse('notes:import')
+        cls.export_url = reverse('notes:export')
+        Note.objects.create(
+            title='Чужая', text='Текст', slug='taken', author=cls.other
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    @staticmethod
+    def jsonl(*records):
+        return ''.join(
+            json.dumps(record, ensure_ascii=False) + '\n'
+            for record in records
+        ).encode()
+
+    @staticmethod
+    def zip(files):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as archive:
+            for name, content in files.items():
+                archive.writestr(name, content)
+        return buffer.getvalue()
+
+    def upload(self, name, content):
+        return self.author_client.post(
+            self.import_url, {'file': SimpleUploadedFile(name, content)}
+        )
+
+    def test_import_jsonl(self):
+        """Заметки из JSONL сохраняются, занятый slug заменяется."""
+        response = self.upload('notes.jsonl', self.jsonl(
+            {'title': 'Первая', 'text': 'Один', 'slug': 'first'},
+            {'title': 'Вторая', 'text': 'Два', 'slug': 'taken'},
+            {'title': 'Вторая', 'text': 'Три'},
+        ))
+        self.assertRedirects(response, reverse('notes:list'))
+        self.assertEqual(
+            list(Note.objects.filter(author=self.author).order_by('id')
+                 .values_list('title', 'text', 'slug')),
+            [
+                ('Первая', 'Один', 'first'),
+                ('Вторая', 'Два', 'vtoraya'),
+                ('Вторая', 'Три', 'vtoraya-2'),
+            ]
+        )
+
+    def test_import_markdown_zip(self):
+        """Заголовок берётся из первой строки файла или из его имени."""
+        self.upload('notes.zip', self.zip({
+            'docs/plan.md': '# План\n\nСначала\nпотом',
+            'Идеи.md': 'Без заголовка',
+            'docs/': '',
+            'image.png': b'\x89PNG',
+        }))
+        self.assertEqual(
+            set(Note.objects.filter(author=self.author)
+                .values_list('title', 'text', 'slug')),
+            {('План', 'Сначала\nпотом', 'plan'),
+             ('Идеи', 'Без заголовка', 'idei')}
+        )
+
+    def test_import_error_cancels_everything(self):
+        """Ошибка в записи показывается в форме, заметки не сохраняются."""
+        for name, content in (
+            ('notes.jsonl', self.jsonl({'title': 'Первая', 'text': 'Один'})
+             + b'{"title": 1}\n'),
+            ('notes.zip', b'not a zip'),
+            ('notes.txt', b'text'),
+        ):
+            with self.subTest(name=name):
+                response = self.upload(name, content)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertTrue(response.context['form'].errors['file'])
+        self.assertFalse(Note.objects.filter(author=self.author).exists())
+
+    def test_import_checks_file_before_writing(self):
+        """Ошибка в поздней пачке не оставляет сохранённых заметок."""
+        content = self.jsonl(
+            {'title': 'Первая', 'text': 'Один'},
+            {'title': 'Вторая', 'text': 'Два'},
+            {'title': ' ', 'text': 'Без заголовка'},
+        )
+        with self.assertRaisesMessage(NoteImportError, 'Строка 3'):
+            import_notes(self.author, io.BytesIO(content), 'notes.jsonl', 1)
+        self.assertFalse(Note.objects.filter(author=self.author).exists())
+
+    def test_import_reports_saved_batches(self):
+        """Если пачку не сохранить, прежние пачки остаются и учтены."""
+        content = self.jsonl(
+            {'title': 'Первая', 'text': 'Один', 'slug': 'first'},
+            {'title': 'Вторая', 'text': 'Два'},
+        )
+
+        def taken_slugs(titles, **kwargs):
+            return ['taken'] * len(titles)
+
+        with mock.patch.object(
+            Note, 'free_slugs', taken_slugs
+        ), self.assertRaisesMessage(
+            NoteImportError, 'Строка 2: не удалось подобрать свободные slug, '
+            'сохранено заметок: 1.'
+        ):
+            import_notes(self.author, io.BytesIO(content), 'notes.jsonl', 1)
+        self.assertEqual(
+            list(Note.objects.filter(author=self.author)
+                 .values_list('slug', flat=True)),
+            ['first']
+        )
+
+    def test_import_queries_grow_with_batches(self):
+        """Число запросов зависит от числа пачек, а не заметок."""
+        content = self.jsonl(*(
+            {'title': f'Заметка {i}', 'text': 'Текст'} for i in range(40)
+        ))
+        with CaptureQueriesContext(connection) as context:
+            imported = import_notes(
+                self.author, io.BytesIO(content), 'notes.jsonl', 10
+            )
+        self.assertEqual(imported, 40)
+        # На пачку: поиск slug, точка сохранения, вставка, чтение id
+        # вставленных заметок, запись в индекс поиска и снятие точки.
+        self.assertLessEqual(len(context.captured_queries), 4 * 6 + 2)
+
+    def test_export_round_trip(self):
+        """Выгрузка содержит только свои заметки и загружается обратно."""
+        Note.objects.create(
+            title='Список', text='Молоко\n\nХлеб', author=self.author
+        )
+        response = self.author_client.get(self.export_url)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        content = b''.join(response.streaming_content)
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            self.assertEqual(archive.namelist(), ['spisok.md'])
+        import_notes(self.other, io.BytesIO(content), 'notes.zip')
+        self.assertEqual(
+            list(Note.objects.filter(author=self.other, title='Список')
+                 .values_list('text', 'slug')),
+            [('Молоко\n\nХлеб', 'spisok-2')]
+        )
+
+    def test_import_command(self):
+        """Команда import_notes загружает файл с диска."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'notes.jsonl')
+            with open(path, 'wb') as file:
+                file.write(self.jsonl({'title': 'Из файла', 'text': 'Т'}))
+            call_command(
+                'import_notes',
+                self.author.username,
+                path,
+                stdout=io.StringIO()
+            )
+        self.assertTrue(
+            Note.objects.filter(author=self.author, title='Из файла').exists()
+        )
+
+
+@override_settings(NOTE_REVISION_SNAPSHOT_INTERVAL=5)
+class TestNoteRevisions(TestCase):
+    LINES = [f'Строка {i}\n' for i in range(100)]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='WRITER')
+        cls.reader = User.objects.create(username='READER')
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+        cls.reader_client = Client()
+        cls.reader_client.force_login(cls.reader)
+
+    def setUp(self):
+        cache.clear()
+
+    def create(self, text):
+        self.author_client.post(
+            reverse('notes:add'),
+            data={'title': 'Дневник', 'text': text, 'slug': 'diary'}
+        )
+        return Note.objects.get(slug='diary')
+
+    def edit(self, text, title='Дневник'):
+        self.author_client.post(
+            reverse('notes:edit', args=('diary',)),
+            data={'title': title, 'text': text, 'slug': 'diary'}
+        )
+
+    def test_delta_round_trip(self):
+        """Дельта восстанавливает новый текст из старого."""
+        old = ''.join(self.LINES)
+        for new in (
+            old.replace('Строка 7\n', 'Строка семь\n'),
+            'Начало\n' + old + 'без перевода строки',
+            '',
+        ):
+            with self.subTest(new=new[:20]):
+                self.assertEqual(apply_delta(old, make_delta(old, new)), new)
+
+    def test_every_revision_is_restored(self):
+        """Любая версия восстанавливается одним запросом."""
+        lines = list(self.LINES)
+        # Форма обрезает пробельные символы по краям текста.
+        texts = [''.join(lines).strip()]
+        note = self.create(texts[0])
+        for i in range(12):
+            lines[i * 7] = f'Правка {i}\n'
+            texts.append(''.join(lines).strip())
+            self.edit(texts[-1])
+        self.assertEqual(
+            list(NoteRevision.objects.filter(
+                note=note, is_snapshot=True
+            ).order_by('number').values_list('number', flat=True)),
+            [1, 6, 11]
+        )
+        for number, text in enumerate(texts, 1):
+            with self.subTest(number=number):
+                with self.assertNumQueries(1):
+                    self.assertEqual(revision_text(note.pk, number), text)
+        delta = note.revisions.get(number=2).data
+        self.assertLess(len(delta), len(texts[1]) // 10)
+
+    def test_interval_change_keeps_history(self):
+        """Версии восстанавливаются после смены интервала снимков."""
+        texts = [f'Версия {i}\n' + ''.join(self.LINES) for i in range(6)]
+        texts = [text.strip() for text in texts]
+        with self.settings(NOTE_REVISION_SNAPSHOT_INTERVAL=10):
+            note = self.create(texts[0])
+            for text in texts[1:4]:
+                self.edit(text)
+        with self.settings(NOTE_REVISION_SNAPSHOT_INTERVAL=2):
+            for text in texts[4:]:
+                self.edit(text)
+            self.assertEqual(
+                list(note.revisions.filter(is_snapshot=True).values_list(
+                    'number', flat=True
+                )),
+                [1, 5]
+            )
+            for number, text in enumerate(texts, 1):
+                with self.subTest(number=number):
+                    with self.assertNumQueries(1):
+                        self.assertEqual(
+                            revision_text(note.pk, number), text
+                        )
+
+    def test_unchanged_save_adds_no_revision(self):
+        """Сохранение без изменений не создаёт версию."""
+        note = self.create('Текст')
+        self.edit('Текст')
+        self.edit('Текст', title='Новый заголовок')
+        self.assertEqual(
+            list(note.revisions.values_list('number', 'title')),
+            [(1, 'Дневник'), (2, 'Новый заголовок')]
+        )
+
+    def test_note_without_history_keeps_original(self):
+        """Правка заметки без истории сохраняет её прежний текст."""
+        note = Note.objects.create(
+            title='Дневник', text='Было', slug='diary', author=self.author
+        )
+        self.edit('Стало')
+        self.assertEqual(
+            [revision_text(note.pk, number) for number in (1, 2)],
+            ['Было', 'Стало']
+        )
+
+    def test_history_views(self):
+        """Автор видит историю и отличия версий, другие — 404."""
+        self.create('Первая\n')
+        self.edit('Вторая\n')
+        history = self.author_client.get(
+            reverse('notes:history', args=('diary',))
+        )
+        self.assertEqual(
+            [revision.number for revision in history.context['revisions']],
+            [2, 1]
+        )
+        response = self.author_client.get(
+            reverse('notes:revision', args=('diary', 2))
+        )
+        self.assertEqual(response.context['text'], 'Вторая')
+        self.assertIn('-Первая', response.context['diff'])
+        self.assertIn('+Вторая', response.context['diff'])
+        for client, url in (
+            (self.reader_client, reverse('notes:history', args=('diary',))),
+            (self.reader_client, reverse('notes:revision', args=('diary', 1))),
+            (self.author_client, reverse('notes:revision', args=('diary', 3))),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(
+                    client.get(url).status_code, HTTPStatus.NOT_FOUND
+                )
+
+
+@override_settings(NOTE_TEXT_COMPRESS_THRESHOLD=100)
+class TestCompressedText(TestCase):
+    LONG_TEXT = 'Длинный текст заметки про комету. ' * 20
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='ARCHIVIST')
+
+    def create(self, text, slug):
+        return Note.objects.create(
+            title='Заметка', text=text, slug=slug, author=self.author
+        )
+
+    def stored_type(self, note):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT typeof(text) FROM notes_note WHERE id = %s',
+                (note.pk,)
+            )
+            return cursor.fetchone()[0]
+
+    def test_long_text_is_compressed(self):
+        """Длинный текст хранится сжатым, короткий — как есть."""
+        long_note = self.create(self.LONG_TEXT, 'long')
+        short_note = self.create('Коротко', 'short')
+        self.assertEqual(self.stored_type(long_note), 'blob')
+        self.assertEqual(self.stored_type(short_note), 'text')
+        self.assertEqual(
+            Note.objects.get(pk=long_note.pk).text, self.LONG_TEXT
+        )
+        self.assertEqual(Note.objects.get(pk=short_note.pk).text, 'Коротко')
+
+    def test_text_is_decompressed_on_access(self):
+        """Текст распаковывается при первом обращении к атрибуту."""
+        note = Note.objects.get(pk=self.create(self.LONG_TEXT, 'long').pk)
+        self.assertIsInstance(note.__dict__['text'], bytes)
+        self.assertEqual(note.text, self.LONG_TEXT)
+        self.assertIsInstance(note.__dict__['text'], str)
+
+    def test_algorithms(self):
+        """Оба алгоритма восстанавливают исходный текст."""
+        for algorithm in ('zlib', 'lzma'):
+            with self.subTest(algorithm=algorithm):
+                with override_settings(NOTE_TEXT_COMPRESSION=algorithm):
+                    packed = compress_text(self.LONG_TEXT)
+                self.assertLess(len(packed), len(self.LONG_TEXT.encode()))
+                self.assertEqual(decompress_text(packed), self.LONG_TEXT)
+
+    def test_compressed_text_is_searchable(self):
+        """Поиск находит сжатую заметку и показывает читаемый фрагмент."""
+        note = self.create(self.LONG_TEXT, 'long')
+        self.assertEqual(self.stored_type(note), 'blob')
+        found = list(search_notes(self.author, 'комету'))
+        self.assertEqual(found, [note])
+        self.assertIn('\x02комету\x03', found[0].snippet)
+        note.text = 'Другой текст'
+        note.save()
+        self.assertEqual(list(search_notes(self.author, 'комету')), [])
+
+    def test_lookups_compare_plain_text(self):
+        """Условия по тексту не сжимают значение, с которым сравнивают."""
+        short_note = self.create('Коротко', 'short')
+        self.create(self.LONG_TEXT, 'long')
+        self.assertEqual(list(Note.objects.filter(text='Коротко')),
+                         [short_note])
+        self.assertEqual(list(Note.objects.filter(text__contains='орот')),
+                         [short_note])
+        with CaptureQueriesContext(connection) as context:
+            list(Note.objects.filter(text=self.LONG_TEXT))
+        self.assertIn('комету', context.captured_queries[0]['sql'])
+
+    def test_index_triggers_need_no_text_function(self):
+        """
+        Триггеры индекса обходятся без notes_text(): удаление в обход
+        модели убирает заметку из поиска, а bulk_create её добавляет.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT sql FROM sqlite_master WHERE type = 'trigger' "
+                "AND tbl_name = 'notes_note'"
+            )
+            triggers = [sql for sql, in cursor.fetchall()]
+        self.assertTrue(triggers)
+        self.assertFalse([sql for sql in triggers if 'notes_text' in sql])
+        notes = Note.objects.bulk_create(
+            Note(title='Заметка', text=text, slug=slug, author=self.author)
+            for text, slug in (
+                (self.LONG_TEXT, 'long'), ('Про комету коротко', 'short')
+            )
+        )
+        self.assertEqual(
+            set(search_notes(self.author, 'комету')), set(notes)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'DELETE FROM notes_note WHERE id = %s', (notes[0].pk,)
+            )
+        self.assertEqual(list(search_notes(self.author, 'комету')),
+                         [notes[1]])
+
+    def test_export_and_history_see_plain_text(self):
+        """Выгрузка и история получают распакованный текст."""
+        note = self.create(self.LONG_TEXT, 'long')
+        content = b''.join(zip_chunks(export_rows(self.author)))
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            self.assertIn(self.LONG_TEXT, archive.read('long.md').decode())
+        start_history(note.pk)
+        self.assertEqual(revision_text(note.pk, 1), self.LONG_TEXT)
+
+
+class TestLRUCache(TestCase):
+    def test_least_recently_used_is_evicted(self):
+        """При переполнении вытесняется давно не использованная запись."""
+        lru = LRUCache(max_entries=2, ttl=60)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+        self.assertEqual([lru.get(key) for key in 'abc'], [1, None, 3])
+        stats = lru.stats()
+        self.assertEqual(
+            (stats['entries'], stats['hits'], stats['misses'],
+             stats['evictions']),
+            (2, 3, 1, 1)
+        )
+
+    def test_entries_expire(self):
+        """Запись старше ttl считается промахом и удаляется."""
+        now = [0]
+        lru = LRUCache(max_entries=10, ttl=5, clock=lambda: now[0])
+        lru.set('a', 1)
+        now[0] = 4
+        self.assertEqual(lru.get('a'), 1)
+        now[0] = 5
+        self.assertIsNone(lru.get('a'))
+        self.assertEqual(lru.stats()['expirations'], 1)
+        self.assertEqual(lru.stats()['entries'], 0)
+
+
+class TestNoteCache(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='CACHED')
+        cls.reader = User.objects.create(username='CURIOUS')
+        cls.staff = User.objects.create(username='STAFF', is_staff=True)
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+        cls.reader_client = Client()
+        cls.reader_client.force_login(cls.reader)
+        cls.note = Note.objects.create(
+            title='Заметка', text='Старый текст', slug='cached',
+            author=cls.author
+        )
+
+    def setUp(self):
+        cache.clear()
+        note_cache.clear()
+
+    def detail(self, client, slug='cached'):
+        return client.get(reverse('notes:detail', args=(slug,)))
+
+    def test_detail_page_is_cached(self):
+        """Повторная страница заметки не отрисовывает шаблон заново."""
+        first = self.detail(self.author_client)
+        self.assertNotEqual(first.templates, [])
+        response = self.detail(self.author_client)
+        self.assertContains(response, 'Старый текст')
+        self.assertEqual(response.templates, [])
+        self.assertEqual(note_cache.stats()['pages']['hits'], 1)
+
+    def test_change_in_other_process_is_seen(self):
+        """
+        Правка в обход этого процесса меняет время изменения заметки,
+        и страница прежней версии больше не отдаётся.
+        """
+        self.detail(self.author_client)
+        Note.objects.filter(pk=self.note.pk).update(
+            text='Новый текст', updated=timezone.now()
+        )
+        self.assertContains(self.detail(self.author_client), 'Новый текст')
+
+    def test_edit_invalidates_cache(self):
+        """После правки со сменой slug отдаётся новая версия заметки."""
+        self.detail(self.author_client)
+        self.author_client.post(
+            reverse('notes:edit', args=('cached',)),
+            data={'title': 'Заметка', 'text': 'Новый текст', 'slug': 'moved'}
+        )
+        self.assertEqual(
+            self.detail(self.author_client).status_code, HTTPStatus.NOT_FOUND
+        )
+        self.assertContains(self.detail(self.author_client, 'moved'),
+                            'Новый текст')
+
+    def test_delete_invalidates_cache(self):
+        """После удаления страница заметки не отдаётся из кеша."""
+        self.detail(self.author_client)
+        self.author_client.post(reverse('notes:delete', args=('cached',)))
+        self.assertEqual(
+            self.detail(self.author_client).status_code, HTTPStatus.NOT_FOUND
+        )
+
+    def test_cache_is_per_author(self):
+        """Закешированная заметка автора недоступна другому пользователю."""
+        self.detail(self.author_client)
+        self.assertEqual(
+            self.detail(self.reader_client).status_code, HTTPStatus.NOT_FOUND
+        )
+
+    @override_settings(NOTE_PAGE_CACHE_MAX_SIZE=10)
+    def test_large_pages_are_not_cached(self):
+        """Страница больше допустимого размера в кеш не попадает."""
+        self.detail(self.author_client)
+        self.assertEqual(note_cache.stats()['pages']['entries'], 0)
+
+    def test_stats_for_staff_only(self):
+        """Статистику кеша видят только сотрудники."""
+        self.detail(self.author_client)
+        self.detail(self.author_client)
+        staff_client = Client()
+        staff_client.force_login(self.staff)
+        url = reverse('notes:cache-stats')
+        self.assertEqual(
+            self.author_client.get(url).status_code, HTTPStatus.FORBIDDEN
+        )
+        stats = staff_client.get(url).json()
+        self.assertEqual(
+            (stats['pks']['hits'], stats['pks']['misses']), (1, 1)
+        )
+        self.assertEqual(
+            (stats['pages']['hits'], stats['pages']['misses']), (1, 0)
+        )
+
+    def note_queries(self, client, name):
+        url = reverse(name, args=('cached',))
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return [
+            query['sql'] for query in context.captured_queries
+            if 'notes_note' in query['sql']
+        ]
+
+    def test_repeat_hit_queries(self):
+        """
+        Повторная страница заметки стоит одного запроса по id без
+        текста, правка и удаление — одного запроса по id.
+        """
+        for name in ('notes:detail', 'notes:edit', 'notes:delete'):
+            with self.subTest(name=name):
+                self.note_queries(self.author_client, name)
+                queries = self.note_queries(self.author_client, name)
+                self.assertEqual(len(queries), 1)
+                self.assertIn(f'"id" = {self.note.pk}', queries[0])
+        detail = self.note_queries(self.author_client, 'notes:detail')
+        self.assertEqual(len(detail), 1)
+        self.assertNotIn('"text"', detail[0].split('FROM')[0])
+        self.assertEqual(note_cache.stats()['pages']['hits'], 2)
+
+
+class TestTranslit(TestCase):
+    SYMBOLS = (
+        'абвгдеёжзийклмнопрстуфхцчшщъыьэюя'
+        'АБВГДЕЁЖЗИЙКЛМНОПРСТУФХЦЧШЩЪЫЬЭЮЯ'
+        'abcxyzXYZ0189 _-–—−\t\n.,;:!?&«»“”‘’"\'`№…#'
+        'ΣσςİKßéöÆ中文😀\u00a0\u200b'
+    )
+
+    def test_single_symbols_match_pytils(self):
+        """Любой символ сам по себе и в окружении даёт тот же slug."""
+        for code in range(0x3000):
+            symbol = chr(code)
+            for title in (symbol, f'a{symbol}b', f'{symbol} - {symbol}'):
+                self.assertEqual(fast_slugify(title), slugify(title))
+
+    def test_random_titles_match_pytils(self):
+        """Случайные заголовки: slugify и slugify_many дают slug pytils."""
+        rng = random.Random(0)
+        titles = [
+            ''.join(rng.choices(self.SYMBOLS, k=rng.randint(0, 60)))
+            for _ in range(3000)
+        ] + ['Tom &amp; Jerry', 'R&D', '  Список   покупок  ', '']
+        expected = [slugify(title) for title in titles]
+        self.assertEqual([fast_slugify(title) for title in titles], expected)
+        self.assertEqual(slugify_many(titles), expected)
+
+    def test_batch_keeps_order_and_duplicates(self):
+        titles = ['Заметка', 'Ёлка', 'Заметка', f'a{SEPARATOR}b']
+        self.assertEqual(
+            slugify_many(titles), [slugify(title) for title in titles]
+        )
+
+
+class TestSlugFilter(TestCase):
+    CAPACITY = 10_000
+    ERROR_RATE = 0.01
+    PROBES = 100_000
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='TYPIST')
+        cls.note = Note.objects.create(
+            title='Занятая', text='Текст', slug='taken', author=cls.author
+        )
+        cls.url = reverse('notes:slug-check')
+
+    def setUp(self):
+        # Фильтр живёт в процессе и пережил бы откат базы.
+        slug_filter.clear()
+        self.client.force_login(self.author)
+
+    def check(self, slug):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url, {'slug': slug})
+        note_queries = [
+            query for query in context.captured_queries
+            if 'notes_note' in query['sql']
+        ]
+        return response, len(note_queries)
+
+    def test_false_positive_rate(self):
+        """
+        Заполненный до ёмкости фильтр находит все добавленные строки,
+        а ложно срабатывает не чаще заявленной доли.
+        """
+        bloom = BloomFilter(self.CAPACITY, self.ERROR_RATE)
+        added = [f'note-{i}' for i in range(self.CAPACITY)]
+        for slug in added:
+            bloom.add(slug)
+        self.assertTrue(all(slug in bloom for slug in added))
+        false_positives = sum(
+            f'other-{i}' in bloom for i in range(self.PROBES)
+        )
+        # Запас на разброс: ожидается около 1000 срабатываний.
+        self.assertLess(false_positives / self.PROBES, self.ERROR_RATE * 1.2)
+
+    def test_free_slug_skips_database(self):
+        """Свободный slug отсеивается фильтром без запроса к заметкам."""
+        self.check('warm-up')
+        response, note_queries = self.check('free-slug')
+        self.assertEqual(
+            response.json(), {'slug': 'free-slug', 'available': True}
+        )
+        self.assertEqual(note_queries, 0)
+
+    def test_taken_slug_is_checked_in_database(self):
+        self.check('warm-up')
+        response, note_queries = self.check('taken')
+        self.assertEqual(
+            response.json(), {'slug': 'taken', 'available': False}
+        )
+        self.assertEqual(note_queries, 1)
+
+    def test_deleted_slug_is_available(self):
+        """Slug удалённой заметки остаётся в фильтре, но он свободен."""
+        self.check('warm-up')
+        self.note.delete()
+        response, note_queries = self.check('taken')
+        self.assertTrue(response.json()['available'])
+        self.assertEqual(note_queries, 1)
+
+    def test_new_slugs_are_added(self):
+        """Slug новых заметок, в том числе из импорта, сразу заняты."""
+        self.check('warm-up')
+        self.client.post(reverse('notes:add'), {
+            'title': 'Новая', 'text': 'Текст', 'slug': 'created'
+        })
+        import_notes(
+            self.author,
+            io.BytesIO(b'{"title": "T", "text": "X", "slug": "imported"}\n'),
+            'notes.jsonl'
+        )
+        for slug in ('created', 'imported'):
+            with self.subTest(slug=slug):
+                self.assertFalse(self.check(slug)[0].json()['available'])
+
+    def test_stale_filter_is_rebuilt_in_background(self):
+        """Устаревший фильтр отвечает, пока новый собирается в фоне."""
+        now = [0]
+        slugs = SlugFilter(clock=lambda: now[0])
+        started = threading.Event()
+        release = threading.Event()
+
+        def bloom_of(slug):
+            bloom = BloomFilter(self.CAPACITY, self.ERROR_RATE)
+            bloom.add(slug)
+            return bloom
+
+        def slow_load():
+            started.set()
+            release.wait(5)
+            return bloom_of('new')
+
+        slugs.load = lambda: bloom_of('old')
+        old = slugs.current()
+        self.assertIn('old', old)
+        slugs.load = slow_load
+        with self.settings(NOTE_SLUG_FILTER_REBUILD_INTERVAL=60):
+            now[0] += 60
+            self.assertIs(slugs.current(), old)
+            self.assertTrue(started.wait(5))
+            thread = slugs.thread
+            self.assertIs(slugs.current(), old)
+            self.assertIs(slugs.thread, thread)
+            slugs.add('added')
+            release.set()
+            thread.join()
+            new = slugs.current()
+        self.assertNotIn('old', new)
+        self.assertIn('new', new)
+        self.assertIn('added', new)
+
+    def test_invalid_slug(self):
+        for slug in ('', 'не slug', 'a' * 101):
+            with self.subTest(slug=slug):
+                response, note_queries = self.check(slug)
+                self.assertEqual(
+                    response.status_code, HTTPStatus.BAD_REQUEST
+                )
+                self.assertFalse(response.json()['available'])
+                self.assertEqual(note_queries, 0)
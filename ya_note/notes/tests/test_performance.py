@@ -0,0 +1,96 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from notes.models import Note
+from notes.note_cache import note_cache
+from notes.revisions import record_revision
+from notes.slug_filter import slug_filter
+from notes.tests.performance import check_baseline, measure, named_routes
+
+User = get_user_model()
+
+# Админка проверяется самим Django и требует отдельного клиента.
+SKIPPED_NAMESPACES = ('admin',)
+AUTHOR_NOTES_COUNT = 20
+OTHER_NOTES_COUNT = 5
+# Адреса, в которые подставляется slug заметки автора.
+SLUG_ROUTES = (
+    'notes:edit', 'notes:detail', 'notes:delete', 'notes:history'
+)
+# Адреса версии заметки автора: slug и номер версии.
+REVISION_ROUTES = ('notes:revision',)
+ROUTE_QUERY = {
+    'notes:search': '?q=Заметка',
+    'notes:slug-check': '?slug=author-note-0',
+}
+
+
+class TestRoutePerformance(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='PERF')
+        cls.other = User.objects.create(username='OTHER')
+        Note.objects.bulk_create(
+            Note(
+                title=f'Заметка {i}',
+                text='Текст',
+                slug=f'author-note-{i}',
+                author=cls.author
+            )
+            for i in range(AUTHOR_NOTES_COUNT)
+        )
+        Note.objects.bulk_create(
+            Note(
+                title=f'Чужая заметка {i}',
+                text='Текст',
+                slug=f'other-note-{i}',
+                author=cls.other
+            )
+            for i in range(OTHER_NOTES_COUNT)
+        )
+        cls.slug = 'author-note-0'
+        record_revision(Note.objects.get(slug=cls.slug))
+        cls.routes = [
+            name for name in named_routes()
+            if name.split(':')[0] not in SKIPPED_NAMESPACES
+        ]
+
+    def setUp(self):
+        # Кеш заметок и фильтр slug живут в процессе и пережили бы
+        # откат базы.
+        note_cache.clear()
+        slug_filter.clear()
+
+    def make_clients(self):
+        author_client = Client()
+        author_client.force_login(self.author)
+        other_client = Client()
+        other_client.force_login(self.other)
+        return {
+            'anonymous': Client(),
+            'author': author_client,
+            'other': other_client,
+        }
+
+    def test_route_performance(self):
+        """
+        Число запросов и прочитанных строк при GET-запросе к каждому
+        адресу не выросли относительно базовой линии.
+        """
+        for name in self.routes:
+            args = None
+            if name in SLUG_ROUTES:
+                args = (self.slug,)
+            elif name in REVISION_ROUTES:
+                args = (self.slug, 1)
+            url = reverse(name, args=args) + ROUTE_QUERY.get(name, '')
+            # Выход из аккаунта завершает сессию, клиенты создаются заново.
+            for user, client in self.make_clients().items():
+                with self.subTest(name=name, user=user):
+                    problems = check_baseline(
+                        f'{name} {user}', measure(client, url)
+                    )
+                    self.assertFalse(
+                        problems, f'{url}: ' + '; '.join(problems)
+                    )
@@ -48,6 +48,8 @@ class TestRoutes(TestCase):
             'notes:list',
             'notes:add',
             'notes:success',
+            'notes:import',
+            'notes:export',
         )
         for name in urls:
             with self.subTest(name=name):
@@ -85,6 +87,9 @@ class TestRoutes(TestCase):
             ('notes:list', None),
             ('notes:add', None),
             ('notes:success', None),
+            ('notes:import', None),
+            ('notes:export', None),
+            ('notes:slug-check', None),
         )
         for name, args in urls:
             with self.subTest(name=name):
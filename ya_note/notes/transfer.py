@@ -0,0 +1,265 @@
+"""
+Массовый импорт и выгрузка заметок пользователя.
+
+Импорт читает ZIP с файлами Markdown или JSONL по одной записи,
+проверяет весь файл и сохраняет заметки пачками по
+NOTES_IMPORT_BATCH_SIZE через bulk_create, подбирая slug сразу для
+всей пачки. Выгрузка отдаёт ZIP
+по мере чтения заметок из базы, не собирая архив в памяти.
+"""
+import json
+import posixpath
+import zipfile
+from collections import namedtuple
+from itertools import islice
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_slug
+from django.db import IntegrityError, transaction
+
+from .fields import decompress_text
+from .models import SLUG_QUERY_CHUNK, SLUG_SAVE_ATTEMPTS, Note
+from .slug_filter import slug_filter
+
+MARKDOWN_SUFFIX = '.md'
+HEADING = '# '
+
+# Заметка из файла: где она в файле, заголовок, текст и желаемый slug.
+Record = namedtuple('Record', ('place', 'title', 'text', 'slug'))
+
+
+class NoteImportError(ValueError):
+    """Файл импорта не удалось разобрать."""
+
+
+def to_markdown(title, text):
+    return f'{HEADING}{title}\n\n{text}'
+
+
+def from_markdown(place, name, content):
+    """
+    Заметка из файла Markdown: заголовок первого уровня в начале
+    файла становится заголовком заметки, иначе им служит имя файла.
+    """
+    if not content.startswith(HEADING):
+        return Record(place, name, content, name)
+    heading, _, text = content.partition('\n')
+    if text.startswith('\n'):
+        text = text[1:]
+    return Record(place, heading[len(HEADING):].strip(), text, name)
+
+
+def markdown_records(file):
+    limit = settings.NOTES_IMPORT_MAX_NOTE_SIZE
+    try:
+        archive = zipfile.ZipFile(file)
+    except zipfile.BadZipFile as error:
+        raise NoteImportError('Файл не является ZIP-архивом.') from error
+    with archive:
+        for info in archive.infolist():
+            name = posixpath.basename(info.filename)
+            if (
+                info.is_dir()
+                or name.startswith('.')
+                or not name.lower().endswith(MARKDOWN_SUFFIX)
+            ):
+                continue
+            # Размер из заголовка архива может не совпадать с данными.
+            with archive.open(info) as entry:
+                content = entry.read(limit + 1)
+            if len(content) > limit:
+                raise NoteImportError(
+                    f'{info.filename}: файл больше {limit} байт.'
+                )
+            try:
+                content = content.decode('utf-8-sig')
+            except UnicodeDecodeError as error:
+                raise NoteImportError(
+                    f'{info.filename}: текст не в кодировке UTF-8.'
+                ) from error
+            yield from_markdown(
+                info.filename, name[:-len(MARKDOWN_SUFFIX)], content
+            )
+
+
+def jsonl_records(file):
+    limit = settings.NOTES_IMPORT_MAX_NOTE_SIZE
+    for number, line in enumerate(file, 1):
+        place = f'Строка {number}'
+        if len(line) > limit:
+            raise NoteImportError(f'{place}: запись больше {limit} байт.')
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as error:
+            raise NoteImportError(f'{place}: некорректный JSON.') from error
+        if not (
+            isinstance(record, dict)
+            and isinstance(record.get('title'), str)
+            and isinstance(record.get('text'), str)
+        ):
+            raise NoteImportError(
+                f'{place}: нужны строковые поля title и text.'
+            )
+        slug = record.get('slug')
+        yield Record(
+            place,
+            record['title'],
+            record['text'],
+            slug if isinstance(slug, str) else ''
+        )
+
+
+RECORD_READERS = {
+    '.zip': markdown_records,
+    '.jsonl': jsonl_records,
+}
+
+
+def read_records(file, name):
+    """Записи файла name в порядке следования, формат — по расширению."""
+    for suffix, reader in RECORD_READERS.items():
+        if name.lower().endswith(suffix):
+            return reader(file)
+    raise NoteImportError(
+        'Поддерживаются файлы ' + ' и '.join(RECORD_READERS) + '.'
+    )
+
+
+def wanted_slug(slug):
+    """Slug из файла, если он годится для заметки, иначе пустая строка."""
+    if len(slug) > Note._meta.get_field('slug').max_length:
+        return ''
+    try:
+        validate_slug(slug)
+    except ValidationError:
+        return ''
+    return slug
+
+
+def assign_slugs(notes, wanted):
+    """
+    Назначает заметкам пачки slug из файла, если они свободны, а
+    остальным — свободные slug из заголовков, по запросу на
+    SLUG_QUERY_CHUNK основ.
+    """
+    candidates = list({slug for slug in wanted if slug})
+    taken = set()
+    for start in range(0, len(candidates), SLUG_QUERY_CHUNK):
+        taken.update(Note.objects.filter(
+            slug__in=candidates[start:start + SLUG_QUERY_CHUNK]
+        ).values_list('slug', flat=True))
+    kept = set()
+    rest = []
+    for note, slug in zip(notes, wanted):
+        if slug and slug not in taken and slug not in kept:
+            note.slug = slug
+            kept.add(slug)
+        else:
+            rest.append(note)
+    free = Note.free_slugs([note.title for note in rest], reserved=kept)
+    for note, slug in zip(rest, free):
+        note.slug = slug
+
+
+def note_title(record):
+    """Заголовок заметки из записи: без пробелов по краям и не пустой."""
+    title = record.title.strip()[:Note._meta.get_field('title').max_length]
+    if not title:
+        raise NoteImportError(f'{record.place}: пустой заголовок.')
+    return title
+
+
+def insert_batch(author, records):
+    notes = [
+        Note(title=note_title(record), text=record.text, author=author)
+        for record in records
+    ]
+    wanted = [wanted_slug(record.slug) for record in records]
+    for attempt in range(SLUG_SAVE_ATTEMPTS):
+        assign_slugs(notes, wanted)
+        try:
+            with transaction.atomic():
+                Note.objects.bulk_create(notes)
+            # bulk_create не отправляет post_save.
+            slug_filter.add(*(note.slug for note in notes))
+            return
+        except IntegrityError:
+            # Slug занял параллельный запрос: подбираем пачку заново.
+            if attempt == SLUG_SAVE_ATTEMPTS - 1:
+                raise
+
+
+def import_notes(author, file, name, batch_size=None):
+    """
+    Сохраняет заметки из файла name от имени author и возвращает их
+    число.
+
+    Файл читается дважды: сначала все записи проверяются, и ошибка в
+    любой из них отменяет импорт до записи в базу, затем заметки
+    сохраняются пачками, каждая в своей короткой транзакции, чтобы не
+    держать блокировку базы на запись весь импорт. Если пачку так и
+    не удалось сохранить, в ошибке сказано, сколько заметок уже
+    сохранено.
+    """
+    batch_size = batch_size or settings.NOTES_IMPORT_BATCH_SIZE
+    for record in read_records(file, name):
+        note_title(record)
+    file.seek(0)
+    records = read_records(file, name)
+    imported = 0
+    while batch := list(islice(records, batch_size)):
+        try:
+            insert_batch(author, batch)
+        except IntegrityError as error:
+            raise NoteImportError(
+                f'{batch[0].place}: не удалось подобрать свободные slug, '
+                f'сохранено заметок: {imported}.'
+            ) from error
+        imported += len(batch)
+    return imported
+
+
+class ZipBuffer:
+    """Файл для zipfile, который копит записанное до выдачи клиенту."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def export_rows(author):
+    return Note.objects.filter(author=author).order_by('id').values_list(
+        'slug', 'title', 'text'
+    ).iterator(chunk_size=settings.NOTES_EXPORT_CHUNK_SIZE)
+
+
+def zip_chunks(rows):
+    """
+    Части ZIP-архива с заметкой в файле slug.md на каждую строку.
+
+    Поток без позиционирования zipfile пишет с дескрипторами данных,
+    поэтому каждая заметка уходит клиенту сразу после сжатия.
+    """
+    buffer = ZipBuffer()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for slug, title, text in rows:
+            archive.writestr(
+                slug + MARKDOWN_SUFFIX,
+                to_markdown(title, decompress_text(text))
+            )
+            yield buffer.pop()
+    yield buffer.pop()
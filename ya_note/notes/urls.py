@@ -10,6 +10,23 @@ urlpatterns = [
     path('edit/<slug:slug>/', views.NoteUpdate.as_view(), name='edit'),
     path('note/<slug:slug>/', views.NoteDetail.as_view(), name='detail'),
     path('delete/<slug:slug>/', views.NoteDelete.as_view(), name='delete'),
+    path(
+        'history/<slug:slug>/', views.NoteHistory.as_view(), name='history'
+    ),
+    path(
+        'history/<slug:slug>/<int:number>/',
+        views.NoteRevisionDetail.as_view(),
+        name='revision'
+    ),
     path('notes/', views.NotesList.as_view(), name='list'),
+    path('search/', views.NoteSearch.as_view(), name='search'),
+    path('import/', views.NoteImport.as_view(), name='import'),
+    path('export/', views.NoteExport.as_view(), name='export'),
+    path(
+        'slug/check/', views.NoteSlugCheck.as_view(), name='slug-check'
+    ),
     path('done/', views.NoteSuccess.as_view(), name='success'),
+    path(
+        'cache/stats/', views.NoteCacheStats.as_view(), name='cache-stats'
+    ),
 ]
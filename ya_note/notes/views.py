@@ -1,9 +1,27 @@
-from django.contrib.auth.mixins import LoginRequiredMixin
+from http import HTTPStatus
+
+from django.conf import settings
+from django.contrib.auth.mixins import (
+    LoginRequiredMixin, UserPassesTestMixin
+)
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, router
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from django.urls import reverse_lazy
 from django.views import generic
 
-from .forms import NoteForm
-from .models import Note
+from .forms import WARNING, NoteForm, NoteImportForm
+from .models import Note, atomic_retry
+from .note_cache import note_cache
+from .pagination import KeysetPaginationMixin
+from .ratelimit import RateLimitMixin
+from .revisions import record_revision, revision_diff, start_history
+from .search import search_notes
+from .slug_filter import slug_filter
+from .transfer import (
+    NoteImportError, export_rows, import_notes, zip_chunks
+)
 
 
 class Home(generic.TemplateView):
@@ -26,34 +44,232 @@ class NoteBase(LoginRequiredMixin):
         return self.model.objects.filter(author=self.request.user)
 
 
-class NoteCreate(NoteBase, generic.CreateView):
-    """Добавление заметки."""
+class CachedNoteMixin:
+    """
+    Находит заметку автора по id из кеша заметок вместо поиска по slug.
+
+    Slug проверяется и при попадании: если заметку с тех пор
+    переименовали или удалили, запись сбрасывается и заметка ищется
+    по slug как обычно.
+    """
+
+    def cached_pk(self):
+        """Id заметки из кеша, один поиск в кеше на запрос."""
+        if not hasattr(self, 'note_pk'):
+            self.note_pk = note_cache.get_pk(
+                self.request.user.pk, self.kwargs[self.slug_url_kwarg]
+            )
+        return self.note_pk
+
+    def get_object(self, queryset=None):
+        if queryset is None:
+            queryset = self.get_queryset()
+        slug = self.kwargs[self.slug_url_kwarg]
+        pk = self.cached_pk()
+        if pk is not None:
+            try:
+                return queryset.get(pk=pk, slug=slug)
+            except self.model.DoesNotExist:
+                note_cache.delete_pk(self.request.user.pk, slug)
+        note = super().get_object(queryset)
+        note_cache.set_pk(self.request.user.pk, slug, note.pk)
+        return note
+
+
+class NoteFormMixin:
+    """Сохранение заметки из формы."""
     template_name = 'notes/form.html'
     form_class = NoteForm
 
     def form_valid(self, form):
-        new_note = form.save(commit=False)
-        new_note.author = self.request.user
-        new_note.save()
+        note = form.instance
+        state = note.pk, note.slug, note._state.adding
+        save_form = super().form_valid
+
+        def save():
+            # Повтор транзакции начинается с заметки, как её дала форма.
+            note.pk, note.slug, note._state.adding = state
+            if note.pk:
+                # Заметки из импорта ещё без истории: сохраняем
+                # их текст до правки первой версией.
+                start_history(note.pk)
+            response = save_form(form)
+            record_revision(self.object)
+            return response
+
+        try:
+            return atomic_retry(save, router.db_for_write(Note, instance=note))
+        except IntegrityError:
+            # Заданный вручную slug успели занять после проверки в форме.
+            form.add_error('slug', form.cleaned_data['slug'] + WARNING)
+            return self.form_invalid(form)
+
+
+class NoteCreate(NoteBase, RateLimitMixin, NoteFormMixin, generic.CreateView):
+    """Добавление заметки."""
+    rate_limit_scope = 'note_create'
+
+    def form_valid(self, form):
+        form.instance.author = self.request.user
         return super().form_valid(form)
 
 
-class NoteUpdate(NoteBase, generic.UpdateView):
+class NoteUpdate(
+    NoteBase, CachedNoteMixin, RateLimitMixin, NoteFormMixin,
+    generic.UpdateView
+):
     """Редактирование заметки."""
-    template_name = 'notes/form.html'
-    form_class = NoteForm
+    rate_limit_scope = 'note_update'
 
 
-class NoteDelete(NoteBase, generic.DeleteView):
+class NoteDelete(
+    NoteBase, CachedNoteMixin, RateLimitMixin, generic.DeleteView
+):
     """Удаление заметки."""
     template_name = 'notes/delete.html'
+    rate_limit_scope = 'note_delete'
 
 
-class NotesList(NoteBase, generic.ListView):
-    """Список всех заметок пользователя."""
+class NotesList(NoteBase, KeysetPaginationMixin, generic.ListView):
+    """
+    Список заметок пользователя страницами по id.
+
+    Шаблону нужны только id, slug и заголовок, поэтому текст заметок
+    из базы не читается.
+    """
     template_name = 'notes/list.html'
+    paginate_by = settings.NOTES_COUNT_ON_LIST_PAGE
+
+    def get_queryset(self):
+        return super().get_queryset().only('id', 'slug', 'title')
 
 
-class NoteDetail(NoteBase, generic.DetailView):
-    """Заметка подробно."""
+class NoteSearch(LoginRequiredMixin, generic.ListView):
+    """Поиск по заметкам пользователя с ранжированием по bm25."""
+    template_name = 'notes/search.html'
+    paginate_by = settings.NOTES_COUNT_ON_LIST_PAGE
+
+    def get_queryset(self):
+        return search_notes(self.request.user, self.request.GET.get('q', ''))
+
+
+class NoteDetail(NoteBase, CachedNoteMixin, generic.DetailView):
+    """
+    Заметка подробно, страница берётся из кеша заметок.
+
+    Закешированная страница отдаётся после лёгкого запроса по id:
+    заметка с тем же slug и временем изменения есть в базе. Текст
+    заметки при этом не читается и шаблон не отрисовывается.
+    """
     template_name = 'notes/detail.html'
+
+    def get(self, request, *args, **kwargs):
+        pk = self.cached_pk()
+        page = note_cache.get_page(pk) if pk is not None else None
+        if page is not None:
+            updated, content = page
+            if self.get_queryset().filter(
+                pk=pk, slug=kwargs[self.slug_url_kwarg], updated=updated
+            ).exists():
+                return HttpResponse(content)
+        self.object = self.get_object()
+        response = self.render_to_response(
+            self.get_context_data(object=self.object)
+        )
+        response.render()
+        note_cache.set_page(self.object, response.content)
+        return response
+
+
+class NoteHistory(NoteBase, generic.DetailView):
+    """Список версий заметки."""
+    template_name = 'notes/history.html'
+
+    def get_queryset(self):
+        return super().get_queryset().defer('text')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['revisions'] = self.object.revisions.order_by(
+            '-number'
+        ).defer('data')
+        return context
+
+
+class NoteRevisionDetail(NoteHistory):
+    """Версия заметки и её отличия от предыдущей."""
+    template_name = 'notes/revision.html'
+
+    def get_context_data(self, **kwargs):
+        context = super(NoteHistory, self).get_context_data(**kwargs)
+        revision = get_object_or_404(
+            self.object.revisions.defer('data'), number=self.kwargs['number']
+        )
+        context['revision'] = revision
+        context['text'], context['diff'] = revision_diff(
+            self.object.pk, revision.number
+        )
+        return context
+
+
+class NoteImport(LoginRequiredMixin, RateLimitMixin, generic.FormView):
+    """Импорт заметок из ZIP с файлами Markdown или из JSONL."""
+    template_name = 'notes/import.html'
+    form_class = NoteImportForm
+    success_url = reverse_lazy('notes:list')
+    rate_limit_scope = 'note_import'
+
+    def form_valid(self, form):
+        file = form.cleaned_data['file']
+        try:
+            import_notes(self.request.user, file, file.name)
+        except NoteImportError as error:
+            form.add_error('file', str(error))
+            return self.form_invalid(form)
+        return super().form_valid(form)
+
+
+class NoteExport(LoginRequiredMixin, generic.View):
+    """Выгрузка всех заметок пользователя в ZIP с файлами Markdown."""
+
+    def get(self, request):
+        response = StreamingHttpResponse(
+            zip_chunks(export_rows(request.user)),
+            content_type='application/zip'
+        )
+        response['Content-Disposition'] = 'attachment; filename="notes.zip"'
+        return response
+
+
+class NoteCacheStats(LoginRequiredMixin, UserPassesTestMixin, generic.View):
+    """Попадания и промахи кеша заметок этого процесса для сотрудников."""
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request):
+        return JsonResponse(note_cache.stats())
+
+
+class NoteSlugCheck(LoginRequiredMixin, generic.View):
+    """
+    Свободен ли slug из параметра slug: проверка по мере ввода.
+
+    Свободные slug отсеиваются фильтром Блума без запросов к базе.
+    Собственный slug редактируемой заметки считается занятым.
+    """
+
+    def get(self, request):
+        slug = request.GET.get('slug', '')
+        try:
+            if not slug:
+                raise ValidationError('Укажите slug.')
+            Note._meta.get_field('slug').run_validators(slug)
+        except ValidationError as error:
+            return JsonResponse(
+                {'slug': slug, 'available': False, 'errors': error.messages},
+                status=HTTPStatus.BAD_REQUEST
+            )
+        return JsonResponse(
+            {'slug': slug, 'available': not slug_filter.is_taken(slug)}
+        )
@@ -87,3 +87,49 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+
+NOTES_COUNT_ON_LIST_PAGE = 50
+
+# Лимиты запросов на запись для RateLimitMixin: область —
+# (число запросов, за сколько секунд). Области без лимита не ограничены.
+RATE_LIMITS = {
+    'note_create': (20, 60),
+    'note_update': (30, 60),
+    'note_delete': (30, 60),
+    'note_import': (5, 60),
+}
+
+# Сколько заметок удалять в одной транзакции при фоновой очистке
+# удалённых пользователей.
+PURGE_BATCH_SIZE = 1000
+
+# Импорт заметок: сколько сохранять одним bulk_create и наибольший
+# размер одной заметки в файле импорта в байтах.
+NOTES_IMPORT_BATCH_SIZE = 500
+NOTES_IMPORT_MAX_NOTE_SIZE = 5 * 1024 * 1024
+# Сколько заметок читать из базы за раз при выгрузке в ZIP.
+NOTES_EXPORT_CHUNK_SIZE = 200
+
+# Каждая какая версия заметки хранит полный текст, а не дельту: столько
+# шагов, не больше, нужно для восстановления любой версии.
+NOTE_REVISION_SNAPSHOT_INTERVAL = 50
+
+# Тексты заметок длиннее порога в байтах хранятся сжатыми: zlib
+# быстрее, lzma сжимает сильнее.
+NOTE_TEXT_COMPRESS_THRESHOLD = 16 * 1024
+NOTE_TEXT_COMPRESSION = 'zlib'
+
+# Кеш заметок в памяти процесса: сколько хранить id заметок по slug
+# и отрисованных страниц заметок, сколько секунд и наибольший размер
+# страницы в байтах.
+NOTE_CACHE_MAX_ENTRIES = 10000
+NOTE_PAGE_CACHE_MAX_ENTRIES = 1000
+NOTE_CACHE_TTL = 300
+NOTE_PAGE_CACHE_MAX_SIZE = 256 * 1024
+
+# Фильтр Блума занятых slug для проверки slug по мере ввода: на сколько
+# slug рассчитан фильтр, допустимая доля ложных срабатываний и раз
+# во сколько секунд фильтр пересобирается из базы.
+NOTE_SLUG_FILTER_CAPACITY = 100_000
+NOTE_SLUG_FILTER_ERROR_RATE = 0.01
+NOTE_SLUG_FILTER_REBUILD_INTERVAL = 300